@@ -0,0 +1,29 @@
+# Эталонные реализации для проверки равенства результатов оптимизированных функций
+import numpy as np
+import pandas as pd
+
+
+def fix_labs_reference(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Исходная реализация fix_labs на вложенных циклах по ячейкам.
+
+    Args:
+        df (pd.DataFrame): Исходный DataFrame с данными.
+
+    Returns:
+        pd.DataFrame: DataFrame с исправленными лабораторными.
+    """
+    df_copy = df.copy()
+    df_copy.replace('', np.nan, inplace=True)
+
+    for i in range(1, len(df_copy)):
+        if pd.isna(df_copy.iloc[i, 0]):
+            for j in range(1, len(df_copy.columns)):
+                if pd.notna(df_copy.iloc[i, j]):
+                    df_copy.iloc[i - 1, j] = df_copy.iloc[i - 1, j] + '\n' + df_copy.iloc[i, j]
+            df_copy.iloc[i] = np.nan
+
+    df_copy = df_copy.dropna(how='all')
+    df_copy.replace(np.nan, '', inplace=True)
+
+    return df_copy
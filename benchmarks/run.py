@@ -0,0 +1,248 @@
+# Бенчмарк конвейера parse -> filter -> render без ghostscript и сети
+#
+# Запуск: python -m benchmarks.run [--repeat 20] [--runs 3] [--groups 20] [--save-baseline]
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+from benchmarks.reference import fix_labs_reference
+from benchmarks.synthetic import make_groups, make_table
+from utils.index import ScheduleIndex
+from utils.parser import create_message, fix_labs, format_lesson, get_today_schedule, parse_date_range, parse_table
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCHMARKS_DIR, 'fixtures')
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+TIMES = ['8:30 - 10:10', '10:20 - 12:00', '12:20 - 14:00', '14:10 - 15:50',
+         '16:00 - 17:40', '18:00 - 19:30', '19:40 - 21:10', '21:20 - 22:50']
+
+
+def load_fixtures() -> Dict[str, pd.DataFrame]:
+    """
+    Загружает записанные таблицы camelot из benchmarks/fixtures.
+
+    Returns:
+        Dict[str, pd.DataFrame]: Таблицы по именам файлов.
+    """
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, '*.json'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            fixtures[os.path.splitext(os.path.basename(path))[0]] = pd.DataFrame(json.load(f)['rows'])
+    return fixtures
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Возвращает перцентиль q (0..100) методом ближайшего ранга.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def reference_workload() -> None:
+    """
+    Эталонная нагрузка на чистом Python (около миллисекунды), не зависящая от кода бота.
+    """
+    total = 0
+    for i in range(30000):
+        total += i * i % 7
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict:
+    """
+    Измеряет задержку и выделения памяти одного вызова функции.
+
+    Время измеряется без tracemalloc, выделения - отдельным вызовом под tracemalloc. Перед каждым вызовом
+    измеряется эталонная нагрузка (см. reference_workload): скорость машины меняется на секунды (другие процессы,
+    частота процессора), и отношение времени вызова к времени соседнего замера эталонной нагрузки от этого
+    почти не зависит.
+
+    Args:
+        func (Callable[[], object]): Измеряемая функция без аргументов.
+        repeat (int): Количество замеров времени.
+
+    Returns:
+        dict: min/p50/p90/p99/max в миллисекундах, медиана отношения к эталонной нагрузке (relative),
+        суммарный объём и пик выделенной памяти в КиБ.
+    """
+    func()  # Прогрев
+    durations, ratios = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        reference_workload()
+        reference = time.perf_counter() - start
+        start = time.perf_counter()
+        func()
+        duration = time.perf_counter() - start
+        durations.append(duration * 1000)
+        ratios.append(duration / reference)
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    func()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename') if stat.size_diff > 0)
+
+    return {
+        'min_ms': round(min(durations), 4),
+        'p50_ms': round(percentile(durations, 50), 4),
+        'p90_ms': round(percentile(durations, 90), 4),
+        'p99_ms': round(percentile(durations, 99), 4),
+        'max_ms': round(max(durations), 4),
+        'relative': round(percentile(ratios, 50), 4),
+        'alloc_kib': round(allocated / 1024, 1),
+        'peak_kib': round(peak / 1024, 1)
+    }
+
+
+def check_fix_labs(tables: Dict[str, pd.DataFrame]) -> List[str]:
+    """
+    Сравнивает fix_labs с эталонной реализацией на всех таблицах.
+
+    Returns:
+        List[str]: Имена таблиц, на которых результаты различаются.
+    """
+    return [name for name, df in tables.items() if not fix_labs(df).equals(fix_labs_reference(df))]
+
+
+def build_stages(tables: Dict[str, pd.DataFrame], days: int) -> Dict[str, Callable[[], object]]:
+    """
+    Готовит измеряемые стадии конвейера для набора таблиц.
+
+    Args:
+        tables (Dict[str, pd.DataFrame]): Таблицы расписания.
+        days (int): Количество дней, для которых формируется расписание.
+
+    Returns:
+        Dict[str, Callable[[], object]]: Стадии по именам.
+    """
+    schedules = [parse_table(df) for df in tables.values()]
+    indexes = [ScheduleIndex(schedule) for schedule in schedules]
+    today = date.today()
+    increments = range(days)
+    lines = [(lesson if isinstance(lesson, str) else lesson[0]).split('\n')[-1].strip('[]')
+             for schedule in schedules for day in schedule.values() for lesson in day if lesson]
+    lessons = [sublesson for index in indexes for day in index.lessons.values() for lesson in day if lesson
+               for sublesson in (lesson if isinstance(lesson, list) else [lesson])]
+
+    return {
+        'fix_labs': lambda: [fix_labs(df) for df in tables.values()],
+        'parse_table': lambda: [parse_table(df) for df in tables.values()],
+        'parse_date_range': lambda: [parse_date_range(line, increment) for line in lines for increment in (0, 1)],
+        'get_today_schedule': lambda: [get_today_schedule(schedule, increment) for schedule in schedules for increment in increments],
+        'index_build': lambda: [ScheduleIndex(schedule).day(today) for schedule in schedules],
+        'index_lookup': lambda: [index.day(today + timedelta(increment)) for index in indexes for increment in increments],
+        'format_lesson': lambda: [format_lesson(lesson, TIMES, lesson.slot) for lesson in lessons if lesson.slot < 7],
+        'create_message': lambda: [create_message(index.day(today + timedelta(increment)), increment, scheduled=False)
+                                   for index in indexes for increment in increments]
+    }
+
+
+def best_of(runs: List[Dict[str, dict]]) -> Dict[str, dict]:
+    """
+    Выбирает для каждой стадии прогон с наименьшим относительным временем: случайные задержки (планировщик ОС,
+    сборка мусора) только увеличивают время, поэтому минимум устойчивее одного прогона.
+    """
+    return {name: min((run[name] for run in runs), key=lambda stats: stats['relative']) for name in runs[0]}
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float, min_delta_ms: float) -> List[str]:
+    """
+    Сравнивает время стадии относительно эталонной нагрузки (см. measure) с сохранённым базовым замером.
+
+    Args:
+        results (Dict[str, dict]): Результаты замера.
+        baseline (Dict[str, dict]): Базовый замер.
+        tolerance (float): Допустимое относительное замедление.
+        min_delta_ms (float): Замедление меньше этого значения в миллисекундах не считается регрессией:
+            для стадий короче миллисекунды относительная погрешность замера больше tolerance.
+
+    Returns:
+        List[str]: Стадии, которые стали медленнее более чем на tolerance и min_delta_ms.
+    """
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base or 'relative' not in base:
+            continue
+        if stats['relative'] > base['relative'] * (1 + tolerance) and stats['min_ms'] - base['min_ms'] > min_delta_ms:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    """
+    Точка входа командной строки.
+    """
+    arg_parser = argparse.ArgumentParser(description='Бенчмарк конвейера расписания')
+    arg_parser.add_argument('--repeat', type=int, default=20, help='Количество замеров каждой стадии')
+    arg_parser.add_argument('--groups', type=int, default=20, help='Количество синтетических групп')
+    arg_parser.add_argument('--weeks', type=int, default=34, help='Длина синтетического семестра в неделях')
+    arg_parser.add_argument('--days', type=int, default=7, help='Количество дней, для которых формируется расписание')
+    arg_parser.add_argument('--baseline', default=BASELINE_PATH, help='Путь к файлу базового замера')
+    arg_parser.add_argument('--tolerance', type=float, default=0.25, help='Допустимое замедление относительно базового замера')
+    arg_parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                            help='Замедление меньше этого значения (в миллисекундах) не считается регрессией')
+    arg_parser.add_argument('--runs', type=int, default=3,
+                            help='Количество прогонов всех стадий; для каждой стадии берётся лучший прогон')
+    arg_parser.add_argument('--save-baseline', action='store_true', help='Сохранить результаты как базовый замер')
+    args = arg_parser.parse_args()
+
+    suites = {
+        'fixtures': load_fixtures(),
+        'synthetic': {f'group_{i}': df for i, df in enumerate(make_groups(args.groups, weeks=args.weeks))},
+        'dense_labs': {'dense': make_table(seed=1, weeks=args.weeks, density=1.0, lab_share=0.9)}
+    }
+
+    mismatches = check_fix_labs({f'{suite}/{name}': df for suite, tables in suites.items() for name, df in tables.items()})
+    if mismatches:
+        print(f'fix_labs differs from the reference implementation on: {", ".join(mismatches)}')
+        sys.exit(2)
+
+    stages = {f'{suite}/{stage}': func for suite, tables in suites.items()
+              for stage, func in build_stages(tables, args.days).items()}
+    # Прогоны чередуются по всем стадиям, чтобы кратковременная нагрузка на машину не попала во все замеры одной стадии
+    runs = [{name: measure(func, args.repeat) for name, func in stages.items()} for _ in range(max(1, args.runs))]
+    results = best_of(runs)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    print(f'{"stage":<34}{"min ms":>10}{"p50 ms":>10}{"p90 ms":>10}{"p99 ms":>10}{"alloc KiB":>11}{"peak KiB":>10}'
+          f'{"vs base":>9}')
+    for name, stats in results.items():
+        base = baseline.get(name)
+        ratio = '-'
+        if base and base.get('relative'):
+            ratio = f'{stats["relative"] / base["relative"]:.2f}x'
+        print(f'{name:<34}{stats["min_ms"]:>10.3f}{stats["p50_ms"]:>10.3f}{stats["p90_ms"]:>10.3f}'
+              f'{stats["p99_ms"]:>10.3f}{stats["alloc_kib"]:>11.1f}{stats["peak_kib"]:>10.1f}{ratio:>9}')
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'pandas': pd.__version__, 'runs': args.runs,
+                       'results': results}, f, indent=1)
+        print(f'Saved baseline to {args.baseline}')
+        return
+
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f'Regressions over {args.tolerance:.0%} and {args.min_delta_ms} ms: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+# Проверка бюджета запуска бота: время до готовности к обработке обновлений и пиковое потребление памяти
+#
+# Запуск: python -m benchmarks.startup [--repeat 5] [--max-overhead-seconds 1.0] [--max-overhead-rss-mb 40]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import List, Optional, Tuple
+
+# Тяжёлые модули, которые не должны импортироваться при запуске со скомпилированным расписанием
+HEAVY_MODULES = ('camelot', 'cv2', 'pandas', 'numpy', 'ghostscript')
+
+# Запуск бота без подключения к Telegram: импорт main и загрузка скомпилированных расписаний всех групп
+STARTUP_PROBE = f'''
+import json, os, sys, time
+start = time.perf_counter()
+import main
+from utils.compiled import compiled_path
+from utils.groups import groups
+from utils.parser import schedule_cache
+imported = time.perf_counter()
+loaded = []
+for pdf_path in {{group.pdf_path for group in groups.values()}}:
+    try:
+        if os.path.exists(compiled_path(pdf_path)):
+            schedule_cache.get(pdf_path)
+            loaded.append(pdf_path)
+    except Exception:
+        pass
+print(json.dumps({{
+    'import_s': imported - start,
+    'load_s': time.perf_counter() - imported,
+    'loaded': loaded,
+    'heavy_modules': sorted(name for name in {HEAVY_MODULES!r} if name in sys.modules)
+}}))
+'''
+
+# Минимальный процесс с aiogram: его время и память - нижняя граница, на которую бот не влияет
+BARE_PROBE = 'import aiogram'
+
+
+def run_probe(code: str) -> Tuple[float, float, str]:
+    """
+    Запускает код в отдельном процессе интерпретатора.
+
+    Args:
+        code (str): Код для python -c.
+
+    Returns:
+        Tuple[float, float, str]: Время работы процесса в секундах, пиковый RSS в МиБ и стандартный вывод.
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE, text=True)
+    output = process.stdout.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    exit_code = os.waitstatus_to_exitcode(status)
+    if exit_code:
+        raise RuntimeError(f'Probe exited with code {exit_code}')
+    # ru_maxrss в Linux измеряется в КиБ
+    return elapsed, usage.ru_maxrss / 1024, output
+
+
+def median(values: List[float]) -> float:
+    """
+    Возвращает медиану значений.
+    """
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def check(name: str, value: float, limit: Optional[float], unit: str) -> bool:
+    """
+    Выводит значение и результат сравнения с бюджетом.
+
+    Returns:
+        bool: True, если бюджет не задан или не превышен.
+    """
+    ok = limit is None or value <= limit
+    budget = f'(budget {limit:.2f} {unit})' if limit is not None else ''
+    print(f'{name:<28}{value:>10.2f} {unit:<4}{budget:<22}{"" if ok else "OVER BUDGET"}')
+    return ok
+
+
+def main() -> None:
+    """
+    Точка входа командной строки.
+    """
+    arg_parser = argparse.ArgumentParser(description='Проверка бюджета времени запуска и памяти бота')
+    arg_parser.add_argument('--repeat', type=int, default=5, help='Количество запусков (берётся медиана)')
+    arg_parser.add_argument('--max-seconds', type=float, help='Бюджет полного времени запуска в секундах')
+    arg_parser.add_argument('--max-rss-mb', type=float, help='Бюджет пикового RSS в МиБ')
+    arg_parser.add_argument('--max-overhead-seconds', type=float, default=1.0,
+                            help='Бюджет времени запуска сверх импорта aiogram в секундах')
+    arg_parser.add_argument('--max-overhead-rss-mb', type=float, default=40,
+                            help='Бюджет памяти сверх импорта aiogram в МиБ')
+    args = arg_parser.parse_args()
+
+    # Первый запуск прогревает кеш байт-кода и файловой системы
+    run_probe(STARTUP_PROBE)
+    # Запуски чередуются, чтобы колебания нагрузки на машину одинаково влияли на оба замера
+    bare, bot = [], []
+    for _ in range(args.repeat):
+        bare.append(run_probe(BARE_PROBE))
+        bot.append(run_probe(STARTUP_PROBE))
+    report = json.loads(bot[-1][2])
+
+    bare_seconds, bare_rss = median([run[0] for run in bare]), median([run[1] for run in bare])
+    bot_seconds, bot_rss = median([run[0] for run in bot]), median([run[1] for run in bot])
+
+    print(f'Loaded compiled schedules: {", ".join(report["loaded"]) or "none"}')
+    print(f'import main: {report["import_s"]:.2f} s, schedule load: {report["load_s"] * 1000:.1f} ms')
+    results = [
+        check('startup', bot_seconds, args.max_seconds, 's'),
+        check('startup over aiogram', bot_seconds - bare_seconds, args.max_overhead_seconds, 's'),
+        check('peak RSS', bot_rss, args.max_rss_mb, 'MiB'),
+        check('peak RSS over aiogram', bot_rss - bare_rss, args.max_overhead_rss_mb, 'MiB')
+    ]
+    if report['heavy_modules']:
+        print(f'Heavy modules imported at startup: {", ".join(report["heavy_modules"])}')
+        results.append(False)
+
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# Генератор синтетических таблиц расписания в формате camelot для бенчмарков
+import random
+from datetime import date, timedelta
+from typing import List
+
+import pandas as pd
+
+DAYS = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота']
+TIMES = ['8:30 - 10:10', '10:20 - 12:00', '12:20 - 14:00', '14:10 - 15:50',
+         '16:00 - 17:40', '18:00 - 19:30', '19:40 - 21:10', '21:20 - 22:50']
+SUBJECTS = ['Математический анализ', 'Физика', 'Программирование', 'Линейная алгебра', 'История России',
+            'Начертательная геометрия', 'Теоретическая механика', 'Электротехника', 'Материаловедение']
+TEACHERS = ['Абдуллин Т.Х.', 'Абросимова О.М.', 'Иванов И.И.', 'Петров П.П.']
+ROOMS = ['0313', '0412', '215', '0418', '0508', 'Спортзал']
+
+
+def _dates(rng: random.Random, start: date, weeks: int, weekday: int) -> str:
+    """
+    Формирует строку дат занятия: период каждую неделю, через неделю или список отдельных дат.
+    """
+    first = start + timedelta((weekday - start.weekday()) % 7)
+    last = first + timedelta(weeks=weeks - 1)
+    kind = rng.random()
+    if kind < 0.4:
+        return f'{first:%d.%m}-{last:%d.%m} к.н.'
+    if kind < 0.8:
+        shift = timedelta(weeks=rng.randint(0, 1))
+        return f'{first + shift:%d.%m}-{last:%d.%m} ч.н.'
+    return ', '.join(f'{first + timedelta(weeks=week):%d.%m}' for week in sorted(rng.sample(range(weeks), min(weeks, 5))))
+
+
+def _lesson(rng: random.Random, start: date, weeks: int, weekday: int, lab: bool) -> str:
+    """
+    Формирует текст ячейки с одним занятием так, как его извлекает camelot.
+    """
+    parts = [rng.choice(SUBJECTS), rng.choice(TEACHERS)[:-1]]
+    if lab:
+        parts += ['лабораторные занятия', f'({rng.choice("АБ")})']
+    else:
+        parts.append(rng.choice(['лекции', 'семинар']))
+    parts.append(rng.choice(ROOMS))
+    return '. '.join(parts) + f'. [{_dates(rng, start, weeks, weekday)}]'
+
+
+def make_table(seed: int = 0, weeks: int = 17, density: float = 0.6, lab_share: float = 0.3,
+               start: date = date(2025, 9, 1)) -> pd.DataFrame:
+    """
+    Создаёт таблицу расписания одной группы в формате camelot (tables[0].df).
+
+    Args:
+        seed (int, optional): Зерно генератора случайных чисел.
+        weeks (int, optional): Длина семестра в неделях.
+        density (float, optional): Доля занятых слотов.
+        lab_share (float, optional): Доля слотов с чередующимися лабораторными подгрупп (строка-продолжение).
+        start (date, optional): Первый день семестра.
+
+    Returns:
+        pd.DataFrame: Таблица расписания.
+    """
+    rng = random.Random(seed)
+    rows: List[List[str]] = [[''] + TIMES]
+    for weekday, day in enumerate(DAYS):
+        first, continuation = [day], ['']
+        for slot in range(len(TIMES)):
+            if rng.random() > density:
+                first.append('')
+                continuation.append('')
+            elif rng.random() < lab_share and slot < len(TIMES) - 1:
+                # Лабораторные двух подгрупп (занимают две пары, поэтому не ставятся последними):
+                # вторая подгруппа попадает в строку-продолжение
+                first.append(_lesson(rng, start, weeks, weekday, lab=True))
+                continuation.append(_lesson(rng, start, weeks, weekday, lab=True))
+            else:
+                first.append(_lesson(rng, start, weeks, weekday, lab=False))
+                continuation.append('')
+        rows.append(first)
+        if any(continuation):
+            rows.append(continuation)
+    return pd.DataFrame(rows)
+
+
+def make_groups(count: int, **kwargs) -> List[pd.DataFrame]:
+    """
+    Создаёт таблицы расписания для нескольких групп.
+
+    Args:
+        count (int): Количество групп.
+        **kwargs: Параметры make_table.
+
+    Returns:
+        List[pd.DataFrame]: Таблицы расписания.
+    """
+    return [make_table(seed=seed, **kwargs) for seed in range(count)]
@@ -1,30 +1,112 @@
 import asyncio
 import os
-import sys
+import re
 from datetime import datetime, timedelta
-from random import choice
+from typing import Optional, Union
 
 from aiogram import Bot, Dispatcher, types, F
-from aiogram.enums import ChatType, ParseMode
+from aiogram.enums import ChatMemberStatus, ChatType, ParseMode
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
 from aiogram.filters import Command
-from aiogram.types import BotCommand, FSInputFile, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
+from aiogram.methods import EditMessageText, SendMessage, SendPhoto
+from aiogram.types import BotCommand, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
 from dotenv import load_dotenv
 
-sys.path.append("utils")
-from basic import logger, config, days_until_date
-from parser import parse_pdf, get_today_schedule, create_message
+from utils.basic import logger, config, days_until_date, days_until_range
+from utils.cache import TTLCache
+from utils.groups import Group, groups, default_group, find_group, group_for_chat, subscribe, unsubscribe, subscribers
+from utils.ics import start_calendar_server
+from utils.images import image_library
+from utils.inline import inline_responder, parse_inline_query
+from utils.metrics import log_metrics_periodically, start_metrics_server
+from utils.middlewares import HandlerMetricsMiddleware, LogContextMiddleware, TelegramMetricsMiddleware, ThrottlingMiddleware
+from utils.outbox import PRIORITY_BROADCAST, PRIORITY_REPLY, outbox
+from utils.scheduler import DailyJob, DailyScheduler
+from utils.storage import storage
+from utils.watcher import watch_schedule_files
+from utils.webhook import run_webhook
+from utils.workers import get_schedule_async, render_range_async, render_schedule_async, run_in_executor, shutdown_executor
 
 # Загрузка переменных окружения
 load_dotenv()
 TOKEN = os.getenv('BOT_TOKEN')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
 
 # Инициализация диспетчера событий
 dp = Dispatcher()
 
+# Контекст обновления (чат, пользователь, команда) в записях лога
+dp.update.outer_middleware(LogContextMiddleware())
+
+# Ограничение частоты запросов и объединение одинаковых запросов: учитываются только обновления,
+# для которых найден обработчик, поэтому обычные сообщения в группах не расходуют лимит чата
+throttling = ThrottlingMiddleware()
+dp.message.middleware(throttling)
+dp.callback_query.middleware(throttling)
+
+# Метрики времени работы обработчиков
+dp.message.middleware(HandlerMetricsMiddleware())
+dp.callback_query.middleware(HandlerMetricsMiddleware())
+dp.inline_query.middleware(HandlerMetricsMiddleware())
+
+# Ответы на нажатия кнопки "Расписание на завтра" по (чат, сообщение с кнопкой)
+callback_replies = TTLCache(1024, 2 * 24 * 3600)
+
 # Идентификатор бота
 bot_id = None
 
 
+async def reply(message: types.Message, text: str, **kwargs) -> types.Message:
+    """
+    Отправляет ответ на команду через очередь исходящих сообщений с приоритетом ответов.
+
+    Args:
+        message (types.Message): Сообщение с командой.
+        text (str): Текст ответа.
+        **kwargs: Дополнительные параметры message.answer.
+
+    Returns:
+        types.Message: Отправленное сообщение.
+    """
+    return await outbox.submit(message.bot, message.answer(text, **kwargs), priority=PRIORITY_REPLY)
+
+
+def get_chat_group(message: types.Message) -> Optional[Group]:
+    """
+    Возвращает группу, расписание которой нужно отправить в чат сообщения.
+
+    Args:
+        message (types.Message): Сообщение с командой.
+
+    Returns:
+        Optional[Group]: Группа чата, подписки или группа по умолчанию (если ENABLE_SECURE выключен),
+        либо None, если команду в этом чате использовать нельзя.
+    """
+    group = group_for_chat(message.chat.id)
+    if group is None and not config['ENABLE_SECURE']:
+        group = default_group()
+    return group
+
+
+async def day_message(group: Group, increment_day: int) -> str:
+    """
+    Формирует сообщение с расписанием группы на день по запросу пользователя.
+
+    Args:
+        group (Group): Группа.
+        increment_day (int): Смещение дня относительно сегодняшнего.
+
+    Returns:
+        str: Сообщение с расписанием.
+    """
+    message_text = await render_schedule_async(group.pdf_path, increment_day, scheduled=False, group=group.name)
+    # Проверяем, если это выходной (воскресенье)
+    if message_text == 'Выходной':
+        date = (datetime.today() + timedelta(increment_day)).strftime('%d.%m')
+        message_text = f'<b>{date} - Воскресенье. Занятий нет!</b>'
+    return message_text
+
+
 # Обработчик команды /code
 @dp.message(Command(BotCommand(command='code', description='Получить ссылку на GitHub репозиторий бота')))
 async def handle_code_command(message: types.Message) -> None:
@@ -37,14 +119,14 @@ async def handle_code_command(message: types.Message) -> None:
     github_link = "https://github.com/overklassniy/stankin_schedule_bot/"
     try:
         # Пробуем отправить пользователю ссылку на репозиторий
-        await message.answer(f"Исходный код бота доступен на GitHub: {github_link}")
+        await reply(message, f"Исходный код бота доступен на GitHub: {github_link}")
         logger.info(f"Sent GitHub link to {message.chat.id}")
     except Exception as e:
         logger.error(f"Error sending GitHub link to {message.chat.id}: {e}")
 
 
 # Обработчик команды /schedule
-@dp.message(Command(BotCommand(command='schedule', description='Получить расписание на день')))
+@dp.message(Command(BotCommand(command='schedule', description='Получить расписание на день или диапазон дат')))
 async def handle_schedule_command(message: types.Message) -> None:
     """
     Обрабатывает команду /schedule и отправляет расписание на день.
@@ -52,12 +134,24 @@ async def handle_schedule_command(message: types.Message) -> None:
     Args:
         message (types.Message): Сообщение, содержащее команду /schedule.
     """
-    if config['ENABLE_SECURE'] and message.chat.id != config['GROUP_ID']:
-        await message.answer(text='Эту команду можно использовать только в указанной группе.')
+    group = get_chat_group(message)
+    if group is None:
+        await reply(message, 'Эту команду можно использовать только в указанной группе или после подписки (/subscribe).')
         logger.info(f"{message.from_user.id} tried to use {message.text} in {message.chat.id}")
         return None
     # Получаем аргументы из текста сообщения (например, если указано смещение по дате)
     args = message.text.split()
+
+    # Диапазон дат в формате дд.мм-дд.мм
+    if len(args) > 1 and re.fullmatch(r'\d{1,2}\.\d{1,2}-\d{1,2}\.\d{1,2}', args[-1]):
+        try:
+            start, end = days_until_range(args[-1])
+        except ValueError:
+            await reply(message, 'Не удалось разобрать диапазон дат. Пример: /schedule 01.09-07.09')
+            return None
+        await send_range(message, group, start, end)
+        return None
+
     try:
         # Пробуем извлечь число, чтобы учесть смещение по дням
         arg = args[-1]
@@ -71,16 +165,64 @@ async def handle_schedule_command(message: types.Message) -> None:
     # Формируем дату с учётом смещения
     date = (datetime.today() + timedelta(increment_day)).strftime('%d.%m')
 
-    # Получаем расписание на нужный день
-    today_schedule = get_today_schedule(parse_pdf(config['PDF_PATH']), increment_day)
-    message_text = create_message(today_schedule, increment_day, scheduled=False)
-    # Проверяем, если это выходной (воскресенье)
-    if message_text == 'Выходной':
-        message_text = f'<b>{date} - Воскресенье. Занятий нет!</b>'
     # Отправляем сообщение с расписанием пользователю
-    await message.answer(text=message_text, parse_mode=ParseMode.HTML)
+    await reply(message, await day_message(group, increment_day), parse_mode=ParseMode.HTML)
+
+    logger.info(f"Sent {group.name} schedule for {date} to {message.from_user.id}")
+
+
+# Обработчик команды /week
+@dp.message(Command(BotCommand(command='week', description='Получить расписание на неделю')))
+async def handle_week_command(message: types.Message) -> None:
+    """
+    Обрабатывает команду /week и отправляет расписание на текущую неделю (в воскресенье - на следующую).
+    Можно указать смещение в неделях: /week 1 - следующая неделя.
+
+    Args:
+        message (types.Message): Сообщение, содержащее команду /week.
+    """
+    group = get_chat_group(message)
+    if group is None:
+        await reply(message, 'Эту команду можно использовать только в указанной группе или после подписки (/subscribe).')
+        logger.info(f"{message.from_user.id} tried to use {message.text} in {message.chat.id}")
+        return None
+
+    args = message.text.split()
+    try:
+        week_offset = int(args[-1]) if len(args) > 1 else 0
+    except ValueError:
+        week_offset = 0
+
+    # Смещение понедельника недели относительно сегодняшнего дня
+    weekday = datetime.today().weekday()
+    start = -weekday + 7 * (week_offset + (1 if weekday == 6 else 0))
+    await send_range(message, group, start, start + 5)
+
+
+async def send_range(message: types.Message, group: Group, start: int, end: int) -> None:
+    """
+    Отправляет расписание группы на диапазон дней одним или несколькими сообщениями.
+
+    Args:
+        message (types.Message): Сообщение с командой.
+        group (Group): Группа.
+        start (int): Смещение первого дня относительно сегодняшнего дня.
+        end (int): Смещение последнего дня (включительно).
+    """
+    max_days = config.get('MAX_RANGE_DAYS', 31)
+    if end < start or end - start + 1 > max_days:
+        await reply(message, f'Диапазон должен содержать от 1 до {max_days} дней.')
+        return None
+
+    first = (datetime.today() + timedelta(start)).strftime('%d.%m')
+    last = (datetime.today() + timedelta(end)).strftime('%d.%m')
+    messages = await render_range_async(group.pdf_path, start, end, group=group.name)
+    if not messages:
+        messages = [f'<b>{first}-{last} занятий нет!</b>']
+    for message_text in messages:
+        await reply(message, message_text, parse_mode=ParseMode.HTML)
 
-    logger.info(f"Sent schedule for {date} to {message.from_user.id}")
+    logger.info(f"Sent {group.name} schedule for {first}-{last} to {message.from_user.id}")
 
 
 # Обработчик команды /tomorrow
@@ -92,8 +234,9 @@ async def handle_tomorrow_command(message: types.Message) -> None:
     Args:
         message (types.Message): Сообщение, содержащее команду /tomorrow.
     """
-    if config['ENABLE_SECURE'] and message.chat.id != config['GROUP_ID']:
-        await message.answer(text='Эту команду можно использовать только в указанной группе.')
+    group = get_chat_group(message)
+    if group is None:
+        await reply(message, 'Эту команду можно использовать только в указанной группе или после подписки (/subscribe).')
         logger.info(f"{message.from_user.id} tried to use {message.text} in {message.chat.id}")
         return None
 
@@ -102,16 +245,10 @@ async def handle_tomorrow_command(message: types.Message) -> None:
     # Формируем дату с учётом смещения
     date = (datetime.today() + timedelta(increment_day)).strftime('%d.%m')
 
-    # Получаем расписание на нужный день
-    today_schedule = get_today_schedule(parse_pdf(config['PDF_PATH']), increment_day)
-    message_text = create_message(today_schedule, increment_day, scheduled=False)
-    # Проверяем, если это выходной (воскресенье)
-    if message_text == 'Выходной':
-        message_text = f'<b>{date} - Воскресенье. Занятий нет!</b>'
     # Отправляем сообщение с расписанием пользователю
-    await message.answer(text=message_text, parse_mode=ParseMode.HTML)
+    await reply(message, await day_message(group, increment_day), parse_mode=ParseMode.HTML)
 
-    logger.info(f"Sent schedule for {date} to {message.from_user.id}")
+    logger.info(f"Sent {group.name} schedule for {date} to {message.from_user.id}")
 
 
 # Обработчик нажатия на кнопку с данными 'tomorrow' в inline-кнопке
@@ -123,9 +260,94 @@ async def handle_tomorrow_query(call: CallbackQuery) -> None:
     Args:
         call (CallbackQuery): Объект CallbackQuery, содержащий информацию о нажатии на кнопку.
     """
-    if config["ENABLE_TOMORROW_BUTTON"]:
-        await handle_tomorrow_command(call.message)
-        logger.info(f"Sent schedule for {call.message.chat.id} to {call.message.from_user.id} via inline button")
+    message = call.message
+    group = get_chat_group(message) if config["ENABLE_TOMORROW_BUTTON"] else None
+    if group is None:
+        await call.answer()
+        return None
+
+    message_text = await day_message(group, 1)
+    # Повторные нажатия на кнопку одного сообщения обновляют уже отправленный ответ, а не добавляют новый
+    key = (message.chat.id, message.message_id)
+    reply_id = callback_replies.get(key)
+    if reply_id is not None:
+        try:
+            await outbox.submit(call.bot, EditMessageText(chat_id=message.chat.id, message_id=reply_id, text=message_text,
+                                                          parse_mode=ParseMode.HTML), priority=PRIORITY_REPLY)
+        except TelegramBadRequest as e:
+            # Ответ не изменился - редактировать нечего; иначе ответ, вероятно, удалён, и отправляется новый
+            if 'message is not modified' not in str(e):
+                reply_id = None
+    if reply_id is None:
+        sent = await reply(message, message_text, parse_mode=ParseMode.HTML)
+        callback_replies.set(key, sent.message_id)
+    await call.answer()
+    logger.info(f"Sent {group.name} schedule for tomorrow to {call.from_user.id} in {message.chat.id} via inline button")
+
+
+async def is_group_member(bot: Bot, group: Group, user_id: int) -> bool:
+    """
+    Проверяет, что пользователь состоит в чате группы.
+
+    Args:
+        bot (Bot): Бот.
+        group (Group): Группа.
+        user_id (int): ID пользователя.
+
+    Returns:
+        bool: True, если пользователь - участник или администратор чата группы.
+    """
+    try:
+        member = await bot.get_chat_member(group.chat_id, user_id)
+    except TelegramAPIError as e:
+        logger.error(f"Error checking membership of {user_id} in {group.chat_id}: {e}")
+        return False
+    return member.status in (ChatMemberStatus.CREATOR, ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.MEMBER) or \
+        member.status == ChatMemberStatus.RESTRICTED and bool(getattr(member, 'is_member', False))
+
+
+# Обработчик команды /subscribe
+@dp.message(Command(BotCommand(command='subscribe', description='Подписаться на расписание группы')))
+async def handle_subscribe_command(message: types.Message) -> None:
+    """
+    Обрабатывает команду /subscribe и подписывает чат на ежедневное расписание указанной группы.
+
+    Args:
+        message (types.Message): Сообщение, содержащее команду /subscribe и код группы.
+    """
+    if message.chat.type != ChatType.PRIVATE:
+        await reply(message, 'Подписаться на расписание можно только в личных сообщениях с ботом.')
+        logger.info(f"{message.from_user.id} tried to use {message.text} in {message.chat.id}")
+        return None
+    args = message.text.split(maxsplit=1)
+    group = find_group(args[1]) if len(args) > 1 else None
+    if group is None:
+        await reply(message, f"Укажите код группы: /subscribe {default_group().name}\nДоступные группы: {', '.join(groups)}")
+        return None
+    # Подписка даёт доступ к командам, поэтому при ENABLE_SECURE подписаться могут только участники чата группы
+    if config['ENABLE_SECURE'] and not await is_group_member(message.bot, group, message.from_user.id):
+        await reply(message, f'Подписаться на расписание {group.name} могут только участники чата группы.')
+        logger.info(f"{message.from_user.id} tried to subscribe to {group.name} without being a member of its chat")
+        return None
+    subscribe(message.chat.id, group)
+    await reply(message, f'Вы подписались на расписание {group.name}.')
+    logger.info(f"Subscribed {message.chat.id} to {group.name}")
+
+
+# Обработчик команды /unsubscribe
+@dp.message(Command(BotCommand(command='unsubscribe', description='Отписаться от расписания группы')))
+async def handle_unsubscribe_command(message: types.Message) -> None:
+    """
+    Обрабатывает команду /unsubscribe и отменяет подписку чата.
+
+    Args:
+        message (types.Message): Сообщение, содержащее команду /unsubscribe.
+    """
+    if unsubscribe(message.chat.id):
+        await reply(message, 'Подписка отменена.')
+        logger.info(f"Unsubscribed {message.chat.id}")
+    else:
+        await reply(message, 'Вы не подписаны на расписание.')
 
 
 # Обработчик личных сообщений
@@ -138,66 +360,127 @@ async def handle_private_message(message: types.Message) -> None:
         message (types.Message): Сообщение, полученное ботом.
     """
     # Ответ пользователю, когда бот получает личное сообщение
-    response_text = f"Привет, это эксклюзивный бот для отправки расписания {config['GROUP']} и пока у меня нет функционала в личных сообщениях. Если Вы заинтересованы в настройке этого бота для получения своего расписания, то воспользуйтесь моим исходным кодом (/code)."
+    response_text = f"Привет, это бот для отправки расписания групп {', '.join(groups)}. Чтобы получать расписание в личных сообщениях, подпишитесь на свою группу командой /subscribe {default_group().name}. Если Вы заинтересованы в настройке этого бота для получения своего расписания, то воспользуйтесь моим исходным кодом (/code)."
     try:
-        await message.answer(response_text)
+        await reply(message, response_text)
         logger.info(f"Sent private message to {message.chat.id}")
     except Exception as e:
         logger.error(f"Error sending private message to {message.chat.id}: {e}")
 
 
+# Обработчик inline-запросов (@бот завтра, @бот 25.12, @бот Иванов)
+@dp.inline_query()
+async def handle_inline_query(inline_query: types.InlineQuery) -> None:
+    """
+    Отвечает на inline-запрос расписанием на день или найденными занятиями.
+
+    Группа берётся из начала запроса, из подписки личного чата пользователя или (если ENABLE_SECURE выключен)
+    используется группа по умолчанию.
+
+    Args:
+        inline_query (types.InlineQuery): Inline-запрос.
+    """
+    group, increment_day, query = parse_inline_query(inline_query.query)
+    if group is None:
+        group = group_for_chat(inline_query.from_user.id)
+    if group is None and not config['ENABLE_SECURE']:
+        group = default_group()
+    if group is None:
+        await inline_query.answer([], cache_time=config.get('INLINE_CACHE_TIME', 60), is_personal=True)
+        return None
+
+    results = await inline_responder.results(inline_query.from_user.id, group, increment_day, query)
+    if results is None:
+        # Пользователь уже изменил запрос, отвечать на устаревший не нужно
+        return None
+    # Результаты зависят от подписки пользователя, поэтому Telegram кеширует их отдельно для каждого
+    await inline_query.answer(results, cache_time=config.get('INLINE_CACHE_TIME', 60), is_personal=True)
+    logger.info(f"Answered inline query {inline_query.query!r} from {inline_query.from_user.id} with {len(results)} results")
+
+
+# Функция для отправки расписания группы в её чат и подписчикам
+async def send_group_schedule(bot: Bot, group: Group) -> None:
+    """
+    Отправляет расписание группы на сегодня в чат группы и всем подписанным чатам.
+
+    Args:
+        bot (Bot): Экземпляр бота для отправки сообщений.
+        group (Group): Группа.
+    """
+    # Получаем расписание на текущий день группы
+    message_text = await render_schedule_async(group.pdf_path, group.increment_day(), group=group.name)
+    if message_text == 'Выходной':
+        return None
+
+    keyboard = None
+
+    # Проверяем, включена ли кнопка "Расписание на завтра"
+    if config["ENABLE_TOMORROW_BUTTON"]:
+        inline_kb_list = [
+            [InlineKeyboardButton(text="Расписание на завтра", callback_data='tomorrow')]
+        ]
+        keyboard = InlineKeyboardMarkup(inline_keyboard=inline_kb_list)
+
+    # Изображение выбирается одно на всю рассылку: файл загружается в Telegram один раз, а затем отправляется по file_id
+    image = None
+    if config["ENABLE_IMAGE"]:
+        image = await run_in_executor(None, image_library.choose)
+
+    def build_method(chat_id: int, thread_id: Optional[int]) -> Union[SendMessage, SendPhoto]:
+        if image is not None:
+            return SendPhoto(chat_id=chat_id, message_thread_id=thread_id, photo=image.photo, caption=message_text,
+                             parse_mode=ParseMode.HTML, reply_markup=keyboard)
+        # Отправка только текста расписания
+        return SendMessage(chat_id=chat_id, message_thread_id=thread_id, text=message_text,
+                           parse_mode=ParseMode.HTML, reply_markup=keyboard)
+
+    # Чат группы (с темой супергруппы, если включен режим THREADED) и подписанные чаты
+    targets = [(group.chat_id, group.thread_number if group.threaded else None)] + [(chat_id, None) for chat_id in subscribers(group)]
+    results = []
+    if image is not None and image.file_id is None:
+        # Первая отправка загружает файл, остальные используют полученный file_id
+        try:
+            sent = await outbox.submit(bot, build_method(*targets[0]), priority=PRIORITY_BROADCAST)
+            image_library.remember(image, sent.photo[-1].file_id)
+            results.append(sent)
+        except Exception as e:
+            results.append(e)
+    # Рассылка идёт через очередь с лимитами Telegram и уступает место ответам на команды
+    results += await asyncio.gather(*(outbox.submit(bot, build_method(chat_id, thread_id), priority=PRIORITY_BROADCAST)
+                                      for chat_id, thread_id in targets[len(results):]), return_exceptions=True)
+
+    for (chat_id, _), result in zip(targets, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error sending daily {group.name} schedule to {chat_id}: {result}")
+            if image is not None and isinstance(result, TelegramBadRequest) and 'file identifier' in result.message:
+                # Сохранённый file_id мог стать недействительным - в следующий раз файл будет загружен заново
+                image_library.forget(image)
+        else:
+            logger.info(f"Sent daily {group.name} schedule to {chat_id}")
+
+
 # Функция для отправки ежедневного сообщения с расписанием
 async def send_daily_message(bot: Bot) -> None:
     """
-    Периодически отправляет расписание группы в чат.
+    Отправляет расписание каждой группы в её чат и подписчикам в заданное время.
+
+    Планировщик спит до ближайшей отправки среди всех групп, а за PRERENDER_MINUTES минут до неё
+    заранее формирует сообщение, чтобы в момент отправки оно уже было в кеше.
 
     Args:
         bot (Bot): Экземпляр бота для отправки сообщений.
     """
-    # Небольшая задержка перед началом отправки сообщений
-    await asyncio.sleep(10)
-    chat_id = config['GROUP_ID']
-
-    while True:
-        now = datetime.now()
-        # Проверяем время отправки расписания (в час HOUR и в минуты, заданные в MINUTES диапазоне)
-        if now.hour == config['HOUR'] and now.minute in range(config['MINUTES']):
-            # Получаем расписание на текущий день
-            today_schedule = get_today_schedule(parse_pdf(config['PDF_PATH']))
-            message_text = create_message(today_schedule)
-            if message_text != 'Выходной':
-                keyboard = None
-
-                # Проверяем, включена ли кнопка "Расписание на завтра"
-                if config["ENABLE_TOMORROW_BUTTON"]:
-                    inline_kb_list = [
-                        [InlineKeyboardButton(text="Расписание на завтра", callback_data='tomorrow')]
-                    ]
-                    keyboard = InlineKeyboardMarkup(inline_keyboard=inline_kb_list)
-
-                # Если включен режим отправки изображения
-                if config["ENABLE_IMAGE"]:
-                    images_dir = config['IMAGES_DIR']
-                    image = FSInputFile(f'{images_dir}/{choice(os.listdir(images_dir))}')
-                    # Если включен режим отправки в тему супергруппы
-                    if config['THREADED']:
-                        await bot.send_photo(chat_id=chat_id, message_thread_id=config['THREAD_NUMBER'], photo=image, caption=message_text,
-                                             parse_mode=ParseMode.HTML, reply_markup=keyboard if keyboard else None)
-                    else:
-                        await bot.send_photo(chat_id=chat_id, photo=image, caption=message_text, parse_mode=ParseMode.HTML, reply_markup=keyboard if keyboard else None)
-                else:
-                    # Отправка только текста расписания
-                    if config['THREADED']:
-                        await bot.send_message(chat_id=chat_id, message_thread_id=config['THREAD_NUMBER'], text=message_text,
-                                               parse_mode=ParseMode.HTML, reply_markup=keyboard if keyboard else None)
-                    else:
-                        await bot.send_message(chat_id=chat_id, text=message_text, parse_mode=ParseMode.HTML, reply_markup=keyboard if keyboard else None)
-                logger.info(f"Sent daily schedule to {chat_id}")
-            # После отправки сообщения, бот "засыпает" на SLEEP_TIME секунд
-            await asyncio.sleep(config['SLEEP_TIME'])
-        else:
-            # Проверка каждые CHECK_TIME_INTERVAL секунд
-            await asyncio.sleep(config['CHECK_TIME_INTERVAL'])
+    # При общем хранилище ежедневную отправку выполняет только один экземпляр бота
+    scheduler = DailyScheduler(config.get('SEND_STATE_PATH', 'data/send_state.json'), storage if storage.shared else None)
+    for group in groups.values():
+        # Отправка в HOUR:00; если бот был недоступен, отправка выполняется в течение MINUTES минут
+        scheduler.add(DailyJob(
+            name=group.name, hour=group.hour, minute=0, timezone=group.timezone, window=group.minutes,
+            callback=lambda group=group: send_group_schedule(bot, group),
+            prepare=lambda group=group: render_schedule_async(group.pdf_path, group.increment_day(), group=group.name),
+            prepare_ahead=config.get('PRERENDER_MINUTES', 5)
+        ))
+    await scheduler.run()
 
 
 async def main() -> None:
@@ -207,12 +490,48 @@ async def main() -> None:
     global bot_id
     bot = Bot(token=TOKEN)
     bot_id = bot.id
+    # Метрики времени запросов к Telegram
+    bot.session.middleware(TelegramMetricsMiddleware())
+
+    # Экспорт метрик: HTTP-эндпоинт в формате Prometheus и/или периодическая строка в логе
+    if config.get('METRICS_PORT'):
+        await start_metrics_server(config.get('METRICS_HOST', '127.0.0.1'), config['METRICS_PORT'])
+    if config.get('METRICS_LOG_INTERVAL'):
+        asyncio.create_task(log_metrics_periodically(config['METRICS_LOG_INTERVAL']))
+
+    # Календари групп в формате iCalendar
+    if config.get('ICS_PORT'):
+        await start_calendar_server(config.get('ICS_HOST', '127.0.0.1'), config['ICS_PORT'], config.get('ICS_MAX_AGE', 3600))
+
+    # Загружаем расписание заранее: из скомпилированного артефакта или, если его нет, из PDF-файла
+    # Расписания групп с общим PDF-файлом загружаются один раз
+    for pdf_path in {group.pdf_path for group in groups.values()}:
+        try:
+            await get_schedule_async(pdf_path)
+        except Exception as e:
+            logger.error(f"Error loading schedule from {pdf_path}: {e}")
+
+    # Новые версии PDF-файлов и справочника преподавателей загружаются и проверяются в фоне,
+    # а до этого бот продолжает отдавать предыдущую версию
+    if config.get('WATCH_INTERVAL', 5):
+        watcher = watch_schedule_files({group.pdf_path for group in groups.values()},
+                                       config.get('WATCH_INTERVAL', 5), config.get('WATCH_DEBOUNCE', 10))
+        asyncio.create_task(watcher.run())
 
     # Создаём асинхронную задачу для ежедневной отправки расписания
     asyncio.create_task(send_daily_message(bot))
 
-    # Запускаем диспетчер событий с поллингом (с периодом 30 секунд)
-    await dp.start_polling(bot, polling_timeout=30)
+    try:
+        if config.get('MODE', 'polling') == 'webhook':
+            # Принимаем обновления через вебхук на сервере aiohttp
+            await run_webhook(dp, bot, config, WEBHOOK_SECRET)
+        else:
+            # Запускаем диспетчер событий с поллингом (с периодом 30 секунд)
+            await dp.start_polling(bot, polling_timeout=30)
+    finally:
+        await outbox.stop()
+        await storage.close()
+        shutdown_executor()
 
 
 # Запуск бота
@@ -0,0 +1,29 @@
+# Общая настройка тестов: модули бота читают config.json из текущей директории при импорте,
+# поэтому тесты выполняются во временной директории с минимальной конфигурацией
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORKDIR = tempfile.mkdtemp(prefix='schedule_bot_tests_')
+with open(os.path.join(WORKDIR, 'config.json'), 'w', encoding='utf-8') as config_file:
+    json.dump({
+        'GROUP': 'ИДБ-12-34',
+        'GROUP_ID': -100,
+        'THREADED': False,
+        'THREAD_NUMBER': 0,
+        'HOUR': 5,
+        'MINUTES': 5,
+        'LOGS_DIR': 'logs',
+        'LOG_ROTATION': 'none',
+        'PDF_PATH': 'schedule.pdf',
+        'TEACHERS_FULLNAMES_PATH': 'data/teachers.json',
+        'ENABLE_IMAGE': False,
+        'IMAGES_DIR': 'images',
+        'ENABLE_SECURE': True,
+        'ENABLE_TOMORROW_BUTTON': True
+    }, config_file, ensure_ascii=False)
+os.chdir(WORKDIR)
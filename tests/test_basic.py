@@ -0,0 +1,28 @@
+from datetime import date
+
+import pytest
+
+from utils.basic import days_until_range
+
+
+@pytest.mark.parametrize('today, text, expected', [
+    # Текущая неделя, начавшаяся в прошлом
+    (date(2026, 10, 14), '12.10-18.10', (-2, 4)),
+    # Будущий диапазон текущего года
+    (date(2026, 10, 14), '01.11-07.11', (18, 24)),
+    # Диапазон через Новый год
+    (date(2026, 12, 20), '28.12-10.01', (8, 21)),
+    # Тот же диапазон, который идёт сейчас, в январе
+    (date(2027, 1, 5), '28.12-10.01', (-8, 5)),
+    # Целиком прошедший диапазон - в следующем году
+    (date(2026, 10, 14), '01.02-05.02', (110, 114)),
+    # Диапазон, закончившийся сегодня
+    (date(2026, 10, 14), '10.10-14.10', (-4, 0)),
+])
+def test_days_until_range(today, text, expected):
+    assert days_until_range(text, today) == expected
+
+
+def test_days_until_range_rejects_invalid_dates():
+    with pytest.raises(ValueError):
+        days_until_range('31.02-05.03', date(2026, 1, 1))
@@ -0,0 +1,27 @@
+from benchmarks.run import best_of, compare
+
+
+def stats(min_ms, relative):
+    return {'min_ms': min_ms, 'relative': relative}
+
+
+def test_compare_ignores_sub_millisecond_noise():
+    baseline = {'fast': stats(0.2, 0.2), 'slow': stats(100, 100)}
+    # Быстрая стадия стала вдвое медленнее, но меньше чем на миллисекунду
+    assert compare({'fast': stats(0.4, 0.4), 'slow': stats(110, 110)}, baseline, 0.25, 1.0) == []
+
+
+def test_compare_reports_relative_regressions():
+    baseline = {'stage': stats(100, 100)}
+    assert compare({'stage': stats(140, 140)}, baseline, 0.25, 1.0) == ['stage']
+    # Машина целиком медленнее (время выросло, отношение к эталонной нагрузке - нет)
+    assert compare({'stage': stats(150, 101)}, baseline, 0.25, 1.0) == []
+
+
+def test_compare_skips_stages_without_baseline():
+    assert compare({'new': stats(5, 5)}, {'old': {'p50_ms': 1}}, 0.25, 1.0) == []
+
+
+def test_best_of_takes_the_fastest_run():
+    runs = [{'stage': stats(12, 1.2)}, {'stage': stats(10, 1.0)}, {'stage': stats(15, 1.5)}]
+    assert best_of(runs) == {'stage': stats(10, 1.0)}
@@ -0,0 +1,54 @@
+import json
+import os
+
+import pytest
+
+from utils import compiled
+from utils.compiled import build_date_rules, dump_compiled, loads_compiled, read_compiled, write_compiled
+
+SCHEDULE = {
+    'Понедельник': ['Физика\nИванов И.И.\nлекции\n0313\n[01.09-22.12 к.н.]', '',
+                    ['Химия\nПетров П.П.\nлаб. работы\n(А)\n0214\n[08.09-15.12 ч.н.]', '']],
+    'Вторник': ['', 'Математика\nСидоров С.С.\nсеминар\n0101\n[02.09, 16.09]']
+}
+FINGERPRINT = ('/data/a.pdf', 1024, 10 ** 18, 'a' * 64)
+
+
+def test_round_trip_keeps_schedule_and_date_rules():
+    artifact = loads_compiled(dump_compiled(SCHEDULE, FINGERPRINT), FINGERPRINT)
+    assert artifact['schedule'] == SCHEDULE
+    assert artifact['date_rules'] == json.loads(json.dumps(build_date_rules(SCHEDULE)))
+    assert artifact['source'] == {'size': 1024, 'mtime_ns': 10 ** 18, 'sha256': 'a' * 64}
+
+
+def test_file_round_trip(tmp_path):
+    path = str(tmp_path / 'a.pdf.compiled.json')
+    write_compiled(path, SCHEDULE, FINGERPRINT)
+    assert read_compiled(path, FINGERPRINT)['schedule'] == SCHEDULE
+    assert os.listdir(tmp_path) == ['a.pdf.compiled.json']
+
+
+def test_other_source_is_rejected():
+    text = dump_compiled(SCHEDULE, FINGERPRINT)
+    assert loads_compiled(text, FINGERPRINT[:3] + ('b' * 64,)) is None
+    # Размер и время изменения не важны: артефакт привязан к содержимому
+    assert loads_compiled(text, ('/other.pdf', 1, 1, 'a' * 64)) is not None
+    assert loads_compiled(text) is not None
+
+
+def test_other_version_is_rejected(monkeypatch):
+    text = dump_compiled(SCHEDULE, FINGERPRINT)
+    monkeypatch.setattr(compiled, 'COMPILED_VERSION', compiled.COMPILED_VERSION + 1)
+    assert loads_compiled(text, FINGERPRINT) is None
+
+
+@pytest.mark.parametrize('text', ['', '{"version": 1, "sched', '[1, 2]', 'null', '{"schedule": {}}'])
+def test_corrupt_artifact_is_rejected(text):
+    assert loads_compiled(text, FINGERPRINT) is None
+
+
+def test_missing_or_truncated_file_is_rejected(tmp_path):
+    path = tmp_path / 'a.pdf.compiled.json'
+    assert read_compiled(str(path), FINGERPRINT) is None
+    path.write_text(dump_compiled(SCHEDULE, FINGERPRINT)[:100], encoding='utf-8')
+    assert read_compiled(str(path), FINGERPRINT) is None
@@ -0,0 +1,199 @@
+import sys
+
+import pandas as pd
+import pytest
+
+from utils import extract
+
+COMPLETE = {day: {'8:30-10:10': []} for day in extract.DAYS_OF_WEEK[:5]}
+CHANGED = {day: {'8:30-10:10': [], '10:20-12:00': []} for day in extract.DAYS_OF_WEEK[:5]}
+
+
+class FakeBackend:
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def extract(self, file_path, sha):
+        self.calls.append(sha)
+        return self.results[sha]
+
+
+@pytest.fixture
+def backends(monkeypatch, tmp_path):
+    fakes = {'camelot': FakeBackend({'v1': COMPLETE, 'v2': CHANGED}),
+             'text': FakeBackend({'v1': COMPLETE, 'v2': COMPLETE})}
+    monkeypatch.setattr(extract, 'BACKENDS', fakes)
+    monkeypatch.setattr(extract, 'SELECTIONS_PATH', str(tmp_path / 'extract_backends.json'))
+    monkeypatch.setitem(extract.config, 'EXTRACT_BACKEND', 'auto')
+    return fakes
+
+
+def parse(df):
+    return df
+
+
+def test_selection_is_reused_for_the_same_version(backends):
+    assert extract.select_backend('a.pdf', 'v1', parse)[0] == 'text'
+    backends['camelot'].calls.clear()
+    assert extract.extract_schedule('a.pdf', 'v1', parse) == COMPLETE
+    assert backends['camelot'].calls == []
+
+
+def test_new_version_is_compared_again(backends):
+    extract.select_backend('a.pdf', 'v1', parse)
+    # На новой версии text возвращает полное, но отличающееся от camelot расписание
+    assert extract.extract_schedule('a.pdf', 'v2', parse) == CHANGED
+    assert backends['text'].calls == ['v1', 'v2']
+    selection = extract.load_json_file(extract.SELECTIONS_PATH, {})
+    assert [(item['backend'], item['sha']) for item in selection.values()] == [('camelot', 'v2')]
+
+
+
+def test_select_backend_is_recomputed_for_a_new_version(backends):
+    assert extract.select_backend('a.pdf', 'v1', parse)[0] == 'text'
+    choice, results = extract.select_backend('a.pdf', 'v2', parse)
+    # На новой версии text разошёлся с camelot - выбирается camelot
+    assert choice == 'camelot'
+    assert results['text'][0] == COMPLETE and results['camelot'][0] == CHANGED
+    selection = extract.load_json_file(extract.SELECTIONS_PATH, {})
+    assert [(item['backend'], item['sha']) for item in selection.values()] == [('camelot', 'v2')]
+
+
+def test_build_grid_places_fragments_by_header_and_day():
+    fragments = [
+        (50, 750, 12, 'Расписание группы'),
+        (100, 700, 10, '8:30 - 10:10'), (200, 700, 10, '10:20 - 12:00'),
+        (20, 650, 10, 'Понедельник'), (20, 550, 10, 'Вторник'),
+        # Две строки одной ячейки и строка из двух фрагментов
+        (100, 660, 10, 'Физика'), (100, 648, 10, 'лекции'),
+        (240, 645, 10, 'И.И.'), (190, 646, 10, 'Иванов'),
+        (205, 560, 10, 'Химия'),
+    ]
+    expected = pd.DataFrame([['', '8:30 - 10:10', '10:20 - 12:00'],
+                             ['Понедельник', 'Физика\nлекции', 'Иванов И.И.'],
+                             ['Вторник', '', 'Химия']])
+    pd.testing.assert_frame_equal(extract.build_grid(fragments), expected)
+
+
+def test_build_grid_without_schedule_table():
+    assert extract.build_grid([(100, 700, 10, '8:30 - 10:10'), (20, 650, 10, 'Понедельник')]) is None
+    assert extract.build_grid([(100, 700, 10, 'Текст'), (200, 700, 10, 'страницы')]) is None
+
+
+def test_page_fragments_apply_text_and_transformation_matrices():
+    class FakePage:
+        def extract_text(self, visitor_text):
+            visitor_text('Физика', [2, 0, 0, 2, 10, 20], [1, 0, 0, 1, 50, 300], None, 5)
+            visitor_text('  ', [1, 0, 0, 1, 0, 0], [1, 0, 0, 1, 0, 0], None, 5)
+            return ''
+
+    assert extract.page_fragments(FakePage()) == [(110, 620, 10, 'Физика')]
+
+
+SCHEDULE_TABLE = pd.DataFrame([['', '8:30-10:10'], ['Понедельник', 'Математика']])
+OTHER_TABLE = pd.DataFrame([['Примечание', '']])
+
+
+class FakeTable:
+    def __init__(self, bbox, df=SCHEDULE_TABLE, page=1):
+        self._bbox = bbox
+        self.df = df
+        self.page = str(page)
+
+
+@pytest.fixture
+def locator(tmp_path):
+    return extract.TableLocator(str(tmp_path / 'table_locations.json'), workers=1)
+
+
+def fake_pages(monkeypatch, tables_by_call, pages=(2,)):
+    calls = []
+
+    def read_page_tables(file_path, pages, area=None):
+        calls.append((pages, area))
+        return tables_by_call.pop(0)
+
+    monkeypatch.setattr(extract, 'read_page_tables', read_page_tables)
+    monkeypatch.setattr(extract, 'find_schedule_pages', lambda file_path: list(pages))
+    return calls
+
+
+def test_table_area_converts_camelot_bbox():
+    # camelot: (левый, нижний, правый, верхний) -> table_areas: левый верхний и правый нижний углы
+    assert extract.table_area(FakeTable((10, 100, 300, 500))) == [10.0, 500.0, 300.0, 100.0]
+    assert extract.table_area(FakeTable(None)) is None
+
+
+def test_remember_expands_area_by_margin(locator):
+    locator._remember('v1', 3, [10.0, 500.0, 300.0, 100.0])
+    margin = extract.AREA_MARGIN
+    assert locator._locations() == {'v1': {'page': 3, 'area': [10 - margin, 500 + margin, 300 + margin, 100 - margin]}}
+
+
+def test_remember_keeps_latest_locations(monkeypatch, locator):
+    monkeypatch.setattr(extract, 'MAX_LOCATIONS', 3)
+    for sha in ('a', 'b', 'c', 'd'):
+        locator._remember(sha, 1, [0, 10, 10, 0])
+    locator._remember('b', 2, [0, 10, 10, 0])
+    locator._remember('e', 1, [0, 10, 10, 0])
+    assert list(locator._locations()) == ['d', 'b', 'e']
+
+
+def test_cached_area_is_used(monkeypatch, locator):
+    locator._remember('v1', 4, [10.0, 500.0, 300.0, 100.0])
+    calls = fake_pages(monkeypatch, [[(4, [10.0, 500.0, 300.0, 100.0], SCHEDULE_TABLE)]], pages=())
+    assert locator.extract('a.pdf', 'v1') is SCHEDULE_TABLE
+    assert calls == [('4', locator._locations()['v1']['area'])]
+
+
+def test_stale_cached_area_falls_back_to_located_pages(monkeypatch, locator):
+    locator._remember('v1', 4, [10.0, 500.0, 300.0, 100.0])
+    calls = fake_pages(monkeypatch, [[(4, [10.0, 500.0, 300.0, 100.0], OTHER_TABLE)],
+                                     [(2, [20.0, 700.0, 400.0, 50.0], OTHER_TABLE),
+                                      (2, [20.0, 600.0, 400.0, 60.0], SCHEDULE_TABLE)]])
+    assert locator.extract('a.pdf', 'v1') is SCHEDULE_TABLE
+    assert [pages for pages, _ in calls] == ['4', '2']
+    margin = extract.AREA_MARGIN
+    assert locator._locations()['v1'] == {'page': 2, 'area': [20 - margin, 600 + margin, 400 + margin, 60 - margin]}
+
+
+def test_table_without_bbox_is_not_remembered(monkeypatch, locator):
+    class FakeCamelot:
+        @staticmethod
+        def read_pdf(file_path, pages, **kwargs):
+            return [FakeTable(None, page=2)]
+
+    monkeypatch.setitem(sys.modules, 'camelot', FakeCamelot)
+    monkeypatch.setattr(extract, 'find_schedule_pages', lambda file_path: [2])
+    assert locator.extract('a.pdf', 'v1') is SCHEDULE_TABLE
+    assert locator._locations() == {}
+
+
+def test_pages_are_extracted_in_spawned_processes(monkeypatch):
+    contexts = []
+
+    class FakeExecutor:
+        def __init__(self, max_workers, mp_context=None):
+            contexts.append(mp_context.get_start_method())
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            return False
+
+        def map(self, func, *iterables):
+            return [[(int(page), None, SCHEDULE_TABLE)] for page in iterables[1]]
+
+    monkeypatch.setattr(extract, 'ProcessPoolExecutor', FakeExecutor)
+    assert extract.extract_pages('a.pdf', [1, 3], workers=2) == {1: [(None, SCHEDULE_TABLE)], 3: [(None, SCHEDULE_TABLE)]}
+    assert contexts == ['spawn']
+
+
+def test_backend_without_extract_cannot_be_created():
+    class Incomplete(extract.ExtractionBackend):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
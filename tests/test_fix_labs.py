@@ -0,0 +1,51 @@
+import glob
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.reference import fix_labs_reference
+from benchmarks.synthetic import make_table
+from utils.parser import fix_labs
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                         'benchmarks', 'fixtures', '*.json')))
+
+
+def load_fixture(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return pd.DataFrame(json.load(file)['rows'])
+
+
+@pytest.mark.parametrize('path', FIXTURES, ids=os.path.basename)
+def test_matches_reference_on_recorded_tables(path):
+    df = load_fixture(path)
+    pd.testing.assert_frame_equal(fix_labs(df), fix_labs_reference(df))
+
+
+@pytest.mark.parametrize('seed, density, lab_share', [
+    (0, 0.6, 0.3), (1, 1.0, 0.9), (2, 0.2, 0.5), (3, 1.0, 0.0), (4, 0.0, 0.0), (5, 0.8, 1.0)
+])
+def test_matches_reference_on_synthetic_tables(seed, density, lab_share):
+    df = make_table(seed=seed, weeks=17, density=density, lab_share=lab_share)
+    pd.testing.assert_frame_equal(fix_labs(df), fix_labs_reference(df))
+
+
+def test_merges_continuation_rows_and_keeps_the_input():
+    df = pd.DataFrame([
+        ['', '8:30 - 10:10', '10:20 - 12:00'],
+        ['Понедельник', 'Физика. лабораторные занятия. (А). 0313. [01.09]', 'История. лекции. 215. [01.09]'],
+        ['', 'Физика. лабораторные занятия. (Б). 0313. [08.09]', ''],
+        ['', '', ''],
+        ['Вторник', '', 'Химия. семинар. 0412. [02.09]']
+    ], index=[10, 11, 12, 13, 14])
+    original = df.copy()
+
+    result = fix_labs(df)
+
+    pd.testing.assert_frame_equal(result, fix_labs_reference(df))
+    assert list(result.index) == [10, 11, 14]
+    assert result.loc[11, 1] == ('Физика. лабораторные занятия. (А). 0313. [01.09]\n'
+                                 'Физика. лабораторные занятия. (Б). 0313. [08.09]')
+    pd.testing.assert_frame_equal(df, original)
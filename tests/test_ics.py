@@ -0,0 +1,106 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from utils import ics
+from utils.compiled import build_date_rules
+from utils.groups import default_group
+from utils.ics import build_calendar, create_calendar_app, escape_text, etag_matches, fold_line
+from utils.index import ScheduleIndex
+from utils.parser import schedule_cache
+
+# Первый понедельник марта текущего года: все занятия попадают в один календарный год
+MARCH = date(date.today().year, 3, 1)
+MONDAY = MARCH + timedelta((7 - MARCH.weekday()) % 7)
+SCHEDULE = {
+    'Понедельник': [f'Физика, механика; часть 1\nИванов И.И.\nлекции\n0313\n[{MONDAY:%d.%m}]',
+                    [f'Химия\nПетров П.П.\nлабораторные занятия\n(А)\n0214\n[{MONDAY:%d.%m}]',
+                     f'Химия\nПетров П.П.\nлабораторные занятия\n(Б)\n0215\n[{MONDAY:%d.%m}]']]
+}
+
+
+def unfold(text):
+    return text.replace('\r\n ', '')
+
+
+def summaries(text):
+    return [line.removeprefix('SUMMARY:') for line in unfold(text).split('\r\n') if line.startswith('SUMMARY:')]
+
+
+def test_escape_text():
+    assert escape_text('a\\b;c,d\ne') == 'a\\\\b\\;c\\,d\\ne'
+    assert escape_text('Аудитория 0313') == 'Аудитория 0313'
+
+
+def test_fold_line_keeps_multibyte_characters():
+    line = 'DESCRIPTION:' + 'Лабораторные занятия € ' * 10
+    folded = fold_line(line)
+    parts = folded.split('\r\n')
+    assert len(parts) > 1
+    assert all(len(part.encode('utf-8')) <= 75 for part in parts)
+    assert all(part.startswith(' ') for part in parts[1:])
+    # Склеивание строк по RFC 5545 восстанавливает исходное значение
+    assert unfold(folded) == line
+    assert fold_line('SUMMARY:Физика') == 'SUMMARY:Физика'
+
+
+def test_subgroup_filtering():
+    group = default_group()
+    index = ScheduleIndex(SCHEDULE)
+    everything = build_calendar(index, group, MONDAY.year)
+    assert summaries(everything) == ['Физика\\, механика\\; часть 1', 'Химия (А)', 'Химия (Б)']
+    assert all(len(line.encode('utf-8')) <= 75 for line in everything.split('\r\n'))
+
+    only_a = build_calendar(index, group, MONDAY.year, 'А')
+    assert summaries(only_a) == ['Физика\\, механика\\; часть 1', 'Химия (А)']
+    assert 'LOCATION:0215' not in only_a
+    assert f'DTSTART:{MONDAY:%Y%m%d}T' in only_a
+
+
+@pytest.fixture
+def calendar_group(monkeypatch, tmp_path):
+    group = default_group()
+    path = str(tmp_path / 'schedule.pdf')
+    monkeypatch.setattr(group, 'pdf_path', path)
+    schedule_cache.store(path, (path, 1, 1, 'c' * 64), SCHEDULE, build_date_rules(SCHEDULE))
+    schedule_cache.pin(path)
+    ics.calendar_cache.clear()
+    return group
+
+
+def test_calendar_endpoint_answers_304_for_matching_etag(calendar_group):
+    async def main():
+        async with TestClient(TestServer(create_calendar_app(max_age=60))) as client:
+            url = f'/calendar/{calendar_group.name}.ics'
+            response = await client.get(url)
+            assert response.status == 200
+            assert response.content_type == 'text/calendar'
+            assert response.headers['Cache-Control'] == 'max-age=60'
+            etag = response.headers['ETag']
+            assert 'Химия (Б)' in await response.text()
+
+            response = await client.get(url, headers={'If-None-Match': etag})
+            assert response.status == 304
+            assert response.headers['ETag'] == etag
+            assert await response.read() == b''
+
+            response = await client.get(url, headers={'If-None-Match': '"other"'})
+            assert response.status == 200
+
+            response = await client.get(url, params={'subgroup': 'А'}, headers={'If-None-Match': etag})
+            assert response.status == 200
+            assert response.headers['ETag'] != etag
+            assert 'Химия (Б)' not in await response.text()
+
+            assert (await client.get('/calendar/unknown.ics')).status == 404
+
+    asyncio.run(main())
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches('*', '"b"')
+    assert not etag_matches(None, '"b"')
+    assert not etag_matches('"a"', '"b"')
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+from aiogram.methods import SendMessage
+
+import main
+from utils.images import ImageLibrary
+
+
+def make_library(tmp_path, images_dir):
+    return ImageLibrary(str(images_dir), str(tmp_path / 'images.json'), avoid_recent=1)
+
+
+def test_missing_directory_returns_none(tmp_path):
+    assert make_library(tmp_path, tmp_path / 'missing').choose() is None
+
+
+def test_empty_directory_returns_none(tmp_path):
+    (tmp_path / 'images').mkdir()
+    assert make_library(tmp_path, tmp_path / 'images').choose() is None
+
+
+def test_choose_avoids_recent_image(tmp_path):
+    images = tmp_path / 'images'
+    images.mkdir()
+    (images / 'a.jpg').write_bytes(b'a')
+    (images / 'b.jpg').write_bytes(b'b')
+    library = make_library(tmp_path, images)
+    first = library.choose()
+    second = library.choose()
+    assert first.sha256 != second.sha256
+    assert second.file_id is None
+
+
+@pytest.fixture
+def sent(monkeypatch, tmp_path):
+    methods = []
+
+    async def render(*args, **kwargs):
+        return 'Расписание'
+
+    async def submit(bot, method, priority=None):
+        methods.append(method)
+        return method
+
+    monkeypatch.setattr(main, 'render_schedule_async', render)
+    monkeypatch.setattr(main.outbox, 'submit', submit)
+    monkeypatch.setattr(main, 'subscribers', lambda group: [])
+    monkeypatch.setitem(main.config, 'ENABLE_IMAGE', True)
+    return methods
+
+
+def test_broadcast_sends_text_without_images(sent, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, 'image_library', make_library(tmp_path, tmp_path / 'missing'))
+    group = main.default_group()
+    asyncio.run(main.send_group_schedule(None, group))
+    assert len(sent) == 1
+    assert isinstance(sent[0], SendMessage)
+    assert sent[0].chat_id == group.chat_id
+    assert sent[0].text == 'Расписание'
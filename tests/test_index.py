@@ -0,0 +1,56 @@
+import glob
+import json
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_table
+from utils.index import ScheduleIndex
+from utils.parser import create_message, get_today_schedule, parse_table
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                         'benchmarks', 'fixtures', '*.json')))
+
+# Смещения относительно сегодняшнего дня: прошлый, текущий и следующий учебный год
+INCREMENTS = range(-400, 401)
+
+# Периоды каждую неделю (к.н.) и через неделю (ч.н.), одиночные даты и периоды, переходящие на следующий год
+HANDWRITTEN = {
+    'Понедельник': ['Физика\nИванов И.И.\nлекции\n0313\n[01.09-22.12 к.н.]', '',
+                    ['Химия\nПетров П.П.\nлабораторные занятия\n(А)\n0214\n[08.09-15.12 ч.н.]',
+                     'Химия\nПетров П.П.\nлабораторные занятия\n(Б)\n0214\n[15.09-22.12 ч.н.]']],
+    'Вторник': ['', 'Математика\nСидоров С.С.\nсеминар\n0101\n[02.09, 16.09, 30.12]'],
+    'Среда': ['История\nКузнецов К.К.\nлекции\n215\n[17.12-11.02 к.н.]',
+              'Экономика\nСмирнов С.С.\nсеминар\n216\n[10.12-04.02 ч.н., 25.02]'],
+    'Суббота': ['Физкультура\nОрлов О.О.\nсеминар\nСпортзал\n[06.09-27.12 к.н., 10.01]']
+}
+
+
+def load_fixture(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return pd.DataFrame(json.load(file)['rows'])
+
+
+def schedules():
+    today = date.today()
+    monday = today - timedelta(today.weekday())
+    cases = {os.path.basename(path): parse_table(load_fixture(path)) for path in FIXTURES}
+    cases['synthetic-current'] = parse_table(make_table(seed=1, start=monday - timedelta(weeks=8)))
+    # Семестр, переходящий через новый год
+    new_year = date(today.year, 11, 24)
+    cases['synthetic-new-year'] = parse_table(make_table(seed=2, lab_share=0.6,
+                                                         start=new_year - timedelta(new_year.weekday())))
+    cases['handwritten'] = HANDWRITTEN
+    return cases
+
+
+@pytest.mark.parametrize('name, schedule', schedules().items(), ids=str)
+def test_index_matches_legacy_day_filter(name, schedule):
+    index = ScheduleIndex(schedule)
+    today = date.today()
+    differences = [increment for increment in INCREMENTS
+                   if create_message(index.day(today + timedelta(increment)), increment, scheduled=False)
+                   != create_message(get_today_schedule(schedule, increment), increment, scheduled=False)]
+    assert differences == []
@@ -0,0 +1,89 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+from utils.compiled import build_date_rules
+from utils.groups import default_group
+from utils.index import WEEKDAYS
+from utils.inline import InlineResponder, parse_inline_query
+from utils.parser import schedule_cache
+
+
+def test_empty_query_is_today():
+    assert parse_inline_query('') == (None, 0, '')
+    assert parse_inline_query('   ') == (None, 0, '')
+
+
+def test_group_and_day():
+    group = default_group()
+    assert parse_inline_query(group.name) == (group, 0, '')
+    assert parse_inline_query(f'{group.name.lower()} Завтра') == (group, 1, 'завтра')
+    assert parse_inline_query('+3') == (None, 3, '+3')
+    weekday = date.today().weekday()
+    assert parse_inline_query('пт') == (None, (4 - weekday) % 7, 'пт')
+    assert parse_inline_query('Пятница')[1] == (4 - weekday) % 7
+
+
+def test_date():
+    day = date.today() + timedelta(3)
+    assert parse_inline_query(f'{day:%d.%m.%Y}') == (None, 3, f'{day:%d.%m.%Y}')
+    group = default_group()
+    assert parse_inline_query(f'{group.name} {day:%d.%m.%Y}')[:2] == (group, 3)
+
+
+@pytest.mark.parametrize('text', ['31.02', '99.99.2024', '!!!', 'Иванов', 'ИДБ-99-99 физика'])
+def test_garbage_and_search_are_not_days(text):
+    group, increment_day, query = parse_inline_query(text)
+    assert group is None
+    assert increment_day is None
+    assert query == text.lower()
+
+
+@pytest.fixture
+def group(monkeypatch, tmp_path):
+    group = default_group()
+    path = str(tmp_path / 'schedule.pdf')
+    monkeypatch.setattr(group, 'pdf_path', path)
+    # Ближайший учебный день (воскресенье в расписании отсутствует)
+    day = date.today() + timedelta(1 if date.today().weekday() == 6 else 0)
+    schedule = {WEEKDAYS[day.weekday()]: [f'Физика\nИванов И.И.\nлекции\n0313\n[{day:%d.%m}]']}
+    schedule_cache.store(path, (path, 1, 1, 'd' * 64), schedule, build_date_rules(schedule))
+    schedule_cache.pin(path)
+    return group
+
+
+def test_day_results_are_cached(group):
+    responder = InlineResponder(debounce=0)
+
+    async def main():
+        first = await responder.results(1, group, 0, '')
+        assert await responder.results(2, group, 0, '') is first
+        return first
+
+    results = asyncio.run(main())
+    assert [result.id for result in results] == ['day0', 'day1', 'day2']
+    assert all(group.name in result.title for result in results)
+    assert responder.cache.stats()['hits'] == 1
+
+
+def test_search_and_garbage_query(group):
+    responder = InlineResponder(debounce=0)
+    found = asyncio.run(responder.results(1, group, None, 'физика'))
+    assert [result.title for result in found] == ['Физика']
+    assert '0313' in found[0].description
+    assert asyncio.run(responder.results(1, group, None, '!!!')) == []
+    assert asyncio.run(responder.results(1, group, None, 'химия')) == []
+
+
+def test_superseded_query_is_not_answered(group):
+    responder = InlineResponder(debounce=0.05)
+
+    async def main():
+        return await asyncio.gather(responder.results(1, group, None, 'физ'),
+                                    responder.results(1, group, None, 'физика'))
+
+    first, second = asyncio.run(main())
+    assert first is None
+    assert [result.title for result in second] == ['Физика']
+    assert responder._latest == {}
@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.logs import ContextFilter, init_worker_logging, start_worker_logging, update_context
+from utils.workers import run_in_executor
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def filtered_record(level=logging.INFO):
+    record = logging.LogRecord('tests', level, __file__, 1, 'message', None, None)
+    return record if ContextFilter().filter(record) else None
+
+
+def log_from_worker(text):
+    logging.getLogger('tests.worker').info(text)
+
+
+def test_executor_threads_see_update_context():
+    async def main():
+        with update_context(1, 2, '/today'):
+            record = await run_in_executor(None, filtered_record)
+        assert (record.chat_id, record.user_id, record.command) == (1, 2, '/today')
+        with update_context(1, 2, '/today', sample_rate=0):
+            # Информационные записи обновления, не попавшего в выборку, отбрасываются и в потоках пула
+            assert await run_in_executor(None, filtered_record) is None
+            assert await run_in_executor(None, filtered_record, logging.ERROR) is not None
+
+    asyncio.run(main())
+
+
+def test_worker_process_records_reach_parent_log():
+    handler = ListHandler()
+    logger = logging.getLogger('tests.worker')
+    logger.addHandler(handler)
+    records, listener = start_worker_logging()
+    try:
+        with ProcessPoolExecutor(max_workers=1, initializer=init_worker_logging, initargs=(records,)) as executor:
+            executor.submit(log_from_worker, 'from worker').result()
+    finally:
+        listener.stop()
+        logger.removeHandler(handler)
+    assert [record.getMessage() for record in handler.records] == ['from worker']
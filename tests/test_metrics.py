@@ -0,0 +1,57 @@
+import re
+
+from utils.metrics import BUCKETS, Metrics
+
+# Строка значения в текстовом формате Prometheus: имя{метки} значение
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(?:[a-zA-Z_]\w*="(?:[^"\\\n]|\\[\\"n])*",?)*\})? (\S+)$')
+
+
+def parse(text):
+    assert text.endswith('\n')
+    types, samples = {}, {}
+    for line in text.rstrip('\n').split('\n'):
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            # Каждая метрика описывается один раз и до своих значений
+            assert name not in types
+            assert not any(sample.startswith(name) for sample in samples)
+            types[name] = kind
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        assert line.rsplit(' ', 1)[0] not in samples
+        samples[line.rsplit(' ', 1)[0]] = float(match.group(3))
+    return types, samples
+
+
+def test_render_counters_histograms_and_gauges():
+    metrics = Metrics(prefix='bot')
+    metrics.inc('requests', status='200')
+    metrics.inc('requests', 2, status='304')
+    metrics.inc('errors', kind='say "hi"\\\n')
+    for seconds in (0.0005, 0.003, 0.003, 20):
+        metrics.observe('parse', seconds, stage='pdf')
+    metrics.register_collector('cache', lambda: {'hits': 1, 'misses': 2})
+    metrics.register_collector('cache', lambda: {'hits': 3, 'misses': 4})
+
+    types, samples = parse(metrics.render())
+    assert types == {'bot_errors_total': 'counter', 'bot_requests_total': 'counter',
+                     'bot_parse_seconds': 'histogram', 'bot_cache': 'gauge'}
+    assert samples['bot_requests_total{status="200"}'] == 1
+    assert samples['bot_requests_total{status="304"}'] == 2
+    assert samples['bot_errors_total{kind="say \\"hi\\"\\\\\\n"}'] == 1
+
+    buckets = [samples[f'bot_parse_seconds_bucket{{stage="pdf",le="{bound}"}}'] for bound in BUCKETS + ('+Inf',)]
+    assert buckets[:2] == [1, 3]
+    assert buckets == sorted(buckets)
+    assert buckets[-2:] == [3, 4]
+    assert samples['bot_parse_seconds_count{stage="pdf"}'] == 4
+    assert abs(samples['bot_parse_seconds_sum{stage="pdf"}'] - 20.0065) < 1e-9
+
+    # Повторная регистрация заменяет коллектор, а не дублирует значения
+    assert samples['bot_cache{kind="hits"}'] == 3
+    assert len([name for name in samples if name.startswith('bot_cache')]) == 2
+
+
+def test_empty_registry():
+    assert Metrics().render() == '\n'
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+from aiogram.types import CallbackQuery, Chat, Message, User
+
+from utils.middlewares import ThrottlingMiddleware
+
+GROUP_CHAT = {'id': -100, 'type': 'supergroup', 'title': 'T'}
+
+
+class FakeBot:
+    def __init__(self):
+        self.answers = []
+
+    async def __call__(self, method, request_timeout=None):
+        self.answers.append(method.text)
+        return True
+
+
+def make_user(user_id):
+    return {'id': user_id, 'is_bot': False, 'first_name': 'T'}
+
+
+def make_message(bot, text, user_id, message_id=1, chat=GROUP_CHAT):
+    return Message.model_validate({'message_id': message_id, 'date': int(time.time()), 'chat': chat, 'text': text,
+                                   'from': make_user(user_id)}, context={'bot': bot})
+
+
+def make_callback(bot, data, user_id, message_id):
+    message = {'message_id': message_id, 'date': int(time.time()), 'chat': GROUP_CHAT, 'text': 'Расписание'}
+    return CallbackQuery.model_validate({'id': f'{user_id}-{message_id}', 'chat_instance': '1', 'data': data,
+                                         'from': make_user(user_id), 'message': message}, context={'bot': bot})
+
+
+@pytest.fixture
+def bot():
+    return FakeBot()
+
+
+def dispatch(middleware, events):
+    handled = []
+
+    async def handler(event, data):
+        handled.append(event)
+
+    async def main():
+        for event in events:
+            chat = event.message.chat if isinstance(event, CallbackQuery) else event.chat
+            await middleware(handler, event, {'event_chat': Chat.model_validate(chat.model_dump()),
+                                              'event_from_user': User.model_validate(event.from_user.model_dump())})
+
+    asyncio.run(main())
+    return handled
+
+
+def test_same_command_in_chat_is_coalesced(bot):
+    middleware = ThrottlingMiddleware(user_rate=100, user_burst=100, chat_rate=100, chat_burst=100, coalesce_window=60)
+    events = [make_message(bot, '/today', 1), make_message(bot, '/TODAY@stankin_bot', 2),
+              make_message(bot, '/today ИДБ-12-34', 3)]
+    assert dispatch(middleware, events) == [events[0], events[2]]
+
+
+def test_same_button_is_coalesced_only_under_the_same_message(bot):
+    middleware = ThrottlingMiddleware(user_rate=100, user_burst=100, chat_rate=100, chat_burst=100, coalesce_window=60)
+    events = [make_callback(bot, 'tomorrow', 1, 10), make_callback(bot, 'tomorrow', 2, 10),
+              make_callback(bot, 'tomorrow', 3, 11)]
+    assert dispatch(middleware, events) == [events[0], events[2]]
+    # Отброшенное нажатие получает пустой ответ, чтобы Telegram перестал показывать ожидание
+    assert bot.answers == [None]
+
+
+def test_user_bucket_limits_one_user(bot):
+    middleware = ThrottlingMiddleware(user_rate=0.01, user_burst=2, chat_rate=100, chat_burst=100, coalesce_window=0)
+    events = [make_message(bot, f'/week {i}', 1) for i in range(3)] + [make_message(bot, '/week', 2)]
+    assert dispatch(middleware, events) == [events[0], events[1], events[3]]
+
+
+def test_chat_bucket_limits_all_users_in_chat(bot):
+    middleware = ThrottlingMiddleware(user_rate=100, user_burst=100, chat_rate=0.01, chat_burst=2, coalesce_window=0)
+    events = [make_message(bot, '/week', user_id) for user_id in range(1, 4)]
+    private = make_message(bot, '/week', 4, chat={'id': 4, 'type': 'private'})
+    assert dispatch(middleware, events + [private]) == [events[0], events[1], private]
+
+
+def test_dropped_button_press_is_answered(bot):
+    middleware = ThrottlingMiddleware(user_rate=0.01, user_burst=1, chat_rate=100, chat_burst=100, coalesce_window=0)
+    events = [make_callback(bot, 'tomorrow', 1, message_id) for message_id in (10, 11)]
+    assert dispatch(middleware, events) == [events[0]]
+    assert bot.answers == ['Слишком много запросов, попробуйте позже.']
@@ -0,0 +1,34 @@
+from datetime import date
+
+import pandas as pd
+
+from utils.index import ScheduleIndex
+from utils.models import Lesson, build_lessons
+from utils.parser import parse_table
+
+TIMES = ['', '8:30 - 10:10', '10:20 - 12:00', '12:20 - 14:00']
+
+
+def test_from_text_fields():
+    lesson = Lesson.from_text('Физика\nИванов И.И\nлабораторные занятия\n(А)\n0313\n[01.09-22.12 к.н.]', slot=2)
+    assert (lesson.subject, lesson.teacher, lesson.type, lesson.subgroup, lesson.room, lesson.dates, lesson.slot) == \
+        ('Физика', 'Иванов И.И.', 'лабораторные занятия', 'А', '0313', '01.09-22.12 к.н.', 2)
+
+
+def test_free_text_cell_is_an_empty_slot():
+    schedule = {'Понедельник': ['День самостоятельной работы', ['День самостоятельной работы'], '']}
+    assert build_lessons(schedule) == {'Понедельник': [None, None, None]}
+
+
+def test_index_from_table_with_free_text_cell():
+    df = pd.DataFrame([
+        TIMES,
+        ['Понедельник', 'Физика. лекции. 0313. [01.09-22.12 к.н.]', '', ''],
+        ['Вторник', 'День самостоятельной работы', '', 'История. семинар. 215. [02.09-23.12 к.н.]']
+    ])
+    index = ScheduleIndex(parse_table(df))
+
+    assert index.day(date(2025, 9, 9)) == ['Окно', 'Окно', index.lessons['Вторник'][2]]
+    assert index.lessons['Вторник'][2].subject == 'История'
+    assert index.day(date(2025, 9, 8))[0].subject == 'Физика'
+    assert index.search('самостоятельной', date(2025, 9, 1), date(2025, 9, 30)) == []
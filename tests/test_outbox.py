@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramBadRequest, TelegramNetworkError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from utils.outbox import PRIORITY_BROADCAST, PRIORITY_REPLY, OutboundQueue, TokenBucket
+
+
+class FakeBot:
+    def __init__(self, errors=None):
+        self.sent = []
+        self.errors = list(errors or [])
+
+    async def __call__(self, method):
+        if self.errors:
+            error = self.errors.pop(0)
+            if error is not None:
+                raise error
+        self.sent.append((method.chat_id, method.text, time.monotonic()))
+        return len(self.sent)
+
+
+def message(chat_id, text='x'):
+    return SendMessage(chat_id=chat_id, text=text)
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.delay() == 0
+    bucket.take()
+    bucket.take()
+    assert 0 < bucket.delay() <= 0.1
+    bucket.pause(1)
+    assert bucket.delay() >= 0.99
+
+
+def test_replies_go_before_broadcasts():
+    async def scenario():
+        bot, queue = FakeBot(), OutboundQueue(workers=1, global_rate=1000, chat_rate=1000)
+        futures = [queue.submit(bot, message(i, 'broadcast'), PRIORITY_BROADCAST) for i in range(1, 4)]
+        futures.append(queue.submit(bot, message(10, 'reply'), PRIORITY_REPLY))
+        await asyncio.gather(*futures)
+        await queue.stop()
+        return [text for _, text, _ in bot.sent]
+
+    assert asyncio.run(scenario()) == ['reply', 'broadcast', 'broadcast', 'broadcast']
+
+
+def test_chat_limit_does_not_block_other_chats():
+    async def scenario():
+        bot, queue = FakeBot(), OutboundQueue(workers=2, global_rate=1000, chat_rate=1000, group_rate=5)
+        start = time.monotonic()
+        group = [queue.submit(bot, message(-100)) for _ in range(17)]
+        private = queue.submit(bot, message(7))
+        await asyncio.gather(*group, private)
+        await queue.stop()
+        return start, bot.sent
+
+    start, sent = asyncio.run(scenario())
+    group_times = [moment for chat_id, _, moment in sent if chat_id == -100]
+    private_time = next(moment for chat_id, _, moment in sent if chat_id == 7)
+    # Лимит группы 5 в секунду при запасе 15: два последних сообщения ждут
+    assert group_times[-1] - start >= 0.3
+    assert private_time - start < 0.2
+
+
+def test_retry_after_pauses_and_retries():
+    async def scenario():
+        bot = FakeBot([TelegramRetryAfter(method=message(7), message='Too Many Requests', retry_after=0)])
+        queue = OutboundQueue(workers=1, global_rate=1000, chat_rate=1000)
+        result = await queue.submit(bot, message(7))
+        await queue.stop()
+        return result, bot.sent
+
+    result, sent = asyncio.run(scenario())
+    assert result == 1 and len(sent) == 1
+
+
+def test_errors_are_returned_to_the_caller():
+    async def scenario():
+        bot = FakeBot([TelegramNetworkError(method=message(7), message='timeout'),
+                       TelegramBadRequest(method=message(8), message='chat not found')])
+        queue = OutboundQueue(workers=1, global_rate=1000, chat_rate=1000, max_retries=0)
+        results = await asyncio.gather(queue.submit(bot, message(7)), queue.submit(bot, message(8)),
+                                       return_exceptions=True)
+        await queue.stop()
+        return results
+
+    network, bad_request = asyncio.run(scenario())
+    assert isinstance(network, TelegramNetworkError)
+    assert isinstance(bad_request, TelegramBadRequest)
+
+
+def test_stop_waits_for_delayed_messages():
+    async def scenario():
+        bot, queue = FakeBot(), OutboundQueue(workers=1, global_rate=1000, chat_rate=1000, group_rate=10)
+        for _ in range(31):
+            queue.submit(bot, message(-100))
+        await queue.stop(timeout=5)
+        return len(bot.sent), queue.stats()
+
+    sent, stats = asyncio.run(scenario())
+    assert sent == 31
+    assert stats == {'queued': 0, 'delayed': 0}
@@ -0,0 +1,87 @@
+import os
+import threading
+
+import pytest
+
+from utils import parser
+from utils.parser import ScheduleCache
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    calls = []
+
+    def load_schedule(file_path, fingerprint):
+        calls.append(fingerprint[3])
+        return {'version': fingerprint[3]}, {}
+
+    monkeypatch.setattr(parser, 'load_schedule', load_schedule)
+    return calls
+
+
+def write(path, content, mtime_ns):
+    path.write_bytes(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_unchanged_file_is_not_parsed_again(tmp_path, loads):
+    path = tmp_path / 'a.pdf'
+    write(path, b'v1', 10 ** 18)
+    cache = ScheduleCache()
+    assert cache.get(str(path)) is cache.get(str(path))
+    assert len(loads) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_same_content_with_new_mtime_keeps_the_entry(tmp_path, loads):
+    path = tmp_path / 'a.pdf'
+    write(path, b'v1', 10 ** 18)
+    cache = ScheduleCache()
+    schedule = cache.get(str(path))
+    write(path, b'v1', 2 * 10 ** 18)
+    assert cache.get(str(path)) is schedule
+    assert len(loads) == 1
+    assert cache.fingerprint(str(path))[2] == 2 * 10 ** 18
+
+
+@pytest.mark.parametrize('content, mtime_ns', [(b'v2', 2 * 10 ** 18), (b'v22', 10 ** 18)], ids=['content', 'size'])
+def test_changed_file_is_parsed_again(tmp_path, loads, content, mtime_ns):
+    path = tmp_path / 'a.pdf'
+    write(path, b'v1', 10 ** 18)
+    cache = ScheduleCache()
+    first = cache.get(str(path))
+    write(path, content, mtime_ns)
+    assert cache.get(str(path)) != first
+    assert len(loads) == 2
+    assert cache.fingerprint(str(path))[1:3] == (len(content), mtime_ns)
+
+
+def test_parse_does_not_block_other_files(tmp_path, monkeypatch):
+    slow, fast = tmp_path / 'slow.pdf', tmp_path / 'fast.pdf'
+    slow.write_bytes(b'slow')
+    fast.write_bytes(b'fast')
+    started, release = threading.Event(), threading.Event()
+
+    def load_schedule(file_path, fingerprint):
+        if file_path == str(slow):
+            started.set()
+            assert release.wait(5)
+        return {'path': file_path}, {}
+
+    monkeypatch.setattr(parser, 'load_schedule', load_schedule)
+    cache = ScheduleCache()
+    cache.get(str(fast))
+    thread = threading.Thread(target=cache.get, args=(str(slow),))
+    thread.start()
+    try:
+        assert started.wait(5)
+        result = []
+        lookup = threading.Thread(target=lambda: result.append(cache.get(str(fast))))
+        lookup.start()
+        lookup.join(1)
+        # Обращение к другому файлу завершается, пока первый файл ещё разбирается
+        assert result == [{'path': str(fast)}]
+    finally:
+        release.set()
+        thread.join()
+    assert cache.latest(str(slow)) == {'path': str(slow)}
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.scheduler import DailyJob, DailyScheduler
+from utils.storage import MemoryStorage, Storage, StorageError
+
+
+def job_at(name, moment, calls, window=5, prepare=None, prepare_ahead=0):
+    async def callback():
+        calls.append(name)
+
+    return DailyJob(name, moment.hour, moment.minute, None, window, callback, prepare, prepare_ahead)
+
+
+async def run_for(schedulers, seconds=0.3):
+    tasks = [asyncio.create_task(scheduler.run()) for scheduler in schedulers]
+    await asyncio.sleep(seconds)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_due_job_runs_once_and_is_rescheduled_for_tomorrow(tmp_path):
+    async def scenario():
+        calls = []
+        scheduler = DailyScheduler(str(tmp_path / 'state.json'))
+        scheduler.add(job_at('group', datetime.now(), calls))
+        await run_for([scheduler])
+        return calls, scheduler
+
+    calls, scheduler = asyncio.run(scenario())
+    assert calls == ['group']
+    assert scheduler.next_due() > (datetime.now() + timedelta(hours=20)).timestamp()
+    with open(tmp_path / 'state.json', encoding='utf-8') as file:
+        assert json.load(file) == {'group': datetime.now().date().isoformat()}
+
+
+def test_job_sent_today_is_not_repeated_after_restart(tmp_path):
+    state_path = tmp_path / 'state.json'
+    state_path.write_text(json.dumps({'group': datetime.now().date().isoformat()}), encoding='utf-8')
+
+    async def scenario():
+        calls = []
+        scheduler = DailyScheduler(str(state_path))
+        scheduler.add(job_at('group', datetime.now(), calls))
+        await run_for([scheduler])
+        return calls
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_missed_window_moves_to_tomorrow(tmp_path):
+    scheduler = DailyScheduler(str(tmp_path / 'state.json'))
+    moment = datetime.now() - timedelta(minutes=30)
+    if moment.date() != datetime.now().date():
+        pytest.skip('window check around midnight')
+    scheduler.add(job_at('group', moment, [], window=5))
+    assert scheduler.next_due() > datetime.now().timestamp()
+
+
+def test_prepare_is_scheduled_before_send(tmp_path):
+    async def prepare():
+        pass
+
+    scheduler = DailyScheduler(str(tmp_path / 'state.json'))
+    moment = datetime.now() + timedelta(minutes=30)
+    scheduler.add(job_at('group', moment, [], prepare=prepare, prepare_ahead=10))
+    kinds = [kind for _, _, kind, _ in sorted(scheduler._heap)]
+    assert kinds == ['prepare', 'send']
+
+
+def test_only_one_replica_sends(tmp_path):
+    async def scenario():
+        calls = []
+        storage = MemoryStorage()
+        schedulers = [DailyScheduler(str(tmp_path / f'state{i}.json'), storage) for i in range(3)]
+        for scheduler in schedulers:
+            scheduler.add(job_at('group', datetime.now(), calls))
+        await run_for(schedulers)
+        return calls
+
+    assert asyncio.run(scenario()) == ['group']
+
+
+class BrokenStorage(Storage):
+    shared = True
+
+    async def get(self, key):
+        raise StorageError('down')
+
+    async def set(self, key, value, ttl=None):
+        raise StorageError('down')
+
+    async def set_if_absent(self, key, value, ttl=None):
+        raise StorageError('down')
+
+    async def delete_if_equals(self, key, value):
+        raise StorageError('down')
+
+
+def test_storage_failure_still_sends(tmp_path):
+    async def scenario():
+        calls = []
+        scheduler = DailyScheduler(str(tmp_path / 'state.json'), BrokenStorage())
+        scheduler.add(job_at('group', datetime.now(), calls))
+        await run_for([scheduler])
+        return calls
+
+    assert asyncio.run(scenario()) == ['group']
@@ -0,0 +1,185 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.storage import RELEASE_SCRIPT, DistributedLock, MemoryStorage, RedisStorage, Storage, StorageError
+
+
+class FakeRedis:
+    """
+    Сервер с протоколом RESP2 в памяти теста: GET, SET [NX] [PX], EVAL (скрипт снятия блокировки), AUTH, SELECT.
+    """
+
+    def __init__(self, password=None):
+        self.password = password
+        self.data = {}
+        self.delay = 0
+        self.connections = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        return self
+
+    @property
+    def url(self):
+        return f'redis://127.0.0.1:{self.server.sockets[0].getsockname()[1]}'
+
+    async def stop(self):
+        self.server.close()
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        authed = self.password is None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2].decode())
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                name = args[0].upper()
+                if name == 'AUTH':
+                    authed = args[-1] == self.password
+                    reply = b'+OK\r\n' if authed else b'-WRONGPASS invalid password\r\n'
+                elif not authed:
+                    reply = b'-NOAUTH Authentication required\r\n'
+                else:
+                    reply = self.execute(name, args[1:])
+                writer.write(reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def execute(self, name, args):
+        if name == 'SELECT':
+            return b'+OK\r\n'
+        if name == 'GET':
+            value = self.data.get(args[0])
+            return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value.encode()), value.encode())
+        if name == 'SET':
+            if 'NX' in args and args[0] in self.data:
+                return b'$-1\r\n'
+            self.data[args[0]] = args[1]
+            return b'+OK\r\n'
+        if name == 'EVAL' and args[0] == RELEASE_SCRIPT:
+            if self.data.get(args[2]) == args[3]:
+                del self.data[args[2]]
+                return b':1\r\n'
+            return b':0\r\n'
+        return b'-ERR unknown command\r\n'
+
+
+def run(test, **server_kwargs):
+    async def main():
+        server = await FakeRedis(**server_kwargs).start()
+        try:
+            await test(server)
+        finally:
+            await server.stop()
+
+    asyncio.run(main())
+
+
+def test_commands_and_lock():
+    async def test(server):
+        storage = RedisStorage(server.url + '/2', prefix='p:')
+        assert await storage.get('key') is None
+        await storage.set('key', 'значение', ttl=10)
+        assert await storage.get('key') == 'значение'
+        assert server.data['p:key'] == 'значение'
+
+        first, second = DistributedLock(storage, 'job'), DistributedLock(storage, 'job')
+        assert await first.acquire()
+        assert not await second.acquire()
+        await second.release()
+        assert await second.acquire() is False
+        await first.release()
+        assert await second.acquire()
+        await storage.close()
+        assert server.connections == 1
+
+    run(test)
+
+
+def test_error_reply_keeps_connection():
+    async def test(server):
+        storage = RedisStorage(server.url)
+        with pytest.raises(StorageError, match='unknown command'):
+            await storage.command('PING')
+        await storage.set('key', 'value')
+        assert await storage.get('key') == 'value'
+        assert server.connections == 1
+        await storage.close()
+
+    run(test)
+
+
+def test_auth_failure_then_reconnect():
+    async def test(server):
+        storage = RedisStorage(server.url.replace('//', '//:wrong@'))
+        with pytest.raises(StorageError, match='WRONGPASS'):
+            await storage.get('key')
+        # Соединение без авторизации не сохраняется
+        assert storage._writer is None
+        storage.password = 'secret'
+        await storage.set('key', 'value')
+        assert await storage.get('key') == 'value'
+        assert server.connections == 2
+        await storage.close()
+
+    run(test, password='secret')
+
+
+def test_hung_server_times_out_and_reconnects():
+    async def test(server):
+        storage = RedisStorage(server.url, timeout=0.2)
+        await storage.set('key', 'value')
+        server.delay = 3600
+        started = time.monotonic()
+        with pytest.raises(StorageError):
+            await storage.get('key')
+        assert time.monotonic() - started < 2
+        assert storage._writer is None
+        server.delay = 0
+        assert await storage.get('key') == 'value'
+        assert server.connections == 2
+        await storage.close()
+
+    run(test)
+
+
+def test_cancelled_command_does_not_desync_replies():
+    async def test(server):
+        storage = RedisStorage(server.url)
+        await storage.set('old', 'old value')
+        await storage.set('new', 'new value')
+        server.delay = 0.2
+        task = asyncio.create_task(storage.get('old'))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        server.delay = 0
+        # Ответ на отменённую команду не должен быть прочитан как ответ на следующую
+        assert await storage.get('new') == 'new value'
+        await storage.close()
+
+    run(test)
+
+
+def test_incomplete_storage_cannot_be_created():
+    class ReadOnly(Storage):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        ReadOnly()
+    assert isinstance(MemoryStorage(), Storage)
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from aiogram.enums import ChatMemberStatus
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import GetChatMember
+from aiogram.types import Message
+
+import main
+from utils import groups
+
+
+class FakeBot:
+    def __init__(self, statuses):
+        self.statuses = statuses
+
+    async def get_chat_member(self, chat_id, user_id):
+        if user_id not in self.statuses:
+            raise TelegramBadRequest(method=GetChatMember(chat_id=chat_id, user_id=user_id), message='user not found')
+        return SimpleNamespace(status=self.statuses[user_id])
+
+
+def make_message(bot, text, chat_id, user_id):
+    chat = {'id': chat_id, 'type': 'private'} if chat_id > 0 else {'id': chat_id, 'type': 'supergroup', 'title': 'T'}
+    return Message.model_validate({'message_id': 1, 'date': int(time.time()), 'chat': chat, 'text': text,
+                                   'from': {'id': user_id, 'is_bot': False, 'first_name': 'T'}}, context={'bot': bot})
+
+
+@pytest.fixture
+def replies(monkeypatch, tmp_path):
+    sent = []
+
+    async def reply(message, text, **kwargs):
+        sent.append(text)
+
+    monkeypatch.setattr(main, 'reply', reply)
+    monkeypatch.setattr(groups, 'SUBSCRIPTIONS_PATH', str(tmp_path / 'subscriptions.json'))
+    monkeypatch.setattr(groups, 'subscriptions', {})
+    monkeypatch.setitem(main.config, 'ENABLE_SECURE', True)
+    return sent
+
+
+def subscribe(bot, chat_id, user_id):
+    asyncio.run(main.handle_subscribe_command(make_message(bot, f'/subscribe {groups.default_group().name}',
+                                                            chat_id, user_id)))
+
+
+def test_member_can_subscribe_in_private_chat(replies):
+    subscribe(FakeBot({7: ChatMemberStatus.MEMBER}), 7, 7)
+    assert groups.group_for_chat(7) is groups.default_group()
+    assert groups.subscribers(groups.default_group()) == [7]
+
+
+def test_non_member_cannot_subscribe_when_secure(replies):
+    subscribe(FakeBot({7: ChatMemberStatus.LEFT, 8: ChatMemberStatus.KICKED}), 7, 7)
+    subscribe(FakeBot({}), 9, 9)
+    assert groups.subscriptions == {}
+    assert all('только участники' in text for text in replies)
+
+
+def test_anyone_can_subscribe_when_not_secure(replies, monkeypatch):
+    monkeypatch.setitem(main.config, 'ENABLE_SECURE', False)
+    subscribe(FakeBot({}), 9, 9)
+    assert groups.group_for_chat(9) is groups.default_group()
+
+
+def test_group_chats_cannot_subscribe(replies):
+    subscribe(FakeBot({7: ChatMemberStatus.ADMINISTRATOR}), -500, 7)
+    assert groups.subscriptions == {}
+    assert 'личных сообщениях' in replies[0]
+    with pytest.raises(ValueError):
+        groups.subscribe(-500, groups.default_group())
+
+
+def test_stored_group_chat_subscriptions_are_ignored(replies):
+    groups.subscriptions['-500'] = groups.default_group().name
+    assert groups.group_for_chat(-500) is None
+    assert groups.subscribers(groups.default_group()) == []
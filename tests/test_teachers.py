@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+
+from utils import teachers
+from utils.teachers import TeacherDirectory, normalize_initials
+
+
+@pytest.fixture
+def directory(tmp_path):
+    path = tmp_path / 'teachers.json'
+    path.write_text(json.dumps({'Иванов И.И.': 'Иванов Иван Иванович'}), encoding='utf-8')
+    return TeacherDirectory(str(path), check_interval=60)
+
+
+def write(directory, names, mtime_ns):
+    with open(directory.file_path, 'w', encoding='utf-8') as file:
+        file.write(names if isinstance(names, str) else json.dumps(names))
+    os.utime(directory.file_path, ns=(mtime_ns, mtime_ns))
+
+
+def test_normalize_initials():
+    assert normalize_initials('Иванов И. И.') == normalize_initials('иванов И.И') == 'ивановии'
+
+
+def test_lookups_do_not_stat_the_file(directory, monkeypatch):
+    assert directory.get('Иванов И.И.') == 'Иванов Иван Иванович'
+    calls = []
+    real_stat = os.stat
+    monkeypatch.setattr(teachers.os, 'stat', lambda *args, **kwargs: calls.append(args) or real_stat(*args, **kwargs))
+    for _ in range(100):
+        assert directory.get('Иванов И. И.') == 'Иванов Иван Иванович'
+        assert directory.get('Петров П.П.') == 'Петров П.П.'
+    assert calls == []
+
+
+def test_change_is_picked_up_after_the_interval(directory):
+    assert directory.get('Петров П.П.') == 'Петров П.П.'
+    write(directory, {'Петров П.П.': 'Петров Пётр Петрович'}, 10 ** 18)
+    assert directory.get('Петров П.П.') == 'Петров П.П.'
+    directory._next_check = 0
+    assert directory.get('Петров П.П.') == 'Петров Пётр Петрович'
+    assert directory.version == 10 ** 18
+
+
+def test_watcher_mode_reloads_only_on_request(directory):
+    directory.check_interval = None
+    assert directory.get('Иванов И.И.') == 'Иванов Иван Иванович'
+    write(directory, {'Иванов И.И.': 'Другое имя'}, 10 ** 18)
+    directory._next_check = 0
+    assert directory.get('Иванов И.И.') == 'Иванов Иван Иванович'
+    assert directory.reload()
+    assert directory.get('Иванов И.И.') == 'Другое имя'
+
+
+def test_missing_or_broken_file_keeps_the_last_version(directory):
+    version = directory.version
+    os.remove(directory.file_path)
+    assert directory.reload()
+    assert directory.get('Иванов И.И.') == 'Иванов Иван Иванович'
+    assert directory.version == version
+
+    write(directory, '{broken', 10 ** 18)
+    assert not directory.reload()
+    assert directory.get('Иванов И.И.') == 'Иванов Иван Иванович'
+    assert directory.version == version
+
+
+def test_missing_file_without_previous_version(tmp_path):
+    directory = TeacherDirectory(str(tmp_path / 'absent.json'))
+    assert directory.get('Иванов И.И.') == 'Иванов И.И.'
+    assert directory.version is None
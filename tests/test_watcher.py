@@ -0,0 +1,106 @@
+import asyncio
+import os
+
+import pytest
+
+from utils import workers
+from utils.parser import schedule_cache
+from utils.watcher import FileWatcher
+from utils.workers import reload_schedule_async, validate_schedule
+
+VALID = {'Понедельник': ['Физика. лекции. 0313. [01.09-22.12 к.н.]'.replace('. ', '\n'), '']}
+
+
+def test_callback_waits_until_the_file_stops_changing(tmp_path):
+    path = tmp_path / 'schedule.pdf'
+    path.write_bytes(b'v1')
+    calls = []
+
+    async def callback(changed):
+        calls.append(changed)
+
+    async def scenario():
+        watcher = FileWatcher(interval=0, debounce=0)
+        watcher.watch(str(path), callback)
+        await watcher.check()
+        assert calls == []
+
+        for version in (b'v2', b'v22', b'v222'):
+            path.write_bytes(version)
+            await watcher.check()
+        assert calls == []
+        await watcher.check()
+        assert calls == [str(path)]
+        await watcher.check()
+        assert calls == [str(path)]
+
+        os.remove(path)
+        await watcher.check()
+        await watcher.check()
+        assert calls == [str(path)]
+
+    asyncio.run(scenario())
+
+
+def test_callback_errors_do_not_stop_the_watcher(tmp_path):
+    first, second = tmp_path / 'a.pdf', tmp_path / 'b.pdf'
+    first.write_bytes(b'a')
+    second.write_bytes(b'b')
+    calls = []
+
+    async def broken(changed):
+        raise RuntimeError('broken file')
+
+    async def callback(changed):
+        calls.append(changed)
+
+    async def scenario():
+        watcher = FileWatcher(interval=0, debounce=0)
+        watcher.watch(str(first), broken)
+        watcher.watch(str(second), callback)
+        first.write_bytes(b'aa')
+        second.write_bytes(b'bb')
+        await watcher.check()
+        await watcher.check()
+
+    asyncio.run(scenario())
+    assert calls == [str(second)]
+
+
+def test_validate_schedule_builds_the_index():
+    index = validate_schedule(VALID)
+    assert index.lessons['Понедельник'][0].subject == 'Физика'
+
+
+@pytest.mark.parametrize('schedule', [
+    {},
+    {'Понедельник': ['', '']},
+    {'Понедельник': ['День самостоятельной работы']},
+    {'Понедельник': [123]},
+])
+def test_validate_schedule_rejects_broken_schedules(schedule):
+    with pytest.raises(Exception):
+        validate_schedule(schedule)
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = str(tmp_path / 'schedule.pdf')
+    yield path
+    schedule_cache.invalidate(path)
+
+
+def test_reload_keeps_the_previous_version_on_a_broken_schedule(pdf_path, monkeypatch):
+    versions = iter([VALID, {'Понедельник': [123]}])
+
+    async def fetch_schedule(path):
+        schedule = next(versions)
+        return (path, 1, 1, str(id(schedule))), schedule, None
+
+    monkeypatch.setattr(workers, 'fetch_schedule', fetch_schedule)
+    assert asyncio.run(reload_schedule_async(pdf_path))
+    index = schedule_cache.index(pdf_path)
+
+    assert not asyncio.run(reload_schedule_async(pdf_path))
+    assert schedule_cache.latest(pdf_path) is VALID
+    assert schedule_cache.index(pdf_path) is index
@@ -0,0 +1,63 @@
+import asyncio
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from utils.webhook import SECRET_HEADER, BoundedRequestHandler, fake_update
+
+
+def run(test, max_concurrency=16):
+    async def main():
+        dp = Dispatcher()
+        handled = []
+        state = {'active': 0, 'peak': 0}
+
+        @dp.message()
+        async def handle_message(message):
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+            # Обновление обрабатывается достаточно долго, чтобы остальные запросы успели прийти
+            await asyncio.sleep(0.05)
+            state['active'] -= 1
+            handled.append(message.message_id)
+
+        bot = Bot('42:TEST')
+        handler = BoundedRequestHandler(dp, bot, 'secret', max_concurrency)
+        app = web.Application()
+        handler.register(app, path='/webhook')
+        try:
+            async with TestClient(TestServer(app)) as client:
+                await test(client, handler, handled, state)
+        finally:
+            await bot.session.close()
+
+    asyncio.run(main())
+
+
+def test_wrong_secret_is_rejected():
+    async def test(client, handler, handled, state):
+        for headers in ({SECRET_HEADER: 'wrong'}, {}):
+            response = await client.post('/webhook', json=fake_update(1, 'привет', 1, 1), headers=headers)
+            assert response.status == 401
+        response = await client.post('/webhook', json=fake_update(2, 'привет', 1, 1), headers={SECRET_HEADER: 'secret'})
+        assert response.status == 200
+        assert handled == [2]
+
+    run(test)
+
+
+def test_concurrency_is_bounded():
+    async def test(client, handler, handled, state):
+        async def post(update_id):
+            response = await client.post('/webhook', json=fake_update(update_id, 'привет', 1, 1),
+                                         headers={SECRET_HEADER: 'secret'})
+            return response.status
+
+        statuses = await asyncio.gather(*(post(update_id) for update_id in range(1, 11)))
+        assert statuses == [200] * 10
+        assert sorted(handled) == list(range(1, 11))
+        assert state['peak'] == 3
+        assert handler.stats() == {'in_flight': 0, 'limit': 3}
+
+    run(test, max_concurrency=3)
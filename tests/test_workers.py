@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from utils import parser, workers
+from utils.compiled import build_date_rules
+from utils.parser import file_fingerprint, schedule_cache
+from utils.teachers import TeacherDirectory
+
+SCHEDULE = {'Понедельник': ['']}
+
+
+@pytest.fixture
+def loads(monkeypatch, tmp_path):
+    path = tmp_path / 'schedule.pdf'
+    path.write_bytes(b'%PDF')
+    calls = []
+
+    def load_fresh_schedule(file_path):
+        calls.append(file_path)
+        # Загрузка достаточно долгая, чтобы остальные запросы пришли, пока она идёт
+        time.sleep(0.1)
+        if path.read_bytes() == b'broken':
+            raise ValueError('broken PDF')
+        return file_fingerprint(file_path), SCHEDULE, {}
+
+    monkeypatch.setattr(workers, 'load_fresh_schedule', load_fresh_schedule)
+    return str(path), calls
+
+
+def test_concurrent_requests_share_one_load(loads):
+    path, calls = loads
+
+    async def main():
+        return await asyncio.gather(*(workers.get_schedule_async(path) for _ in range(10)))
+
+    assert asyncio.run(main()) == [SCHEDULE] * 10
+    assert calls == [os.path.abspath(path)]
+    assert workers._in_flight == {}
+    assert schedule_cache.peek(path) == SCHEDULE
+
+
+def test_failed_load_is_not_kept_in_flight(loads):
+    path, calls = loads
+    with open(path, 'wb') as file:
+        file.write(b'broken')
+
+    async def main():
+        results = await asyncio.gather(*(workers.get_schedule_async(path) for _ in range(5)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert workers._in_flight == {}
+        with open(path, 'wb') as file:
+            file.write(b'%PDF-fixed')
+        # Следующий запрос загружает файл заново, а не получает прежнюю ошибку
+        return await workers.get_schedule_async(path)
+
+    assert asyncio.run(main()) == SCHEDULE
+    assert len(calls) == 2
+
+
+@pytest.fixture
+def rendering(monkeypatch, tmp_path):
+    teachers_path = tmp_path / 'teachers.json'
+    teachers_path.write_text(json.dumps({'Иванов И.И.': 'Иванов Иван Иванович'}), encoding='utf-8')
+    os.utime(teachers_path, ns=(10 ** 18, 10 ** 18))
+    directory = TeacherDirectory(str(teachers_path), check_interval=0)
+    monkeypatch.setattr(parser, 'teacher_directory', directory)
+    monkeypatch.setattr(workers, 'teacher_directory', directory)
+
+    # Ближайший понедельник: в расписании одно занятие в этот день
+    increment = 7 - date.today().weekday()
+    day = date.today() + timedelta(increment)
+    schedule = {'Понедельник': [f'Физика\nИванов И.И.\nлекции\n0313\n[{day:%d.%m}]']}
+    path = str(tmp_path / 'schedule.pdf')
+    schedule_cache.store(path, (path, 1, 1, 'a' * 64), schedule, build_date_rules(schedule))
+    schedule_cache.pin(path)
+
+    renders = []
+
+    def render_schedule(index, increment_day=0, scheduled=True):
+        renders.append(increment_day)
+        return real_render_schedule(index, increment_day, scheduled)
+
+    real_render_schedule = workers.render_schedule
+    monkeypatch.setattr(workers, 'render_schedule', render_schedule)
+    return path, increment, teachers_path, renders
+
+
+def test_render_cache_is_keyed_by_schedule_version(rendering):
+    path, increment, _, renders = rendering
+    first = asyncio.run(workers.render_schedule_async(path, increment))
+    assert asyncio.run(workers.render_schedule_async(path, increment)) == first
+    assert len(renders) == 1
+    assert 'Физика' in ''.join(asyncio.run(workers.render_range_async(path, increment, increment)))
+
+    schedule = {'Понедельник': [schedule_cache.latest(path)['Понедельник'][0].replace('Физика', 'Химия')]}
+    schedule_cache.store(path, (path, 1, 1, 'b' * 64), schedule, build_date_rules(schedule))
+    second = asyncio.run(workers.render_schedule_async(path, increment))
+    assert len(renders) == 2
+    assert 'Физика' in first and 'Химия' in second
+    assert 'Химия' in ''.join(asyncio.run(workers.render_range_async(path, increment, increment)))
+
+
+def test_render_cache_is_keyed_by_teacher_directory_version(rendering):
+    path, increment, teachers_path, renders = rendering
+    first = asyncio.run(workers.render_schedule_async(path, increment))
+    assert 'Иванов Иван Иванович' in first
+
+    teachers_path.write_text(json.dumps({'Иванов И.И.': 'Иванов Игорь Ильич'}), encoding='utf-8')
+    os.utime(teachers_path, ns=(2 * 10 ** 18, 2 * 10 ** 18))
+    second = asyncio.run(workers.render_schedule_async(path, increment))
+    assert len(renders) == 2
+    assert 'Иванов Игорь Ильич' in second
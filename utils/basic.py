@@ -2,8 +2,11 @@
 import json
 import logging
 import os
-from datetime import datetime
-from typing import Union
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple, Union
+
+from utils.logs import JsonFormatter, create_file_handler, start_queue_logging
 
 
 def load_config() -> dict:
@@ -25,25 +28,36 @@ def setup_logger() -> logging.Logger:
     """
     Настраивает логирование для вывода в файл и консоль.
 
+    Записи передаются в отдельный поток через очередь, поэтому вызовы логгера не выполняют ввод-вывод
+    в цикле событий. Файл лога ротируется по размеру или времени (LOG_ROTATION), старые файлы сжимаются.
+
     Returns:
         logging.Logger: Объект логгера для записи логов.
     """
     os.makedirs(config['LOGS_DIR'], exist_ok=True)
-    current_time = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-    log_file_name = f"{config['LOGS_DIR']}/{current_time}.log"
+    rotation = config.get('LOG_ROTATION', 'size')
+    if rotation == 'none':
+        # Без ротации для каждого запуска создаётся отдельный файл
+        log_file_name = f"{config['LOGS_DIR']}/{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.log"
+    else:
+        log_file_name = f"{config['LOGS_DIR']}/bot.log"
 
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
-    file_handler = logging.FileHandler(log_file_name)
+    # Файл лога открывается при первой записи, а не при импорте модуля
+    file_handler = create_file_handler(log_file_name, rotation, config.get('LOG_MAX_BYTES', 10 * 1024 * 1024),
+                                       config.get('LOG_ROTATE_WHEN', 'midnight'), config.get('LOG_BACKUP_COUNT', 10),
+                                       config.get('LOG_COMPRESS', True))
     console_handler = logging.StreamHandler()
 
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
+    file_handler.setFormatter(JsonFormatter() if config.get('LOG_FORMAT', 'text') == 'json' else formatter)
     console_handler.setFormatter(formatter)
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    start_queue_logging(logger, file_handler, console_handler)
+    # Время обработки каждого обновления записывает LogContextMiddleware вместе с контекстом и с учётом выборки
+    logging.getLogger('aiogram.event').setLevel(logging.WARNING)
     return logger
 
 
@@ -124,3 +138,69 @@ def days_until_date(date_str: str) -> int:
     days_left = (parsed_date - today).days
 
     return days_left
+
+
+def days_until_range(range_str: str, today: Optional[date] = None) -> Tuple[int, int]:
+    """
+    Вычисляет смещения первого и последнего дня диапазона 'день.месяц-день.месяц' относительно сегодняшнего дня.
+
+    Оба конца диапазона берутся в одном году, поэтому диапазон может начинаться в прошлом (например, с понедельника
+    текущей недели). Последний день переносится на следующий год, только если он раньше первого (диапазон через
+    Новый год), а весь диапазон - только если он целиком прошёл.
+
+    Args:
+        range_str (str): Диапазон, например '01.09-07.09' или '28.12-10.01'.
+        today (date, optional): Сегодняшняя дата (по умолчанию текущая).
+
+    Returns:
+        Tuple[int, int]: Смещения первого и последнего дня (последний включительно).
+
+    Raises:
+        ValueError: Если строка не соответствует формату или содержит несуществующую дату.
+    """
+    today = today or datetime.now().date()
+    start_str, end_str = range_str.split('-')
+
+    # Первый год, в котором диапазон ещё не закончился: прошлый (диапазон через Новый год, который идёт сейчас),
+    # текущий или следующий
+    for year in (today.year - 1, today.year, today.year + 1):
+        start = datetime.strptime(f"{start_str}.{year}", "%d.%m.%Y").date()
+        end = datetime.strptime(f"{end_str}.{year}", "%d.%m.%Y").date()
+        if end < start:
+            end = datetime.strptime(f"{end_str}.{year + 1}", "%d.%m.%Y").date()
+        if end >= today:
+            break
+
+    return (start - today).days, (end - today).days
+
+
+def split_message(text: str, limit: int = 4096) -> List[str]:
+    """
+    Разбивает текст на части, не превышающие лимит длины сообщения Telegram.
+
+    Текст режется по границам абзацев (пустая строка), а слишком длинные абзацы - перед строками,
+    начинающимися с HTML-тега (например, <blockquote>), чтобы не разрывать теги между сообщениями.
+
+    Args:
+        text (str): Исходный текст.
+        limit (int, optional): Максимальная длина части (по умолчанию 4096).
+
+    Returns:
+        List[str]: Части текста.
+    """
+    parts = []
+    current = ''
+    for paragraph in text.split('\n\n'):
+        # Абзац длиннее лимита делим на блоки
+        chunks = [paragraph] if len(paragraph) <= limit else [chunk[:limit] for chunk in re.split(r'\n(?=<)', paragraph)]
+        for i, chunk in enumerate(chunks):
+            separator = '\n\n' if i == 0 else '\n'
+            if current and len(current) + len(separator) + len(chunk) <= limit:
+                current += separator + chunk
+            else:
+                if current:
+                    parts.append(current)
+                current = chunk
+    if current:
+        parts.append(current)
+    return parts
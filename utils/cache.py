@@ -0,0 +1,70 @@
+# Кеш в памяти с вытеснением давно неиспользуемых записей и временем жизни
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    LRU-кеш с ограниченным размером и временем жизни записей.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 3600) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Возвращает значение по ключу, если оно есть в кеше и не устарело.
+
+        Args:
+            key (Hashable): Ключ.
+
+        Returns:
+            Optional[Any]: Значение или None.
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Сохраняет значение в кеш, вытесняя самые давно использованные записи при переполнении.
+
+        Args:
+            key (Hashable): Ключ.
+            value (Any): Значение.
+        """
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Очищает кеш.
+        """
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику обращений к кешу.
+
+        Returns:
+            dict: Словарь с количеством попаданий, промахов и записей.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._data)}
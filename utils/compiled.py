@@ -0,0 +1,153 @@
+# Скомпилированное расписание на диске для быстрого холодного старта
+import argparse
+import json
+import os
+from typing import Optional, Tuple, Union
+
+from utils.dates import parse_date_rules
+
+# Версия формата. Увеличивается при любом несовместимом изменении структуры артефакта.
+COMPILED_VERSION = 1
+
+
+def compiled_path(pdf_path: str) -> str:
+    """
+    Возвращает путь к скомпилированному расписанию, который лежит рядом с PDF-файлом.
+
+    Args:
+        pdf_path (str): Путь к PDF-файлу.
+
+    Returns:
+        str: Путь к файлу артефакта.
+    """
+    return f'{pdf_path}.compiled.json'
+
+
+def build_date_rules(schedule: dict) -> dict:
+    """
+    Заранее разбирает строки с датами всех занятий расписания.
+
+    Args:
+        schedule (dict): Структурированные данные расписания (см. parse_pdf).
+
+    Returns:
+        dict: Словарь с той же структурой, что и расписание, где вместо занятий лежат списки правил дат.
+    """
+
+    def rules_for(lesson: str) -> list:
+        if not lesson:
+            return []
+        return parse_date_rules(lesson.split('\n')[-1].strip('[]'))
+
+    date_rules = {}
+    for day, lessons in schedule.items():
+        date_rules[day] = [[rules_for(sublesson) for sublesson in lesson] if isinstance(lesson, list) else rules_for(lesson)
+                           for lesson in lessons]
+    return date_rules
+
+
+def dump_compiled(schedule: dict, fingerprint: Tuple[str, int, int, str], date_rules: Optional[dict] = None) -> str:
+    """
+    Сериализует скомпилированное расписание в JSON (для файла артефакта или общего хранилища).
+
+    Args:
+        schedule (dict): Структурированные данные расписания (см. parse_pdf).
+        fingerprint (Tuple[str, int, int, str]): Отпечаток исходного PDF-файла (см. file_fingerprint).
+        date_rules (dict, optional): Уже разобранные правила дат (по умолчанию строятся заново).
+
+    Returns:
+        str: JSON артефакта.
+    """
+    artifact = {
+        'version': COMPILED_VERSION,
+        'source': {'size': fingerprint[1], 'mtime_ns': fingerprint[2], 'sha256': fingerprint[3]},
+        'schedule': schedule,
+        'date_rules': date_rules if date_rules is not None else build_date_rules(schedule)
+    }
+    return json.dumps(artifact, ensure_ascii=False, separators=(',', ':'))
+
+
+def loads_compiled(text: str, fingerprint: Union[Tuple[str, int, int, str], None] = None) -> Optional[dict]:
+    """
+    Разбирает JSON скомпилированного расписания и проверяет его версию и соответствие PDF-файлу.
+
+    Args:
+        text (str): JSON артефакта.
+        fingerprint (Tuple[str, int, int, str], optional): Отпечаток исходного PDF-файла.
+            Если не указан, проверка актуальности не выполняется.
+
+    Returns:
+        Optional[dict]: Содержимое артефакта или None, если он повреждён, устарел или имеет другую версию формата.
+    """
+    try:
+        artifact = json.loads(text)
+    except ValueError:
+        return None
+
+    if not isinstance(artifact, dict) or artifact.get('version') != COMPILED_VERSION:
+        return None
+    if fingerprint is not None and artifact.get('source', {}).get('sha256') != fingerprint[3]:
+        return None
+    return artifact
+
+
+def write_compiled(path: str, schedule: dict, fingerprint: Tuple[str, int, int, str]) -> None:
+    """
+    Сохраняет скомпилированное расписание на диск.
+
+    Запись выполняется во временный файл с последующей атомарной заменой,
+    чтобы читатель никогда не увидел частично записанный артефакт.
+
+    Args:
+        path (str): Путь к файлу артефакта.
+        schedule (dict): Структурированные данные расписания (см. parse_pdf).
+        fingerprint (Tuple[str, int, int, str]): Отпечаток исходного PDF-файла (см. file_fingerprint).
+    """
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(dump_compiled(schedule, fingerprint))
+    os.replace(tmp_path, path)
+
+
+def read_compiled(path: str, fingerprint: Union[Tuple[str, int, int, str], None] = None) -> Optional[dict]:
+    """
+    Загружает скомпилированное расписание, если оно существует и соответствует исходному PDF-файлу.
+
+    Args:
+        path (str): Путь к файлу артефакта.
+        fingerprint (Tuple[str, int, int, str], optional): Отпечаток исходного PDF-файла.
+            Если не указан, проверка актуальности не выполняется.
+
+    Returns:
+        Optional[dict]: Содержимое артефакта или None, если он отсутствует, повреждён, устарел
+        или имеет другую версию формата.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return loads_compiled(f.read(), fingerprint)
+    except FileNotFoundError:
+        return None
+
+
+def main() -> None:
+    """
+    Точка входа командной строки: компилирует PDF-файл с расписанием в артефакт.
+
+    Пример: python -m utils.compiled data/ИДБ-12-34.pdf
+    """
+    arg_parser = argparse.ArgumentParser(description='Компиляция PDF-файла с расписанием в артефакт для быстрого старта')
+    arg_parser.add_argument('pdf_path', help='Путь к PDF-файлу с расписанием')
+    arg_parser.add_argument('-o', '--output', help='Путь к файлу артефакта (по умолчанию рядом с PDF-файлом)')
+    args = arg_parser.parse_args()
+
+    # Импорт здесь, чтобы модуль можно было использовать без тяжёлых зависимостей парсера
+    from utils.parser import file_fingerprint, parse_pdf
+
+    output = args.output or compiled_path(args.pdf_path)
+    fingerprint = file_fingerprint(args.pdf_path)
+    write_compiled(output, parse_pdf(args.pdf_path, fingerprint[3]), fingerprint)
+    print(f'Compiled {args.pdf_path} -> {output}')
+
+
+if __name__ == '__main__':
+    main()
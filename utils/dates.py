@@ -0,0 +1,35 @@
+# Разбор правил дат занятий из расписания
+from typing import List
+
+
+def parse_date_rules(date_range: str) -> List[dict]:
+    """
+    Разбирает строку с датами занятия в список правил.
+
+    Поддерживаются те же форматы, что и в parse_date_range: 'дд.мм-дд.мм к.н.' (каждую неделю),
+    'дд.мм-дд.мм ч.н.' (через неделю) и одиночные даты 'дд.мм'.
+
+    Args:
+        date_range (str): Строка с датами (например, '05.09-26.12 к.н., 03.10').
+
+    Returns:
+        List[dict]: Список правил вида {'text': ..., 'start': 'дд.мм', 'end': 'дд.мм', 'step': 7 | 14}
+        для периодов и {'text': ..., 'date': 'дд.мм'} для одиночных дат.
+    """
+    rules = []
+
+    for part in date_range.split(', '):
+        if '-' in part:
+            if 'к.н.' in part:
+                text, step = part.replace(' к.н.', ''), 7
+            elif 'ч.н.' in part:
+                text, step = part.replace(' ч.н.', ''), 14
+            else:
+                continue
+            start, end = text.split('-')
+            rules.append({'text': text, 'start': start, 'end': end, 'step': step})
+        elif '.' in part:
+            rules.append({'text': part, 'date': part})
+
+    return rules
+
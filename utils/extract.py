@@ -0,0 +1,526 @@
+# Извлечение таблицы расписания из PDF-файла: способы извлечения, поиск страницы и области таблицы и кеш их расположения
+#
+# Выбор способа для файла: python -m utils.extract data/ИДБ-12-34.pdf [--repeat 3]
+import argparse
+import math
+import multiprocessing
+import os
+import re
+import statistics
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from utils.basic import config, load_json_file, logger, save_json_file
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Дни недели, по которым распознаётся таблица расписания
+DAYS_OF_WEEK = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота']
+
+# Запас в пунктах вокруг найденной области, чтобы линии рамки таблицы не обрезались при повторном извлечении.
+# camelot считает границы области линиями таблицы, поэтому запас должен быть меньше допуска объединения линий
+# (line_tol = 2), иначе по краям таблицы появляются лишние пустые строки и столбцы
+AREA_MARGIN = 1
+
+# Количество расположений таблиц, хранящихся в кеше (по одному на каждую версию каждого PDF-файла)
+MAX_LOCATIONS = 64
+
+# Заголовок столбца таблицы: время пары
+TIME_PATTERN = re.compile(r'\d{1,2}:\d{2}\s*-\s*\d{1,2}:\d{2}')
+
+
+def is_schedule_table(df: 'pd.DataFrame') -> bool:
+    """
+    Проверяет, что таблица похожа на таблицу расписания: в первом столбце есть названия дней недели.
+
+    Args:
+        df (pd.DataFrame): Таблица, извлечённая camelot.
+
+    Returns:
+        bool: True, если таблица содержит расписание.
+    """
+    return not df.empty and bool(df.iloc[:, 0].isin(DAYS_OF_WEEK).any())
+
+
+def find_schedule_pages(file_path: str) -> List[int]:
+    """
+    Находит страницы, текстовый слой которых содержит названия дней недели.
+
+    Текст извлекается PyPDF2 без отрисовки страниц, поэтому проверка намного быстрее извлечения таблиц.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+
+    Returns:
+        List[int]: Номера страниц (с единицы); пустой список, если текстовый слой прочитать не удалось.
+    """
+    try:
+        from PyPDF2 import PdfReader
+
+        reader = PdfReader(file_path)
+        return [number for number, page in enumerate(reader.pages, 1) if DAYS_OF_WEEK[0] in (page.extract_text() or '')]
+    except Exception as e:
+        logger.warning(f"Could not read text layer of {file_path}: {e}")
+        return []
+
+
+def table_area(table: Any) -> Optional[List[float]]:
+    """
+    Возвращает область таблицы camelot в формате параметра table_areas.
+
+    camelot хранит границы таблицы в _bbox как (левый, нижний, правый, верхний) край, а table_areas ожидает
+    левый верхний и правый нижний углы.
+
+    Args:
+        table (camelot.core.Table): Таблица.
+
+    Returns:
+        Optional[List[float]]: Область [x1, y1, x2, y2] или None, если границы таблицы неизвестны
+        (_bbox есть только у таблиц, построенных парсером).
+    """
+    bbox = getattr(table, '_bbox', None)
+    if bbox is None:
+        return None
+    x1, y1, x2, y2 = (float(value) for value in bbox)
+    return [min(x1, x2), max(y1, y2), max(x1, x2), min(y1, y2)]
+
+
+def read_page_tables(file_path: str, pages: str,
+                     area: Optional[List[float]] = None) -> List[Tuple[int, Optional[List[float]], 'pd.DataFrame']]:
+    """
+    Извлекает таблицы со страниц PDF-файла с помощью camelot.
+
+    Возвращаются только данные, которые можно передать между процессами.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+        pages (str): Страницы в формате camelot ('1', '1,3' или 'all').
+        area (List[float], optional): Область таблицы [x1, y1, x2, y2] в координатах PDF (левый верхний и правый
+            нижний углы). Если не указана, таблицы ищутся на всей странице.
+
+    Returns:
+        List[Tuple[int, Optional[List[float]], pd.DataFrame]]: Номер страницы, область (см. table_area)
+        и содержимое каждой таблицы.
+    """
+    import camelot
+
+    kwargs = {'table_areas': [','.join(map(str, area))]} if area else {}
+    tables = camelot.read_pdf(file_path, pages=pages, **kwargs)
+    return [(int(table.page), table_area(table), table.df) for table in tables]
+
+
+def extract_pages(file_path: str, pages: List[int],
+                  workers: int = 1) -> Dict[int, List[Tuple[Optional[List[float]], 'pd.DataFrame']]]:
+    """
+    Извлекает таблицы с нескольких страниц, распределяя страницы между процессами.
+
+    Процессы запускаются через spawn: извлечение выполняется в потоке пула многопоточного процесса, и при fork
+    дочерний процесс мог бы унаследовать захваченные другими потоками блокировки (например, обработчиков лога).
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+        pages (List[int]): Номера страниц.
+        workers (int, optional): Максимальное количество процессов (1 - извлечение в текущем процессе).
+
+    Returns:
+        Dict[int, List[Tuple[Optional[List[float]], pd.DataFrame]]]: Таблицы (область и содержимое) по номерам страниц.
+    """
+    workers = min(workers, len(pages))
+    if workers <= 1:
+        results = [read_page_tables(file_path, str(page)) for page in pages]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            results = list(executor.map(read_page_tables, [file_path] * len(pages), map(str, pages)))
+    return {page: [(area, df) for _, area, df in tables] for page, tables in zip(pages, results)}
+
+
+class TableLocator:
+    """
+    Извлекает таблицу расписания только с той страницы и из той области, где она находится.
+
+    При первом разборе версии PDF-файла страницы с расписанием находятся по текстовому слою, таблицы извлекаются
+    только с них (параллельно, если таких страниц несколько), а страница и область найденной таблицы сохраняются
+    в JSON-файл по хешу содержимого. Повторный разбор той же версии (например, в другом процессе или после удаления
+    скомпилированного артефакта) извлекает только эту область. Если текстовый слой не читается, таблицы
+    извлекаются со всех страниц, как раньше.
+    """
+
+    def __init__(self, cache_path: str, workers: int = 2) -> None:
+        self.cache_path = cache_path
+        self.workers = workers
+
+    def _locations(self) -> Dict[str, dict]:
+        # Кеш читается при каждом извлечении, потому что разбор может выполняться в разных процессах
+        try:
+            return load_json_file(self.cache_path, {})
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading {self.cache_path}: {e}")
+            return {}
+
+    def _remember(self, sha: str, page: int, area: List[float]) -> None:
+        locations = self._locations()
+        locations.pop(sha, None)
+        locations[sha] = {'page': page, 'area': [area[0] - AREA_MARGIN, area[1] + AREA_MARGIN,
+                                                 area[2] + AREA_MARGIN, area[3] - AREA_MARGIN]}
+        try:
+            save_json_file(self.cache_path, dict(list(locations.items())[-MAX_LOCATIONS:]))
+        except OSError as e:
+            logger.error(f"Error saving {self.cache_path}: {e}")
+
+    def extract(self, file_path: str, sha: str) -> 'pd.DataFrame':
+        """
+        Извлекает таблицу расписания.
+
+        Args:
+            file_path (str): Путь к PDF-файлу.
+            sha (str): SHA-256 содержимого файла (см. file_fingerprint).
+
+        Returns:
+            pd.DataFrame: Таблица в том виде, в котором её возвращает camelot.
+
+        Raises:
+            ValueError: Если в файле нет таблиц.
+        """
+        location = self._locations().get(sha)
+        if location is not None:
+            with metrics.timer('extract', mode='cached_area'):
+                tables = read_page_tables(file_path, str(location['page']), location['area'])
+            if tables and is_schedule_table(tables[0][2]):
+                return tables[0][2]
+            logger.warning(f"Cached table location in {file_path} is stale, locating the table again")
+
+        pages = find_schedule_pages(file_path)
+        if pages:
+            with metrics.timer('extract', mode='located_pages'):
+                found = [(page, area, df) for page, tables in extract_pages(file_path, pages, self.workers).items()
+                         for area, df in tables]
+        else:
+            with metrics.timer('extract', mode='all_pages'):
+                found = read_page_tables(file_path, 'all')
+        if not found:
+            raise ValueError(f'No tables found in {file_path}')
+
+        # Как и раньше, при отсутствии таблицы с днями недели используется первая таблица
+        page, area, df = next((table for table in found if is_schedule_table(table[2])), found[0])
+        if is_schedule_table(df) and area is not None:
+            self._remember(sha, page, area)
+        return df
+
+
+table_locator = TableLocator(config.get('TABLE_LOCATIONS_PATH', 'data/table_locations.json'),
+                             config.get('EXTRACT_WORKERS', 2))
+
+
+class ExtractionBackend(ABC):
+    """
+    Способ извлечения таблицы расписания из PDF-файла.
+
+    Таблица возвращается в том виде, в котором её возвращает camelot (строка заголовка, затем строки дней
+    с названием дня в первом столбце), поэтому дальнейший разбор (parse_table) не зависит от способа.
+    """
+
+    name = ''
+
+    @abstractmethod
+    def extract(self, file_path: str, sha: str) -> 'pd.DataFrame':
+        """
+        Извлекает таблицу расписания.
+
+        Args:
+            file_path (str): Путь к PDF-файлу.
+            sha (str): SHA-256 содержимого файла (см. file_fingerprint).
+
+        Returns:
+            pd.DataFrame: Таблица расписания.
+
+        Raises:
+            ValueError: Если таблицу найти не удалось.
+        """
+
+
+class CamelotBackend(ExtractionBackend):
+    """
+    Извлечение camelot по линиям таблицы (требует Ghostscript и OpenCV).
+
+    При mode = 'region' таблица извлекается только со своей страницы и из своей области (см. TableLocator),
+    при mode = 'all' - со всех страниц.
+    """
+
+    name = 'camelot'
+
+    def __init__(self, locator: TableLocator, mode: str = 'region') -> None:
+        self.locator = locator
+        self.mode = mode
+
+    def extract(self, file_path: str, sha: str) -> 'pd.DataFrame':
+        if self.mode == 'region':
+            return self.locator.extract(file_path, sha)
+        import camelot
+        return camelot.read_pdf(file_path, pages='all')[0].df
+
+
+def page_fragments(page: Any) -> List[Tuple[float, float, float, str]]:
+    """
+    Извлекает фрагменты текста страницы с их координатами.
+
+    Args:
+        page (PyPDF2.PageObject): Страница PDF-файла.
+
+    Returns:
+        List[Tuple[float, float, float, str]]: Координаты x и y начала фрагмента в пунктах (y растёт вверх),
+        размер шрифта и текст.
+    """
+    fragments = []
+
+    def visit(text: str, cm: list, tm: list, font: Any, font_size: float) -> None:
+        if not text.strip():
+            return
+        # Положение начала текста: матрица текста, применённая к текущей матрице преобразования
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+        fragments.append((x, y, abs(font_size * (tm[3] or 1) * (cm[3] or 1)) or 1.0, text))
+
+    page.extract_text(visitor_text=visit)
+    return fragments
+
+
+def join_lines(fragments: List[Tuple[float, float, float, str]]) -> str:
+    """
+    Собирает текст ячейки: фрагменты группируются в строки по координате y и упорядочиваются слева направо.
+
+    Args:
+        fragments (List[Tuple[float, float, float, str]]): Фрагменты ячейки (см. page_fragments).
+
+    Returns:
+        str: Строки ячейки, разделённые переводами строк, как в ячейках camelot.
+    """
+    lines: List[List[Tuple[float, float, float, str]]] = []
+    for fragment in sorted(fragments, key=lambda item: (-item[1], item[0])):
+        if lines and abs(lines[-1][0][1] - fragment[1]) < fragment[2] / 2:
+            lines[-1].append(fragment)
+        else:
+            lines.append([fragment])
+    return '\n'.join(' '.join(' '.join(text for _, _, _, text in sorted(line)).split()) for line in lines)
+
+
+def build_grid(fragments: List[Tuple[float, float, float, str]]) -> Optional['pd.DataFrame']:
+    """
+    Восстанавливает таблицу расписания по координатам фрагментов текста.
+
+    Столбцы определяются по заголовкам со временем пар: фрагмент относится к последнему столбцу, заголовок которого
+    начинается не правее середины ширины столбца от начала фрагмента. Строки определяются по названиям дней
+    в первом столбце: граница между днями проходит посередине между их названиями.
+
+    Args:
+        fragments (List[Tuple[float, float, float, str]]): Фрагменты страницы (см. page_fragments).
+
+    Returns:
+        Optional[pd.DataFrame]: Таблица в формате camelot или None, если на странице нет таблицы расписания.
+    """
+    import pandas as pd
+
+    headers = sorted((x, y, text.strip()) for x, y, _, text in fragments if TIME_PATTERN.fullmatch(text.strip()))
+    days = sorted(((y, text.strip()) for x, y, _, text in fragments if text.strip() in DAYS_OF_WEEK), reverse=True)
+    if len(headers) < 2 or not days:
+        return None
+
+    columns = [x for x, _, _ in headers]
+    half_width = statistics.median(b - a for a, b in zip(columns, columns[1:])) / 2
+    header_y = min(y for _, y, _ in headers)
+    # Нижние границы строк дней: середина между названиями соседних дней
+    bottoms = [(upper[0] + lower[0]) / 2 for upper, lower in zip(days, days[1:])] + [-math.inf]
+
+    cells: Dict[Tuple[int, int], List[Tuple[float, float, float, str]]] = {}
+    for fragment in fragments:
+        x, y, size, text = fragment
+        if y >= header_y - size / 2 or text.strip() in DAYS_OF_WEEK:
+            continue
+        column = sum(1 for start in columns if start <= x + half_width) - 1
+        if column < 0:
+            continue
+        row = next(number for number, bottom in enumerate(bottoms) if y > bottom)
+        cells.setdefault((row, column), []).append(fragment)
+
+    rows = [[''] + [text for _, _, text in headers]]
+    for row, (_, day) in enumerate(days):
+        rows.append([day] + [join_lines(cells.get((row, column), [])) for column in range(len(columns))])
+    return pd.DataFrame(rows)
+
+
+class TextBackend(ExtractionBackend):
+    """
+    Лёгкое извлечение по текстовому слою PDF-файла (PyPDF2): таблица восстанавливается по координатам текста
+    без отрисовки страниц, поэтому не требует Ghostscript и OpenCV.
+
+    Линии таблицы при этом не учитываются, поэтому результат нужно сверять с camelot (см. select_backend).
+    """
+
+    name = 'text'
+
+    def extract(self, file_path: str, sha: str) -> 'pd.DataFrame':
+        from PyPDF2 import PdfReader
+
+        for page in PdfReader(file_path).pages:
+            table = build_grid(page_fragments(page))
+            if table is not None:
+                return table
+        raise ValueError(f'No schedule table found in the text layer of {file_path}')
+
+
+BACKENDS: Dict[str, ExtractionBackend] = {
+    'camelot': CamelotBackend(table_locator, config.get('EXTRACT_MODE', 'region')),
+    'text': TextBackend()
+}
+
+# Выбранный для каждого PDF-файла способ извлечения (при EXTRACT_BACKEND = 'auto')
+SELECTIONS_PATH = config.get('EXTRACT_BACKENDS_PATH', 'data/extract_backends.json')
+
+
+def is_complete_schedule(schedule: dict) -> bool:
+    """
+    Проверяет, что расписание содержит все учебные дни с одинаковым количеством пар.
+
+    Args:
+        schedule (dict): Структурированные данные расписания (см. parse_pdf).
+
+    Returns:
+        bool: True, если расписание выглядит полным.
+    """
+    return all(day in schedule for day in DAYS_OF_WEEK[:5]) and len({len(slots) for slots in schedule.values()}) == 1
+
+
+def compare_backends(file_path: str, sha: str, parse: Callable[['pd.DataFrame'], dict],
+                     repeat: int = 1) -> Dict[str, Tuple[Optional[dict], float]]:
+    """
+    Извлекает расписание всеми способами и измеряет время каждого.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+        sha (str): SHA-256 содержимого файла.
+        parse (Callable[[pd.DataFrame], dict]): Разбор таблицы в расписание (parse_table).
+        repeat (int, optional): Количество запусков каждого способа (берётся лучшее время).
+
+    Returns:
+        Dict[str, Tuple[Optional[dict], float]]: Расписание (None, если способ не сработал) и время в секундах
+        по названиям способов.
+    """
+    results = {}
+    for name, backend in BACKENDS.items():
+        try:
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                schedule = parse(backend.extract(file_path, sha))
+                timings.append(time.perf_counter() - start)
+            results[name] = (schedule, min(timings))
+        except Exception as e:
+            logger.warning(f"Extraction backend {name} failed on {file_path}: {e}")
+            results[name] = (None, math.inf)
+    return results
+
+
+def select_backend(file_path: str, sha: str, parse: Callable[['pd.DataFrame'], dict],
+                   repeat: int = 1) -> Tuple[str, Dict[str, Tuple[Optional[dict], float]]]:
+    """
+    Выбирает самый быстрый способ извлечения, результат которого совпадает с результатом camelot,
+    и сохраняет выбор для файла.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+        sha (str): SHA-256 содержимого файла.
+        parse (Callable[[pd.DataFrame], dict]): Разбор таблицы в расписание (parse_table).
+        repeat (int, optional): Количество запусков каждого способа.
+
+    Returns:
+        Tuple[str, Dict[str, Tuple[Optional[dict], float]]]: Название выбранного способа и результаты сравнения
+        (см. compare_backends).
+    """
+    results = compare_backends(file_path, sha, parse, repeat)
+    reference = results['camelot'][0]
+    verified = [name for name, (schedule, _) in results.items() if reference is not None and schedule == reference]
+    choice = min(verified, key=lambda name: results[name][1]) if verified else 'camelot'
+
+    selections = load_json_file(SELECTIONS_PATH, {})
+    selections[os.path.abspath(file_path)] = {
+        'backend': choice, 'sha': sha,
+        'seconds': {name: seconds for name, (_, seconds) in results.items() if seconds != math.inf}
+    }
+    try:
+        save_json_file(SELECTIONS_PATH, selections)
+    except OSError as e:
+        logger.error(f"Error saving {SELECTIONS_PATH}: {e}")
+    logger.info(f"Selected {choice} extraction for {file_path}: "
+                + ', '.join(f'{name} {seconds:.2f}s' for name, (_, seconds) in results.items()))
+    return choice, results
+
+
+def extract_schedule(file_path: str, sha: str, parse: Callable[['pd.DataFrame'], dict]) -> dict:
+    """
+    Извлекает расписание способом, заданным параметром EXTRACT_BACKEND.
+
+    'camelot' (по умолчанию) и 'text' задают способ явно. При 'auto' для файла используется способ, выбранный
+    select_backend для этой же версии файла. Если выбора ещё нет, он сделан для другой версии файла или выбранный
+    способ вернул неполное расписание, способы сравниваются заново и возвращается результат camelot.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+        sha (str): SHA-256 содержимого файла.
+        parse (Callable[[pd.DataFrame], dict]): Разбор таблицы в расписание (parse_table).
+
+    Returns:
+        dict: Структурированные данные расписания.
+    """
+    name = config.get('EXTRACT_BACKEND', 'camelot')
+    if name != 'auto':
+        with metrics.timer('extract_table', backend=name):
+            df = BACKENDS[name].extract(file_path, sha)
+        return parse(df)
+
+    selection = load_json_file(SELECTIONS_PATH, {}).get(os.path.abspath(file_path))
+    if selection and selection.get('sha') != sha:
+        # Способ, совпадавший с camelot на прошлой версии файла, мог перестать совпадать на новой
+        logger.info(f"{file_path} has changed since {selection['backend']} extraction was selected, comparing again")
+    elif selection and selection['backend'] in BACKENDS:
+        try:
+            with metrics.timer('extract_table', backend=selection['backend']):
+                schedule = parse(BACKENDS[selection['backend']].extract(file_path, sha))
+            if is_complete_schedule(schedule):
+                return schedule
+            logger.warning(f"{selection['backend']} extraction of {file_path} looks incomplete")
+        except Exception as e:
+            logger.warning(f"{selection['backend']} extraction of {file_path} failed: {e}")
+
+    with metrics.timer('extract_table', backend='select'):
+        _, results = select_backend(file_path, sha, parse)
+    if results['camelot'][0] is None:
+        raise ValueError(f'Could not extract the schedule from {file_path}')
+    return results['camelot'][0]
+
+
+def main() -> None:
+    """
+    Точка входа командной строки: сравнивает способы извлечения на PDF-файле и сохраняет выбор
+    для EXTRACT_BACKEND = 'auto'.
+    """
+    arg_parser = argparse.ArgumentParser(description='Сравнение способов извлечения таблицы расписания из PDF-файла')
+    arg_parser.add_argument('pdf_path', help='Путь к PDF-файлу с расписанием')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='Количество запусков каждого способа')
+    args = arg_parser.parse_args()
+
+    # Импорт здесь: модуль parser сам импортирует этот модуль
+    from utils.parser import file_fingerprint, parse_table
+
+    choice, results = select_backend(args.pdf_path, file_fingerprint(args.pdf_path)[3], parse_table, args.repeat)
+    reference = results['camelot'][0]
+    for name, (schedule, seconds) in results.items():
+        status = 'failed' if schedule is None else 'matches camelot' if schedule == reference else 'differs from camelot'
+        print(f'{name:<10}{seconds:>10.3f} s  {status}')
+    print(f'Selected backend: {choice}')
+
+
+if __name__ == '__main__':
+    main()
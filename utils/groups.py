@@ -0,0 +1,191 @@
+# Реестр учебных групп и подписок чатов на их расписание
+from datetime import date, datetime, tzinfo
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from utils.basic import config, load_json_file, save_json_file
+
+# Параметры группы, которые можно переопределить в элементе GROUPS (по умолчанию берутся из корня config.json)
+GROUP_KEYS = ['GROUP', 'GROUP_ID', 'THREADED', 'THREAD_NUMBER', 'PDF_PATH', 'HOUR', 'MINUTES', 'TIMEZONE']
+
+
+class Group:
+    """
+    Учебная группа: своё расписание, чат (и тема супергруппы) и время ежедневной отправки.
+    """
+
+    __slots__ = ('name', 'chat_id', 'threaded', 'thread_number', 'pdf_path', 'hour', 'minutes', 'timezone')
+
+    def __init__(self, name: str, chat_id: int, threaded: bool, thread_number: Optional[int], pdf_path: str, hour: int,
+                 minutes: int, timezone: Optional[tzinfo] = None) -> None:
+        self.name = name
+        self.chat_id = chat_id
+        self.threaded = threaded
+        self.thread_number = thread_number
+        self.pdf_path = pdf_path
+        self.hour = hour
+        self.minutes = minutes
+        self.timezone = timezone
+
+    @classmethod
+    def from_config(cls, group_config: dict, defaults: dict) -> 'Group':
+        """
+        Создаёт группу из словаря конфигурации, дополняя отсутствующие параметры значениями по умолчанию.
+
+        Args:
+            group_config (dict): Параметры группы (ключи как в GROUP_KEYS).
+            defaults (dict): Значения по умолчанию (корень config.json).
+
+        Returns:
+            Group: Группа.
+        """
+        values = {key: group_config.get(key, defaults.get(key)) for key in GROUP_KEYS}
+        timezone = ZoneInfo(values['TIMEZONE']) if values['TIMEZONE'] else None
+        return cls(values['GROUP'], values['GROUP_ID'], bool(values['THREADED']), values['THREAD_NUMBER'], values['PDF_PATH'],
+                   values['HOUR'], values['MINUTES'], timezone)
+
+    def increment_day(self) -> int:
+        """
+        Возвращает смещение текущей даты группы (в её часовом поясе) относительно локальной даты сервера.
+
+        Returns:
+            int: Смещение в днях (обычно 0, но может быть ±1 около полуночи).
+        """
+        if self.timezone is None:
+            return 0
+        return (datetime.now(self.timezone).date() - date.today()).days
+
+    def __repr__(self) -> str:
+        return f'Group({self.name!r}, chat_id={self.chat_id})'
+
+
+def load_groups(config_: dict) -> Dict[str, Group]:
+    """
+    Загружает реестр групп из конфигурации.
+
+    Если задан список GROUPS, каждая его запись описывает отдельную группу. Иначе используется
+    единственная группа из параметров в корне config.json.
+
+    Args:
+        config_ (dict): Конфигурация бота.
+
+    Returns:
+        Dict[str, Group]: Словарь групп по их кодам в порядке объявления.
+    """
+    groups_config = config_.get('GROUPS') or [{}]
+    groups = {}
+    for group_config in groups_config:
+        group = Group.from_config(group_config, config_)
+        groups[group.name] = group
+    return groups
+
+
+groups = load_groups(config)
+
+# Подписки личных чатов на расписание групп: chat_id -> код группы
+SUBSCRIPTIONS_PATH = config.get('SUBSCRIPTIONS_PATH', 'data/subscriptions.json')
+subscriptions: Dict[str, str] = load_json_file(SUBSCRIPTIONS_PATH, {})
+
+
+def default_group() -> Group:
+    """
+    Возвращает группу по умолчанию (первую в реестре).
+
+    Returns:
+        Group: Группа.
+    """
+    return next(iter(groups.values()))
+
+
+def find_group(name: str) -> Optional[Group]:
+    """
+    Ищет группу по коду без учёта регистра.
+
+    Args:
+        name (str): Код группы (например, 'ИДБ-12-34').
+
+    Returns:
+        Optional[Group]: Группа или None, если она не найдена.
+    """
+    for group in groups.values():
+        if group.name.lower() == name.strip().lower():
+            return group
+    return None
+
+
+def is_personal_chat(chat_id: int) -> bool:
+    """
+    Проверяет, что чат личный: ID личных чатов Telegram положительные, а групп и каналов - отрицательные.
+
+    Args:
+        chat_id (int): ID чата.
+
+    Returns:
+        bool: True для личного чата.
+    """
+    return chat_id > 0
+
+
+def group_for_chat(chat_id: int) -> Optional[Group]:
+    """
+    Возвращает группу, расписание которой относится к чату: чат группы или подписка личного чата.
+
+    Args:
+        chat_id (int): ID чата.
+
+    Returns:
+        Optional[Group]: Группа или None, если чат не связан ни с одной группой.
+    """
+    for group in groups.values():
+        if group.chat_id == chat_id:
+            return group
+    # Подписки других чатов (например, сохранённые до ограничения подписок личными чатами) доступа не дают
+    name = subscriptions.get(str(chat_id)) if is_personal_chat(chat_id) else None
+    return groups.get(name) if name else None
+
+
+def subscribe(chat_id: int, group: Group) -> None:
+    """
+    Подписывает личный чат на расписание группы и сохраняет подписки на диск.
+
+    Args:
+        chat_id (int): ID личного чата.
+        group (Group): Группа.
+
+    Raises:
+        ValueError: Если чат не личный.
+    """
+    if not is_personal_chat(chat_id):
+        raise ValueError(f'Only personal chats can subscribe, got {chat_id}')
+    subscriptions[str(chat_id)] = group.name
+    save_json_file(SUBSCRIPTIONS_PATH, subscriptions)
+
+
+def unsubscribe(chat_id: int) -> bool:
+    """
+    Отменяет подписку чата и сохраняет подписки на диск.
+
+    Args:
+        chat_id (int): ID чата.
+
+    Returns:
+        bool: True, если подписка существовала.
+    """
+    if subscriptions.pop(str(chat_id), None) is None:
+        return False
+    save_json_file(SUBSCRIPTIONS_PATH, subscriptions)
+    return True
+
+
+def subscribers(group: Group) -> List[int]:
+    """
+    Возвращает ID личных чатов, подписанных на расписание группы.
+
+    Args:
+        group (Group): Группа.
+
+    Returns:
+        List[int]: Список ID чатов.
+    """
+    return [int(chat_id) for chat_id, name in subscriptions.items()
+            if name == group.name and is_personal_chat(int(chat_id))]
@@ -0,0 +1,209 @@
+# Экспорт расписания в формате iCalendar (.ics) и HTTP-эндпоинт с условными запросами по ETag
+import hashlib
+from datetime import date, datetime, time, timezone
+from typing import List, Optional, Tuple
+
+from utils.basic import logger
+from utils.cache import TTLCache
+from utils.groups import Group, find_group
+from utils.index import ScheduleIndex
+from utils.metrics import metrics
+from utils.models import Lesson
+from utils.parser import LESSON_TIMES, get_teachers_name, schedule_cache, teacher_directory
+from utils.workers import get_index_async, run_in_executor
+
+# Готовые календари по (группа, подгруппа, год, версия расписания, версия справочника преподавателей)
+calendar_cache = TTLCache(64, 24 * 3600)
+metrics.register_collector('calendar_cache', calendar_cache.stats)
+
+
+def escape_text(text: str) -> str:
+    """
+    Экранирует текст значения свойства iCalendar (RFC 5545, 3.3.11).
+    """
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def fold_line(line: str) -> str:
+    """
+    Переносит строку длиннее 75 байт (RFC 5545, 3.1), не разрывая символы UTF-8.
+    """
+    parts, current, size = [], '', 0
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        if size + char_size > 75:
+            parts.append(current)
+            # Продолжение строки начинается с пробела, который тоже занимает байт
+            current, size = ' ', 1
+        current += char
+        size += char_size
+    parts.append(current)
+    return '\r\n'.join(parts)
+
+
+def lesson_times(lesson: Lesson) -> Tuple[time, time]:
+    """
+    Возвращает время начала и окончания занятия; лабораторные занимают две пары подряд, как в format_lesson.
+
+    Args:
+        lesson (Lesson): Занятие.
+
+    Returns:
+        Tuple[time, time]: Время начала и окончания.
+    """
+    last_slot = lesson.slot + 1 if lesson.subgroup is not None else lesson.slot
+    start = LESSON_TIMES[lesson.slot].split(' - ')[0]
+    end = LESSON_TIMES[min(last_slot, len(LESSON_TIMES) - 1)].split(' - ')[-1]
+    return time(*map(int, start.split(':'))), time(*map(int, end.split(':')))
+
+
+def format_datetime(day: date, moment: time, group: Group) -> str:
+    """
+    Форматирует дату и время занятия: в UTC, если у группы задан часовой пояс, иначе как местное время.
+    """
+    value = datetime.combine(day, moment)
+    if group.timezone is None:
+        return value.strftime('%Y%m%dT%H%M%S')
+    return value.replace(tzinfo=group.timezone).astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def build_calendar(index: ScheduleIndex, group: Group, year: int, subgroup: Optional[str] = None) -> str:
+    """
+    Формирует календарь со всеми занятиями группы в указанном году.
+
+    Даты занятий берутся из индекса, поэтому правила 'к.н.', 'ч.н.' и отдельные даты разворачиваются так же,
+    как при отправке расписания.
+
+    Args:
+        index (ScheduleIndex): Индекс расписания.
+        group (Group): Группа.
+        year (int): Год.
+        subgroup (str, optional): Подгруппа: лабораторные других подгрупп не включаются в календарь.
+
+    Returns:
+        str: Календарь в формате iCalendar.
+    """
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    lines: List[str] = [
+        'BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//stankin_schedule_bot//RU', 'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{escape_text(group.name + (f" ({subgroup})" if subgroup else ""))}'
+    ]
+    for day, lessons in index.range(date(year, 1, 1), date(year, 12, 31)).items():
+        for lesson in lessons:
+            for sublesson in lesson if isinstance(lesson, list) else [lesson]:
+                if not isinstance(sublesson, Lesson):
+                    continue
+                if subgroup and sublesson.subgroup is not None and sublesson.subgroup != subgroup:
+                    continue
+                start, end = lesson_times(sublesson)
+                uid = hashlib.sha1(f'{group.name}|{day}|{sublesson.slot}|{sublesson.subject}|'
+                                   f'{sublesson.subgroup}'.encode()).hexdigest()
+                details = [sublesson.type, get_teachers_name(sublesson.teacher) if sublesson.teacher else None,
+                           f'Группа: {sublesson.subgroup}' if sublesson.subgroup else None]
+                summary = sublesson.subject + (f' ({sublesson.subgroup})' if sublesson.subgroup else '')
+                lines += [
+                    'BEGIN:VEVENT',
+                    f'UID:{uid}@stankin_schedule_bot',
+                    f'DTSTAMP:{stamp}',
+                    f'DTSTART:{format_datetime(day, start, group)}',
+                    f'DTEND:{format_datetime(day, end, group)}',
+                    f'SUMMARY:{escape_text(summary)}',
+                    f'LOCATION:{escape_text(sublesson.room)}',
+                    f'DESCRIPTION:{escape_text(chr(10).join(detail for detail in details if detail))}',
+                    'END:VEVENT'
+                ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(fold_line(line) for line in lines) + '\r\n'
+
+
+async def get_calendar(group: Group, subgroup: Optional[str] = None) -> Tuple[bytes, str]:
+    """
+    Возвращает календарь группы на текущий год и его ETag, формируя календарь заново только после изменения
+    PDF-файла или справочника преподавателей.
+
+    Args:
+        group (Group): Группа.
+        subgroup (str, optional): Подгруппа.
+
+    Returns:
+        Tuple[bytes, str]: Календарь в UTF-8 и ETag.
+    """
+    index = await get_index_async(group.pdf_path)
+    year = date.today().year
+    key = (group.name, subgroup, year, schedule_cache.fingerprint(group.pdf_path)[3], teacher_directory.version)
+    with metrics.timer('cache_lookup', cache='calendar'):
+        cached = calendar_cache.get(key)
+    if cached is not None:
+        return cached
+    with metrics.timer('calendar_build'):
+        text = await run_in_executor(None, build_calendar, index, group, year, subgroup)
+    # ETag зависит только от исходных данных, поэтому не меняется при повторном формировании того же календаря
+    cached = (text.encode('utf-8'), f'"{hashlib.sha256(repr(key).encode()).hexdigest()[:32]}"')
+    calendar_cache.set(key, cached)
+    logger.info(f"Built calendar for {group.name}{f' ({subgroup})' if subgroup else ''}: {len(cached[0])} bytes")
+    return cached
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match (слабое сравнение, как требует RFC 9110 для этого заголовка).
+
+    Args:
+        header (str, optional): Значение заголовка If-None-Match.
+        etag (str): Текущий ETag.
+
+    Returns:
+        bool: True, если клиент уже получил текущую версию.
+    """
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return any(candidate.strip().removeprefix('W/') == etag for candidate in header.split(','))
+
+
+def create_calendar_app(max_age: int = 3600) -> 'web.Application':
+    """
+    Создаёт приложение aiohttp с календарями групп: GET /calendar/<код группы>.ics[?subgroup=А].
+
+    Args:
+        max_age (int, optional): Время в секундах, в течение которого клиенты могут не перепроверять календарь.
+
+    Returns:
+        web.Application: Приложение с маршрутом календаря.
+    """
+    from aiohttp import web
+
+    async def handle_calendar(request: web.Request) -> web.Response:
+        group = find_group(request.match_info['group'])
+        if group is None:
+            metrics.inc('calendar_requests', status='404')
+            return web.Response(status=404, text='Unknown group')
+        body, etag = await get_calendar(group, request.query.get('subgroup') or None)
+        headers = {'ETag': etag, 'Cache-Control': f'max-age={max_age}'}
+        if etag_matches(request.headers.get('If-None-Match'), etag):
+            metrics.inc('calendar_requests', status='304')
+            return web.Response(status=304, headers=headers)
+        metrics.inc('calendar_requests', status='200')
+        return web.Response(body=body, headers=headers, content_type='text/calendar', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/calendar/{group}.ics', handle_calendar)
+    return app
+
+
+async def start_calendar_server(host: str, port: int, max_age: int = 3600) -> None:
+    """
+    Запускает HTTP-сервер с календарями групп.
+
+    Args:
+        host (str): Адрес для прослушивания.
+        port (int): Порт.
+        max_age (int, optional): Время в секундах, в течение которого клиенты могут не перепроверять календарь.
+    """
+    from aiohttp import web
+
+    runner = web.AppRunner(create_calendar_app(max_age), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Calendar endpoint is available on http://{host}:{port}/calendar/<group>.ics")
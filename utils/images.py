@@ -0,0 +1,162 @@
+# Изображения для ежедневной отправки: индекс директории и кеш file_id загруженных в Telegram файлов
+import hashlib
+import os
+import threading
+from random import choice
+from typing import Dict, Optional, Tuple, Union
+
+from aiogram.types import FSInputFile
+
+from utils.basic import config, load_json_file, logger, save_json_file
+
+
+class ImageAsset:
+    """
+    Изображение из директории: путь, хеш содержимого и file_id, если файл уже загружался в Telegram.
+    """
+
+    __slots__ = ('path', 'sha256', 'file_id')
+
+    def __init__(self, path: str, sha256: str, file_id: Optional[str] = None) -> None:
+        self.path = path
+        self.sha256 = sha256
+        self.file_id = file_id
+
+    @property
+    def photo(self) -> Union[str, FSInputFile]:
+        """
+        Значение параметра photo для SendPhoto: file_id или файл для загрузки.
+        """
+        return self.file_id or FSInputFile(self.path)
+
+    def __repr__(self) -> str:
+        return f'ImageAsset({self.path!r}, file_id={self.file_id!r})'
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    Вычисляет SHA-256 содержимого файла.
+
+    Args:
+        file_path (str): Путь к файлу.
+
+    Returns:
+        str: Хеш в шестнадцатеричном виде.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ImageLibrary:
+    """
+    Директория изображений с индексом файлов и кешем file_id по хешу содержимого.
+
+    Список файлов перечитывается только при изменении директории, хеш файла пересчитывается только при изменении
+    его размера или времени изменения. Кеш file_id и недавно отправленные изображения сохраняются в JSON-файл,
+    поэтому после перезапуска файлы не загружаются повторно.
+    """
+
+    def __init__(self, images_dir: str, cache_path: str, avoid_recent: int = 5) -> None:
+        self.images_dir = images_dir
+        self.cache_path = cache_path
+        self.avoid_recent = avoid_recent
+        # Имя файла -> (размер, время изменения в наносекундах, хеш)
+        self._files: Dict[str, Tuple[int, int, str]] = {}
+        self._dir_mtime_ns: Optional[int] = None
+        state = load_json_file(cache_path, {})
+        self._file_ids: Dict[str, str] = state.get('file_ids', {})
+        self._recent = state.get('recent', [])
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        """
+        Обновляет индекс файлов, если директория изменилась.
+        """
+        mtime_ns = os.stat(self.images_dir).st_mtime_ns
+        if mtime_ns == self._dir_mtime_ns:
+            return
+        files = {}
+        for entry in os.scandir(self.images_dir):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            known = self._files.get(entry.name)
+            if known and known[:2] == (stat.st_size, stat.st_mtime_ns):
+                files[entry.name] = known
+            else:
+                files[entry.name] = (stat.st_size, stat.st_mtime_ns, file_sha256(entry.path))
+        self._files = files
+        self._dir_mtime_ns = mtime_ns
+
+    def _asset(self, name: str) -> ImageAsset:
+        """
+        Возвращает изображение по имени файла, пересчитывая хеш, если файл был перезаписан.
+        """
+        path = os.path.join(self.images_dir, name)
+        stat = os.stat(path)
+        size, mtime_ns, sha256 = self._files[name]
+        if (size, mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            sha256 = file_sha256(path)
+            self._files[name] = (stat.st_size, stat.st_mtime_ns, sha256)
+        return ImageAsset(path, sha256, self._file_ids.get(sha256))
+
+    def choose(self) -> Optional[ImageAsset]:
+        """
+        Выбирает случайное изображение, не совпадающее с недавно отправленными.
+
+        Returns:
+            Optional[ImageAsset]: Выбранное изображение или None, если директории нет или в ней нет файлов.
+        """
+        with self._lock:
+            try:
+                self._refresh()
+            except OSError as e:
+                logger.warning(f"Error reading {self.images_dir}, sending text only: {e}")
+                return None
+            names = sorted(self._files)
+            if not names:
+                logger.warning(f"{self.images_dir} is empty, sending text only")
+                return None
+            # Хотя бы одно изображение всегда остаётся доступным для выбора
+            window = min(self.avoid_recent, len({sha for _, _, sha in self._files.values()}) - 1)
+            recent = set(self._recent[-window:]) if window > 0 else set()
+            candidates = [name for name in names if self._files[name][2] not in recent]
+            asset = self._asset(choice(candidates))
+            self._recent = (self._recent + [asset.sha256])[-max(self.avoid_recent, 1):]
+            self._save()
+            return asset
+
+    def remember(self, asset: ImageAsset, file_id: str) -> None:
+        """
+        Запоминает file_id загруженного изображения.
+
+        Args:
+            asset (ImageAsset): Изображение.
+            file_id (str): Идентификатор файла, который вернул Telegram.
+        """
+        with self._lock:
+            asset.file_id = file_id
+            self._file_ids[asset.sha256] = file_id
+            self._save()
+
+    def forget(self, asset: ImageAsset) -> None:
+        """
+        Удаляет file_id изображения (например, если Telegram его больше не принимает), чтобы загрузить файл заново.
+
+        Args:
+            asset (ImageAsset): Изображение.
+        """
+        with self._lock:
+            asset.file_id = None
+            self._file_ids.pop(asset.sha256, None)
+            self._save()
+
+    def _save(self) -> None:
+        save_json_file(self.cache_path, {'file_ids': self._file_ids, 'recent': self._recent})
+
+
+image_library = ImageLibrary(config['IMAGES_DIR'], config.get('IMAGE_CACHE_PATH', 'data/images.json'),
+                             config.get('IMAGE_AVOID_RECENT', 5))
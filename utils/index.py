@@ -0,0 +1,189 @@
+# Индекс занятий по конкретным датам семестра
+import re
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from utils.models import Lesson, build_lessons
+
+# Названия дней недели в порядке date.weekday()
+WEEKDAYS = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье']
+
+
+def search_terms(text: str) -> List[str]:
+    """
+    Разбивает текст на слова для поиска без учёта регистра и буквы 'ё'.
+
+    Args:
+        text (str): Текст (название предмета, фамилия преподавателя или поисковый запрос).
+
+    Returns:
+        List[str]: Список слов.
+    """
+    return re.findall(r'\w+', text.lower().replace('ё', 'е'))
+
+
+def expand_rule(rule: dict, year: int, weekday: int) -> Set[date]:
+    """
+    Разворачивает правило дат в конкретные даты указанного года, приходящиеся на заданный день недели.
+
+    Семантика совпадает с parse_date_range: начало периода берётся в году проверяемой даты,
+    для 'к.н.' подходит любая дата периода, для 'ч.н.' - даты, кратные двум неделям от начала периода.
+
+    Args:
+        rule (dict): Правило, полученное из parse_date_rules.
+        year (int): Год проверяемых дат.
+        weekday (int): День недели (0 - понедельник).
+
+    Returns:
+        Set[date]: Множество дат, в которые проходит занятие.
+    """
+    try:
+        if 'date' in rule:
+            d, m = map(int, rule['date'].split('.'))
+            single = date(year, m, d)
+            return {single} if single.weekday() == weekday else set()
+
+        start_day, start_month = map(int, rule['start'].split('.'))
+        end_day, end_month = map(int, rule['end'].split('.'))
+        start_date = date(year, start_month, start_day)
+        end_date = date(year, end_month, end_day)
+        if end_date < start_date:
+            end_date = date(year + 1, end_month, end_day)  # Если период охватывает конец года
+    except ValueError:
+        return set()
+
+    if rule['step'] == 14:
+        # Через неделю: шаг от начала периода, поэтому день недели совпадает с началом
+        if start_date.weekday() != weekday:
+            return set()
+        first, step = start_date, 14
+    else:
+        first, step = start_date + timedelta((weekday - start_date.weekday()) % 7), 7
+
+    end_date = min(end_date, date(year, 12, 31))
+    return {first + timedelta(days) for days in range(0, (end_date - first).days + 1, step)}
+
+
+class ScheduleIndex:
+    """
+    Индекс расписания: дата -> упорядоченный список пар в формате get_today_schedule, где занятия
+    представлены объектами Lesson.
+
+    Правила дат всех занятий разворачиваются в конкретные даты один раз для каждого года,
+    после чего запрос на любую дату - это обращение к словарю. Слова названий предметов, фамилий
+    преподавателей и аудиторий также собираются один раз для поиска занятий.
+    """
+
+    __slots__ = ('lessons', '_years', '_terms')
+
+    def __init__(self, schedule: dict, date_rules: Optional[dict] = None) -> None:
+        self.lessons = build_lessons(schedule, date_rules)
+        self._years: Dict[int, Dict[date, list]] = {}
+        self._terms: Optional[List[Tuple[Lesson, List[str]]]] = None
+
+    def _build_year(self, year: int) -> Dict[date, list]:
+        """
+        Строит индекс для всех дат указанного года.
+
+        Args:
+            year (int): Год.
+
+        Returns:
+            Dict[date, list]: Словарь дат, в которые есть хотя бы одно занятие.
+        """
+        # Для каждой даты запоминаем, какие занятия в неё проходят
+        matches: Dict[date, Set[int]] = {}
+        for weekday, day_name in enumerate(WEEKDAYS):
+            for lesson in self.lessons.get(day_name, []):
+                if lesson is None:
+                    continue
+                for sublesson in lesson if isinstance(lesson, list) else [lesson]:
+                    for rule in sublesson.rules:
+                        for day in expand_rule(rule, year, weekday):
+                            matches.setdefault(day, set()).add(id(sublesson))
+
+        index = {}
+        for day, found in matches.items():
+            lessons = []
+            for lesson in self.lessons[WEEKDAYS[day.weekday()]]:
+                if isinstance(lesson, list):
+                    found_valid = [sublesson for sublesson in lesson if id(sublesson) in found]
+                    if not found_valid:
+                        lessons.append('Окно')  # Для сохранения структуры
+                    else:
+                        lessons.append(found_valid[0] if len(found_valid) == 1 else found_valid)
+                else:
+                    lessons.append(lesson if lesson is not None and id(lesson) in found else 'Окно')
+            index[day] = lessons
+        return index
+
+    def day(self, day: date) -> List[Union[str, Lesson, List[Lesson]]]:
+        """
+        Возвращает расписание на указанную дату.
+
+        Args:
+            day (date): Дата.
+
+        Returns:
+            List[Union[str, Lesson, List[Lesson]]]: Список занятий в формате get_today_schedule.
+        """
+        year_index = self._years.get(day.year)
+        if year_index is None:
+            year_index = self._years[day.year] = self._build_year(day.year)
+        lessons = year_index.get(day)
+        if lessons is not None:
+            return lessons
+        # В этот день занятий нет: сохраняем количество слотов, как и get_today_schedule
+        return ['Окно'] * len(self.lessons.get(WEEKDAYS[day.weekday()], []))
+
+    def range(self, start: date, end: date) -> Dict[date, List[Union[str, Lesson, List[Lesson]]]]:
+        """
+        Возвращает расписание на все даты периода включительно.
+
+        Args:
+            start (date): Первая дата периода.
+            end (date): Последняя дата периода.
+
+        Returns:
+            Dict[date, List[Union[str, Lesson, List[Lesson]]]]: Словарь дата -> список занятий.
+        """
+        return {start + timedelta(days): self.day(start + timedelta(days)) for days in range((end - start).days + 1)}
+
+    def search(self, query: str, start: date, end: date, limit: int = 50) -> List[Tuple[date, Lesson]]:
+        """
+        Ищет занятия периода по словам запроса: каждое слово должно быть началом слова в названии предмета,
+        фамилии преподавателя, типе занятия или аудитории.
+
+        Args:
+            query (str): Поисковый запрос (например, 'Иванов' или 'мат анализ').
+            start (date): Первая дата периода.
+            end (date): Последняя дата периода.
+            limit (int, optional): Максимальное количество результатов.
+
+        Returns:
+            List[Tuple[date, Lesson]]: Пары (дата, занятие) в порядке дат и номеров пар.
+        """
+        words = search_terms(query)
+        if not words:
+            return []
+        if self._terms is None:
+            self._terms = [
+                (sublesson, search_terms(' '.join(filter(None, (sublesson.subject, sublesson.teacher,
+                                                                   sublesson.type, sublesson.room)))))
+                for day_lessons in self.lessons.values() for lesson in day_lessons if lesson is not None
+                for sublesson in (lesson if isinstance(lesson, list) else [lesson])
+            ]
+        found = {id(lesson) for lesson, terms in self._terms
+                 if all(any(term.startswith(word) for term in terms) for word in words)}
+        if not found:
+            return []
+
+        results = []
+        for day, lessons in self.range(start, end).items():
+            for lesson in lessons:
+                for sublesson in lesson if isinstance(lesson, list) else [lesson]:
+                    if isinstance(sublesson, Lesson) and id(sublesson) in found:
+                        results.append((day, sublesson))
+                        if len(results) >= limit:
+                            return results
+        return results
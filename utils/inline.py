@@ -0,0 +1,169 @@
+# Ответы на inline-запросы (@бот завтра, @бот 25.12, @бот Иванов) из индекса расписания
+import asyncio
+import re
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from aiogram.enums import ParseMode
+from aiogram.types import InlineQueryResultArticle, InputTextMessageContent
+
+from utils.basic import config, days_until_date
+from utils.cache import TTLCache
+from utils.groups import Group, find_group
+from utils.index import WEEKDAYS, ScheduleIndex, search_terms
+from utils.metrics import metrics
+from utils.parser import LESSON_TIMES, format_lesson, schedule_cache, teacher_directory
+from utils.workers import get_index_async, render_schedule_async
+
+# Запросы с датой относительно сегодняшнего дня
+RELATIVE_DAYS = {'': 0, 'сегодня': 0, 'today': 0, 'завтра': 1, 'tomorrow': 1, 'послезавтра': 2}
+
+# Сокращения дней недели в порядке date.weekday()
+WEEKDAY_SHORT = ['пн', 'вт', 'ср', 'чт', 'пт', 'сб', 'вс']
+
+
+def parse_inline_query(text: str) -> Tuple[Optional[Group], Optional[int], str]:
+    """
+    Разбирает текст inline-запроса.
+
+    Запрос может начинаться с кода группы, за которым следует день ('завтра', '25.12', '+3', 'пт')
+    или текст для поиска занятий по предмету, преподавателю или аудитории.
+
+    Args:
+        text (str): Текст запроса.
+
+    Returns:
+        Tuple[Optional[Group], Optional[int], str]: Указанная в запросе группа (или None), смещение дня относительно
+        сегодняшнего (None, если запрос - поиск) и нормализованный текст запроса.
+    """
+    words = text.split()
+    group = find_group(words[0]) if words else None
+    if group is not None:
+        words = words[1:]
+    query = ' '.join(words).lower().replace('ё', 'е')
+
+    if query in RELATIVE_DAYS:
+        return group, RELATIVE_DAYS[query], query
+    if re.fullmatch(r'\+?\d{1,3}', query):
+        return group, int(query), query
+    if re.fullmatch(r'\d{1,2}\.\d{1,2}(\.\d{4})?', query):
+        try:
+            return group, days_until_date(query), query
+        except ValueError:
+            pass
+    for weekday, names in enumerate(zip(WEEKDAY_SHORT, WEEKDAYS)):
+        if query in (names[0], names[1].lower()):
+            return group, (weekday - date.today().weekday()) % 7, query
+    return group, None, query
+
+
+class InlineResponder:
+    """
+    Формирует результаты inline-запросов.
+
+    Пока пользователь набирает запрос, Telegram присылает запрос на каждый введённый символ. Запрос, которого
+    нет в кеше, обрабатывается только если за debounce секунд от того же пользователя не пришёл следующий.
+    Готовые списки результатов кешируются по группе, запросу, дате и версиям расписания и справочника
+    преподавателей, поэтому повторные запросы отвечаются без обращения к индексу.
+    """
+
+    def __init__(self, debounce: float = 0.3, cache_size: int = 512, cache_ttl: float = 300, max_results: int = 20,
+                 day_results: int = 3, search_days: int = 14) -> None:
+        self.debounce = debounce
+        self.max_results = max_results
+        self.day_results = day_results
+        self.search_days = search_days
+        self.cache = TTLCache(cache_size, cache_ttl)
+        # Последний запрос каждого пользователя, ожидающий окончания паузы
+        self._latest: Dict[int, object] = {}
+        metrics.register_collector('inline_cache', self.cache.stats)
+
+    async def results(self, user_id: int, group: Group, increment_day: Optional[int],
+                      query: str) -> Optional[List[InlineQueryResultArticle]]:
+        """
+        Возвращает результаты запроса.
+
+        Args:
+            user_id (int): ID пользователя, отправившего запрос.
+            group (Group): Группа, по расписанию которой выполняется запрос.
+            increment_day (int, optional): Смещение дня или None для поиска (см. parse_inline_query).
+            query (str): Нормализованный текст запроса.
+
+        Returns:
+            Optional[List[InlineQueryResultArticle]]: Результаты или None, если пользователь уже отправил
+            следующий запрос и отвечать на этот не нужно.
+        """
+        index = await get_index_async(group.pdf_path)
+        today = date.today()
+        key = (group.name, increment_day, query, today, schedule_cache.fingerprint(group.pdf_path)[3],
+               teacher_directory.version)
+        with metrics.timer('cache_lookup', cache='inline'):
+            results = self.cache.get(key)
+        if results is not None:
+            metrics.inc('inline_queries', status='cached')
+            return results
+
+        marker = self._latest[user_id] = object()
+        await asyncio.sleep(self.debounce)
+        if self._latest.get(user_id) is not marker:
+            metrics.inc('inline_queries', status='superseded')
+            return None
+        del self._latest[user_id]
+
+        with metrics.timer('inline_build'):
+            if increment_day is not None:
+                results = await self._day_results(index, group, increment_day, today)
+            else:
+                results = self._search_results(index, query, today)
+        self.cache.set(key, results)
+        metrics.inc('inline_queries', status='built')
+        return results
+
+    async def _day_results(self, index: ScheduleIndex, group: Group, increment_day: int,
+                           today: date) -> List[InlineQueryResultArticle]:
+        """
+        Формирует результаты с расписанием на запрошенный день и следующие за ним.
+        """
+        results = []
+        for increment in range(increment_day, increment_day + self.day_results):
+            day = today + timedelta(increment)
+            text = await render_schedule_async(group.pdf_path, increment, scheduled=False, group=group.name)
+            if text == 'Выходной':
+                text = f'<b>{day:%d.%m} - Воскресенье. Занятий нет!</b>'
+            subjects = [sublesson.subject for lesson in index.day(day) if lesson != 'Окно'
+                        for sublesson in (lesson if isinstance(lesson, list) else [lesson])]
+            results.append(InlineQueryResultArticle(
+                id=f'day{increment}',
+                title=f'{WEEKDAYS[day.weekday()]}, {day:%d.%m} · {group.name}',
+                description='; '.join(dict.fromkeys(subjects)) or 'Пар нет',
+                input_message_content=InputTextMessageContent(message_text=text, parse_mode=ParseMode.HTML)
+            ))
+        return results
+
+    def _search_results(self, index: ScheduleIndex, query: str, today: date) -> List[InlineQueryResultArticle]:
+        """
+        Формирует результаты поиска занятий на ближайшие search_days дней.
+        """
+        if not search_terms(query):
+            return []
+        results = []
+        found = index.search(query, today, today + timedelta(self.search_days - 1), self.max_results)
+        for number, (day, lesson) in enumerate(found):
+            header = f'<b>{WEEKDAYS[day.weekday()]}, {day:%d.%m.%Y}</b>\n'
+            details = [LESSON_TIMES[lesson.slot].split(' - ')[0], lesson.teacher or lesson.type, lesson.room]
+            results.append(InlineQueryResultArticle(
+                id=f'lesson{number}',
+                title=lesson.subject,
+                description=f'{WEEKDAY_SHORT[day.weekday()]} {day:%d.%m}, ' + ' · '.join(filter(None, details)),
+                input_message_content=InputTextMessageContent(
+                    message_text=header + format_lesson(lesson, LESSON_TIMES, lesson.slot), parse_mode=ParseMode.HTML)
+            ))
+        return results
+
+
+inline_responder = InlineResponder(debounce=config.get('INLINE_DEBOUNCE_MS', 300) / 1000,
+                                   cache_size=config.get('INLINE_CACHE_SIZE', 512),
+                                   cache_ttl=config.get('INLINE_CACHE_TTL', 300),
+                                   max_results=config.get('INLINE_MAX_RESULTS', 20),
+                                   day_results=config.get('INLINE_DAY_RESULTS', 3),
+                                   search_days=config.get('INLINE_SEARCH_DAYS', 14))
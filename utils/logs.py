@@ -0,0 +1,201 @@
+# Логирование без блокировки цикла событий: очередь записей, ротация со сжатием, JSON-строки и выборка
+import atexit
+import gzip
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional, Tuple
+
+# Контекст обрабатываемого обновления: чат, пользователь, команда, время начала и решение о выборке
+_update_context: ContextVar[Optional[dict]] = ContextVar('update_context', default=None)
+
+# Поля контекста, добавляемые к записям лога
+CONTEXT_FIELDS = ('chat_id', 'user_id', 'command')
+
+
+@contextmanager
+def update_context(chat_id: Optional[int], user_id: Optional[int], command: Optional[str],
+                   sample_rate: float = 1.0) -> Iterator[dict]:
+    """
+    Задаёт контекст обновления для записей лога внутри блока.
+
+    Решение о выборке принимается один раз на обновление, поэтому информационные записи одного обновления
+    либо попадают в лог все, либо не попадают совсем.
+
+    Args:
+        chat_id (int, optional): ID чата.
+        user_id (int, optional): ID пользователя.
+        command (str, optional): Команда или тип обновления.
+        sample_rate (float, optional): Доля обновлений, информационные записи которых попадают в лог.
+
+    Yields:
+        dict: Контекст обновления.
+    """
+    context = {'chat_id': chat_id, 'user_id': user_id, 'command': command, 'start': time.perf_counter(),
+               'sampled': sample_rate >= 1 or random.random() < sample_rate}
+    token = _update_context.set(context)
+    try:
+        yield context
+    finally:
+        _update_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Добавляет к записям контекст обновления и время от его начала, отбрасывая информационные записи
+    обновлений, не попавших в выборку. Предупреждения и ошибки не отбрасываются.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _update_context.get()
+        if context is None:
+            return True
+        if record.levelno <= logging.INFO and not context['sampled']:
+            return False
+        for field in CONTEXT_FIELDS:
+            setattr(record, field, context[field])
+        if not hasattr(record, 'latency_ms'):
+            record.latency_ms = round((time.perf_counter() - context['start']) * 1000, 1)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматирует записи как JSON-строки с контекстом обновления (если он есть).
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {'time': self.formatTime(record), 'level': record.levelname, 'message': record.getMessage()}
+        for field in CONTEXT_FIELDS + ('latency_ms',):
+            value = getattr(record, field, None)
+            if value is not None:
+                data[field] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+def gzip_rotator(source: str, destination: str) -> None:
+    """
+    Сжимает файл лога при ротации.
+
+    Args:
+        source (str): Путь к текущему файлу лога.
+        destination (str): Путь к архиву (см. gzip_namer).
+    """
+    with open(source, 'rb') as source_file, gzip.open(destination, 'wb') as destination_file:
+        shutil.copyfileobj(source_file, destination_file)
+    os.remove(source)
+
+
+def gzip_namer(name: str) -> str:
+    """
+    Возвращает имя архива для файла лога после ротации.
+    """
+    return name + '.gz'
+
+
+def create_file_handler(file_path: str, rotation: str = 'size', max_bytes: int = 10 * 1024 * 1024,
+                        when: str = 'midnight', backup_count: int = 10, compress: bool = True) -> logging.Handler:
+    """
+    Создаёт обработчик записи в файл с ротацией.
+
+    Args:
+        file_path (str): Путь к файлу лога.
+        rotation (str, optional): 'size' - ротация по размеру, 'time' - по времени, 'none' - без ротации.
+        max_bytes (int, optional): Размер файла для ротации по размеру.
+        when (str, optional): Интервал ротации по времени (как в TimedRotatingFileHandler, например 'midnight').
+        backup_count (int, optional): Количество хранимых старых файлов.
+        compress (bool, optional): Сжимать ли старые файлы gzip.
+
+    Returns:
+        logging.Handler: Обработчик.
+    """
+    if rotation == 'size':
+        handler = logging.handlers.RotatingFileHandler(file_path, maxBytes=max_bytes, backupCount=backup_count,
+                                                       encoding='utf-8', delay=True)
+    elif rotation == 'time':
+        handler = logging.handlers.TimedRotatingFileHandler(file_path, when=when, backupCount=backup_count,
+                                                            encoding='utf-8', delay=True)
+    else:
+        return logging.FileHandler(file_path, encoding='utf-8', delay=True)
+    if compress:
+        handler.rotator = gzip_rotator
+        handler.namer = gzip_namer
+    return handler
+
+
+def start_queue_logging(logger: logging.Logger, *handlers: logging.Handler) -> logging.handlers.QueueListener:
+    """
+    Подключает к логгеру очередь записей: вызовы логгера только кладут запись в очередь, а форматирование
+    и запись на диск выполняются в отдельном потоке.
+
+    Поток останавливается при завершении процесса, записав оставшиеся в очереди записи.
+
+    Args:
+        logger (logging.Logger): Логгер.
+        *handlers (logging.Handler): Обработчики, которые выполняются в потоке записи.
+
+    Returns:
+        logging.handlers.QueueListener: Запущенный поток записи.
+    """
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    # Фильтр выполняется в потоке, вызвавшем логгер, где доступен контекст обновления
+    queue_handler.addFilter(ContextFilter())
+    logger.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+class ForwardHandler(logging.Handler):
+    """
+    Передаёт записи, полученные из процессов пула, обработчикам логгеров текущего процесса.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger(record.name).handle(record)
+
+
+def start_worker_logging() -> Tuple[multiprocessing.Queue, logging.handlers.QueueListener]:
+    """
+    Создаёт очередь для записей лога из процессов пула и поток, передающий их в лог основного процесса.
+
+    Поток записи, запущенный start_queue_logging, не копируется в процессы пула, поэтому без этой очереди
+    записи, сделанные в процессах, терялись бы. Очередь передаётся в init_worker_logging.
+
+    Returns:
+        Tuple[multiprocessing.Queue, logging.handlers.QueueListener]: Очередь и запущенный поток.
+    """
+    records = multiprocessing.Queue()
+    listener = logging.handlers.QueueListener(records, ForwardHandler())
+    listener.start()
+    return records, listener
+
+
+def init_worker_logging(records: multiprocessing.Queue, level: int = logging.INFO) -> None:
+    """
+    Настраивает логирование в процессе пула: записи отправляются в очередь основного процесса
+    (см. start_worker_logging) вместо унаследованных обработчиков.
+
+    Args:
+        records (multiprocessing.Queue): Очередь основного процесса.
+        level (int, optional): Уровень корневого логгера.
+    """
+    logger = logging.getLogger()
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(ContextFilter())
+    logger.addHandler(queue_handler)
+    logger.setLevel(level)
@@ -0,0 +1,263 @@
+# Метрики производительности: счётчики, гистограммы задержек и их экспорт
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from utils.basic import logger
+
+# Границы корзин гистограмм задержек в секундах
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Разбивка времени текущего запроса по стадиям (имя стадии -> секунды)
+_breakdown: ContextVar[Optional[Dict[str, float]]] = ContextVar('breakdown', default=None)
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными корзинами в формате Prometheus.
+    """
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Добавляет наблюдение.
+
+        Args:
+            value (float): Значение в секундах.
+        """
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Оценивает квантиль по верхней границе корзины.
+
+        Args:
+            q (float): Квантиль от 0 до 1.
+
+        Returns:
+            float: Оценка квантиля в секундах.
+        """
+        target = q * self.count
+        total = 0
+        for i, count in enumerate(self.counts):
+            total += count
+            if total >= target and count:
+                return BUCKETS[i] if i < len(BUCKETS) else float('inf')
+        return 0.0
+
+
+def _labels_key(labels: dict) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: str = '') -> str:
+    parts = [f'{key}="{_escape_label(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Metrics:
+    """
+    Реестр метрик процесса.
+    """
+
+    def __init__(self, prefix: str = 'schedule_bot') -> None:
+        self.prefix = prefix
+        self.counters: Dict[Tuple[str, tuple], float] = {}
+        self.histograms: Dict[Tuple[str, tuple], Histogram] = {}
+        self.collectors: Dict[str, Callable[[], dict]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Увеличивает счётчик.
+
+        Args:
+            name (str): Имя счётчика.
+            value (float, optional): Приращение (по умолчанию 1).
+            **labels: Метки.
+        """
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        """
+        Добавляет наблюдение в гистограмму задержек и в разбивку текущего запроса.
+
+        Args:
+            name (str): Имя гистограммы.
+            seconds (float): Длительность в секундах.
+            **labels: Метки.
+        """
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+        breakdown = _breakdown.get()
+        if breakdown is not None:
+            stage = ':'.join([name] + [str(value) for value in labels.values()])
+            breakdown[stage] = breakdown.get(stage, 0) + seconds
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """
+        Измеряет длительность блока кода.
+
+        Args:
+            name (str): Имя гистограммы.
+            **labels: Метки.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def register_collector(self, name: str, collector: Callable[[], dict]) -> None:
+        """
+        Регистрирует функцию, значения которой экспортируются как метрики-значения (gauge) при каждом снятии метрик.
+
+        Повторная регистрация с тем же именем заменяет прежнюю функцию, чтобы метрика не выводилась дважды.
+
+        Args:
+            name (str): Имя метрики.
+            collector (Callable[[], dict]): Функция, возвращающая словарь {метка kind: значение}.
+        """
+        self.collectors[name] = collector
+
+    def render(self) -> str:
+        """
+        Формирует текст метрик в формате Prometheus.
+
+        Returns:
+            str: Текст для ответа на /metrics.
+        """
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            # Значения отсортированы по имени, поэтому строка TYPE выводится перед первым значением каждой метрики
+            previous = None
+            for (name, labels), value in counters:
+                metric = f'{self.prefix}_{name}_total'
+                if name != previous:
+                    lines.append(f'# TYPE {metric} counter')
+                    previous = name
+                lines.append(f'{metric}{_format_labels(labels)} {value}')
+            previous = None
+            for (name, labels), histogram in histograms:
+                metric = f'{self.prefix}_{name}_seconds'
+                if name != previous:
+                    lines.append(f'# TYPE {metric} histogram')
+                    previous = name
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    bucket_labels = _format_labels(labels, 'le="%s"' % bound)
+                    lines.append(f'{metric}_bucket{bucket_labels} {cumulative}')
+                lines.append(f'{metric}_sum{_format_labels(labels)} {histogram.sum}')
+                lines.append(f'{metric}_count{_format_labels(labels)} {histogram.count}')
+        for name, collector in list(self.collectors.items()):
+            lines.append(f'# TYPE {self.prefix}_{name} gauge')
+            for kind, value in collector().items():
+                lines.append(f'{self.prefix}_{name}{{kind="{_escape_label(str(kind))}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> dict:
+        """
+        Возвращает краткую сводку метрик для структурированной строки лога.
+
+        Returns:
+            dict: Счётчики, p50/p90/p99 гистограмм (по верхним границам корзин) и значения коллекторов.
+        """
+        with self._lock:
+            summary = {
+                'counters': {f'{name}{_format_labels(labels)}': value for (name, labels), value in self.counters.items()},
+                'latency': {f'{name}{_format_labels(labels)}': {
+                    'count': histogram.count,
+                    'avg_ms': round(histogram.sum / histogram.count * 1000, 3) if histogram.count else 0,
+                    'p50_ms': histogram.quantile(0.5) * 1000,
+                    'p90_ms': histogram.quantile(0.9) * 1000,
+                    'p99_ms': histogram.quantile(0.99) * 1000
+                } for (name, labels), histogram in self.histograms.items()}
+            }
+        summary['gauges'] = {name: collector() for name, collector in list(self.collectors.items())}
+        return summary
+
+
+metrics = Metrics()
+
+
+@contextmanager
+def track_request() -> Iterator[Dict[str, float]]:
+    """
+    Начинает сбор разбивки времени по стадиям для текущего запроса.
+
+    Yields:
+        Dict[str, float]: Словарь стадия -> секунды, заполняемый метриками внутри блока.
+    """
+    breakdown: Dict[str, float] = {}
+    token = _breakdown.set(breakdown)
+    try:
+        yield breakdown
+    finally:
+        _breakdown.reset(token)
+
+
+async def start_metrics_server(host: str, port: int) -> None:
+    """
+    Запускает HTTP-сервер с метриками в формате Prometheus на /metrics.
+
+    Args:
+        host (str): Адрес для прослушивания.
+        port (int): Порт.
+    """
+    from aiohttp import web
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(text=metrics.render(), content_type='text/plain')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Metrics endpoint is available on http://{host}:{port}/metrics")
+
+
+async def log_metrics_periodically(interval: float) -> None:
+    """
+    Периодически записывает сводку метрик в лог одной строкой JSON.
+
+    Args:
+        interval (float): Интервал между записями в секундах.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(f"metrics {json.dumps(metrics.summary(), ensure_ascii=False)}")
@@ -0,0 +1,184 @@
+# Middleware aiogram для обработчиков и запросов к Telegram Bot API
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject, Update
+
+from utils.basic import config, logger
+from utils.logs import update_context
+from utils.metrics import metrics, track_request
+from utils.outbox import TokenBucket
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Измеряет время работы обработчиков и записывает в лог разбивку по стадиям для медленных запросов.
+    """
+
+    def __init__(self, slow_request_ms: Optional[float] = None) -> None:
+        self.slow_request_ms = slow_request_ms if slow_request_ms is not None else config.get('SLOW_REQUEST_MS', 1000)
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]], event: TelegramObject,
+                       data: Dict[str, Any]) -> Any:
+        handler_object = data.get('handler')
+        name = handler_object.callback.__name__ if handler_object else type(event).__name__
+        status = 'ok'
+        start = time.perf_counter()
+        with track_request() as breakdown:
+            try:
+                return await handler(event, data)
+            except Exception:
+                status = 'error'
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                if elapsed * 1000 > self.slow_request_ms:
+                    stages = ', '.join(f'{stage}={seconds * 1000:.1f}ms' for stage, seconds in breakdown.items())
+                    logger.warning(f"Slow request {name} took {elapsed * 1000:.1f}ms: {stages or 'no stages recorded'}")
+                metrics.observe('handler', elapsed, handler=name)
+                metrics.inc('updates', handler=name, status=status)
+
+
+def describe_update(update: Update) -> str:
+    """
+    Возвращает краткое описание обновления для лога: команду, данные кнопки или тип обновления.
+
+    Args:
+        update (Update): Обновление.
+
+    Returns:
+        str: Например, '/schedule', 'callback:tomorrow' или 'inline_query'.
+    """
+    if update.message and update.message.text and update.message.text.startswith('/'):
+        return update.message.text.split()[0].split('@')[0]
+    if update.callback_query:
+        return f'callback:{update.callback_query.data}'
+    return update.event_type
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """
+    Задаёт контекст обновления (чат, пользователь, команда) для всех записей лога во время его обработки
+    и записывает итоговое время обработки. Информационные записи сохраняются только для доли обновлений
+    sample_rate (LOG_SAMPLE_RATE).
+
+    Регистрируется как внешний middleware обновлений (dp.update.outer_middleware).
+    """
+
+    def __init__(self, sample_rate: Optional[float] = None) -> None:
+        self.sample_rate = sample_rate if sample_rate is not None else config.get('LOG_SAMPLE_RATE', 1.0)
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]], event: TelegramObject,
+                       data: Dict[str, Any]) -> Any:
+        chat, user = data.get('event_chat'), data.get('event_from_user')
+        command = describe_update(event) if isinstance(event, Update) else type(event).__name__
+        with update_context(chat.id if chat else None, user.id if user else None, command, self.sample_rate) as context:
+            try:
+                return await handler(event, data)
+            finally:
+                latency_ms = round((time.perf_counter() - context['start']) * 1000, 1)
+                logger.info(f"Handled {command} in {latency_ms}ms", extra={'latency_ms': latency_ms})
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Ограничивает частоту запросов пользователей и чатов и объединяет повторяющиеся запросы.
+
+    Одинаковые запросы в одном чате (та же команда с теми же аргументами или нажатие той же кнопки под тем же
+    сообщением) в течение coalesce_window секунд после первого обрабатываются один раз: в группе ответ на первый запрос видят все.
+    Остальные запросы проходят, только если у пользователя и у чата есть токены (token bucket). Отброшенные
+    нажатия кнопок получают короткий ответ, чтобы Telegram перестал показывать ожидание.
+    """
+
+    def __init__(self, user_rate: Optional[float] = None, user_burst: Optional[float] = None,
+                 chat_rate: Optional[float] = None, chat_burst: Optional[float] = None,
+                 coalesce_window: Optional[float] = None) -> None:
+        self.user_rate = user_rate if user_rate is not None else config.get('THROTTLE_USER_RATE', 0.5)
+        self.user_burst = user_burst if user_burst is not None else config.get('THROTTLE_USER_BURST', 3)
+        self.chat_rate = chat_rate if chat_rate is not None else config.get('THROTTLE_CHAT_RATE', 1)
+        self.chat_burst = chat_burst if chat_burst is not None else config.get('THROTTLE_CHAT_BURST', 5)
+        self.coalesce_window = coalesce_window if coalesce_window is not None else config.get('COALESCE_WINDOW', 5)
+        self._users: Dict[int, TokenBucket] = {}
+        self._chats: Dict[int, TokenBucket] = {}
+        # Время первого из одинаковых запросов по (чат, запрос)
+        self._recent: Dict[Tuple[int, str], float] = {}
+
+    @staticmethod
+    def _bucket(buckets: Dict[int, TokenBucket], key: int, rate: float, burst: float) -> TokenBucket:
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) > 4096:
+                # Забываем ключи, лимит которых уже полностью восстановился
+                now = time.monotonic()
+                for stale in [key_ for key_, value in buckets.items()
+                              if value.tokens + (now - value.updated) * value.rate >= value.capacity]:
+                    del buckets[stale]
+            bucket = buckets[key] = TokenBucket(rate, burst)
+        return bucket
+
+    def _is_duplicate(self, chat_id: int, query: str) -> bool:
+        now = time.monotonic()
+        if len(self._recent) > 4096:
+            self._recent = {key: started for key, started in self._recent.items() if now - started < self.coalesce_window}
+        started = self._recent.get((chat_id, query))
+        if started is not None and now - started < self.coalesce_window:
+            return True
+        self._recent[(chat_id, query)] = now
+        return False
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]], event: TelegramObject,
+                       data: Dict[str, Any]) -> Any:
+        chat, user = data.get('event_chat'), data.get('event_from_user')
+        if isinstance(event, Message):
+            words = (event.text or '').lower().split()
+            # Упоминание бота в команде (/schedule@bot) не делает запрос другим
+            if words and words[0].startswith('/'):
+                words[0] = words[0].split('@', 1)[0]
+            query = ' '.join(words)
+        elif isinstance(event, CallbackQuery):
+            # Кнопки с одинаковыми данными под разными сообщениями (например, расписание на завтра
+            # в разные дни) - разные запросы
+            target = event.message.message_id if event.message else event.inline_message_id
+            query = f'callback:{event.data}:{target}'
+        else:
+            return await handler(event, data)
+
+        reason = None
+        if chat is not None and query and self._is_duplicate(chat.id, query):
+            reason = 'duplicate'
+        else:
+            user_bucket = self._bucket(self._users, user.id, self.user_rate, self.user_burst) if user else None
+            chat_bucket = self._bucket(self._chats, chat.id, self.chat_rate, self.chat_burst) if chat else None
+            if user_bucket and user_bucket.delay() > 0:
+                reason = 'user'
+            elif chat_bucket and chat_bucket.delay() > 0:
+                reason = 'chat'
+            else:
+                for bucket in (user_bucket, chat_bucket):
+                    if bucket:
+                        bucket.take()
+
+        if reason is None:
+            return await handler(event, data)
+        metrics.inc('throttled', reason=reason)
+        logger.info(f"Dropped {query!r} from {user.id if user else None} in {chat.id if chat else None}: {reason}")
+        if isinstance(event, CallbackQuery):
+            await event.answer('Слишком много запросов, попробуйте позже.' if reason != 'duplicate' else None)
+        return None
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Измеряет время запросов к Telegram Bot API по методам.
+    """
+
+    async def __call__(self, make_request, bot, method):
+        name = type(method).__name__
+        with metrics.timer('telegram_request', method=name):
+            try:
+                return await make_request(bot, method)
+            except Exception:
+                metrics.inc('telegram_errors', method=name)
+                raise
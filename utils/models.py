@@ -0,0 +1,111 @@
+# Модели данных расписания
+from typing import List, Optional
+
+from utils.dates import parse_date_rules
+
+# Типы занятий, которые могут стоять сразу после названия предмета (если преподаватель не указан)
+LESSON_TYPES = ['лекции', 'семинар', 'лабораторные занятия']
+
+
+class Lesson:
+    """
+    Занятие из расписания с явными полями вместо строк, разделённых переводами строк.
+    """
+
+    __slots__ = ('subject', 'teacher', 'type', 'subgroup', 'room', 'dates', 'rules', 'slot')
+
+    def __init__(self, subject: str, teacher: Optional[str], type: str, subgroup: Optional[str], room: str, dates: str,
+                 rules: Optional[List[dict]] = None, slot: int = 0) -> None:
+        self.subject = subject
+        self.teacher = teacher
+        self.type = type
+        self.subgroup = subgroup
+        self.room = room
+        self.dates = dates
+        self.rules = rules if rules is not None else parse_date_rules(dates)
+        self.slot = slot
+
+    @classmethod
+    def from_text(cls, text: str, slot: int = 0, rules: Optional[List[dict]] = None) -> 'Lesson':
+        """
+        Создаёт занятие из строки в формате parse_pdf.
+
+        Args:
+            text (str): Строка с деталями о паре, разделёнными переводами строк.
+            slot (int, optional): Номер пары в дне (по умолчанию 0).
+            rules (List[dict], optional): Заранее разобранные правила дат (см. parse_date_rules).
+
+        Returns:
+            Lesson: Занятие.
+
+        Raises:
+            ValueError: Если в строке нет названия, типа, аудитории и дат занятия
+                (например, текст 'День самостоятельной работы' в ячейке таблицы).
+        """
+        lesson_info = text.split('\n')
+        if len(lesson_info) < 4:
+            raise ValueError(f'Not a lesson: {text!r}')
+        if lesson_info[1] not in LESSON_TYPES:
+            teacher = f'{lesson_info[1]}.'
+            lesson_type = lesson_info[2]
+        else:
+            teacher = None
+            lesson_type = lesson_info[1]
+
+        if 'лабораторные занятия' in lesson_type:
+            subgroup = lesson_info[-3].replace(')', '').replace('(', '')
+        else:
+            subgroup = None
+
+        dates = lesson_info[-1].strip('[]')
+        return cls(lesson_info[0], teacher, lesson_type, subgroup, lesson_info[-2], dates, rules, slot)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Lesson):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f'Lesson({self.subject!r}, {self.type!r}, slot={self.slot}, dates={self.dates!r})'
+
+
+def build_lessons(schedule: dict, date_rules: Optional[dict] = None) -> dict:
+    """
+    Преобразует строки занятий расписания в объекты Lesson.
+
+    Args:
+        schedule (dict): Структурированные данные расписания (см. parse_pdf).
+        date_rules (dict, optional): Заранее разобранные правила дат (см. build_date_rules).
+
+    Returns:
+        dict: Словарь с той же структурой, где непустые занятия заменены объектами Lesson, а пустые слоты - None.
+        Ячейки с произвольным текстом вместо занятия (см. Lesson.from_text) тоже становятся пустыми слотами:
+        как и раньше, в расписании на день они отображаются как 'Окно'.
+    """
+    lessons = {}
+    for day, day_schedule in schedule.items():
+        day_rules = date_rules.get(day) if date_rules else None
+        day_lessons = []
+        for slot, lesson in enumerate(day_schedule):
+            rules = day_rules[slot] if day_rules else None
+            if isinstance(lesson, list):
+                sublessons = [_build_lesson(sublesson, slot, rules[sub] if rules else None)
+                              for sub, sublesson in enumerate(lesson)]
+                sublessons = [sublesson for sublesson in sublessons if sublesson is not None]
+                day_lessons.append(sublessons or None)
+            elif lesson:
+                day_lessons.append(_build_lesson(lesson, slot, rules))
+            else:
+                day_lessons.append(None)
+        lessons[day] = day_lessons
+    return lessons
+
+
+def _build_lesson(text: str, slot: int, rules: Optional[List[dict]]) -> Optional[Lesson]:
+    """
+    Создаёт занятие из строки или возвращает None, если в ячейке не занятие.
+    """
+    try:
+        return Lesson.from_text(text, slot, rules)
+    except ValueError:
+        return None
@@ -0,0 +1,238 @@
+# Очередь исходящих сообщений с ограничением частоты отправки и повторными попытками
+import asyncio
+import itertools
+import time
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.methods import TelegramMethod
+
+from utils.basic import config, logger
+from utils.metrics import metrics
+
+# Приоритеты: меньшее значение отправляется раньше
+PRIORITY_REPLY = 0
+PRIORITY_BROADCAST = 1
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты по алгоритму token bucket: rate токенов в секунду, не более capacity подряд.
+    """
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """
+        Возвращает время ожидания до появления токена.
+
+        Returns:
+            float: Секунды до появления токена (0, если токен доступен сейчас).
+        """
+        self._refill(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """
+        Забирает токен (баланс может стать отрицательным, если токена не было).
+        """
+        self._refill(time.monotonic())
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """
+        Запрещает отправку на seconds секунд (например, после ответа Telegram с retry_after).
+
+        Args:
+            seconds (float): Длительность паузы в секундах.
+        """
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+
+class OutboundQueue:
+    """
+    Очередь исходящих запросов к Telegram с приоритетами.
+
+    Запросы отправляются ограниченным числом обработчиков с учётом общего лимита и лимита на чат
+    (в группах Telegram допускает меньшую частоту, чем в личных сообщениях). Если Telegram просит подождать
+    (retry_after), чат приостанавливается на указанное время; при сетевых ошибках и ошибках сервера
+    запрос повторяется с экспоненциальной задержкой.
+    """
+
+    def __init__(self, workers: int = 4, global_rate: float = 25, chat_rate: float = 1, group_rate: float = 1 / 3,
+                 max_retries: int = 5) -> None:
+        self.workers = workers
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+        self._global = TokenBucket(global_rate, global_rate)
+        self._chats: Dict[Any, TokenBucket] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._delayed = 0
+        self._sequence = itertools.count()
+        metrics.register_collector('outbox', self.stats)
+
+    def _chat_bucket(self, chat_id: Any) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 4096:
+                # Забываем чаты, лимит которых уже полностью восстановился
+                now = time.monotonic()
+                self._chats = {key: value for key, value in self._chats.items()
+                               if value.tokens + (now - value.updated) * value.rate < value.capacity}
+            # Отрицательные идентификаторы - группы и каналы
+            rate = self.group_rate if isinstance(chat_id, int) and chat_id < 0 else self.chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, max(1.0, rate * 3))
+        return bucket
+
+    def start(self) -> None:
+        """
+        Запускает обработчики очереди в текущем цикле событий.
+        """
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10) -> None:
+        """
+        Ожидает отправки оставшихся сообщений (не дольше timeout секунд) и останавливает обработчики.
+
+        Args:
+            timeout (float, optional): Максимальное время ожидания в секундах.
+        """
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self._queue.qsize() + self._delayed} unsent messages")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _drain(self) -> None:
+        # Отложенные запросы не находятся в очереди, поэтому ждём и их
+        while True:
+            await self._queue.join()
+            if not self._delayed:
+                return
+            await asyncio.sleep(0.1)
+
+    def submit(self, bot: Bot, method: TelegramMethod, priority: int = PRIORITY_REPLY) -> asyncio.Future:
+        """
+        Ставит запрос к Telegram в очередь.
+
+        Args:
+            bot (Bot): Экземпляр бота.
+            method (TelegramMethod): Запрос, например SendMessage или результат message.answer(...).
+            priority (int, optional): Приоритет (PRIORITY_REPLY или PRIORITY_BROADCAST).
+
+        Returns:
+            asyncio.Future: Результат запроса; содержит исключение, если запрос так и не удалось выполнить.
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((priority, next(self._sequence), time.monotonic(), 0, bot, method, future))
+        return future
+
+    def _put_later(self, delay: float, item: tuple) -> None:
+        """
+        Возвращает запрос в очередь через delay секунд, не занимая обработчик на время ожидания.
+        """
+        self._delayed += 1
+
+        def put() -> None:
+            self._delayed -= 1
+            self._queue.put_nowait(item)
+
+        asyncio.get_running_loop().call_later(delay, put)
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self._queue.get()
+            try:
+                await self._process(item)
+            except Exception as e:
+                logger.error(f"Outbox worker error: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, item: tuple) -> None:
+        priority, sequence, enqueued, attempt, bot, method, future = item
+        if future.done():
+            return
+        chat_id = getattr(method, 'chat_id', None)
+        chat_bucket = self._chat_bucket(chat_id) if chat_id is not None else None
+
+        # Чат исчерпал лимит - откладываем запрос, чтобы обработчик мог отправлять сообщения в другие чаты
+        delay = chat_bucket.delay() if chat_bucket else 0
+        if delay > 0:
+            self._put_later(delay, item)
+            return
+        global_delay = self._global.delay()
+        if global_delay > 0:
+            await asyncio.sleep(global_delay)
+        self._global.take()
+        if chat_bucket:
+            chat_bucket.take()
+
+        name = type(method).__name__
+        try:
+            result = await bot(method)
+        except TelegramRetryAfter as e:
+            if chat_bucket:
+                chat_bucket.pause(e.retry_after)
+            self._retry(item, e, e.retry_after)
+            return
+        except (TelegramNetworkError, TelegramServerError) as e:
+            self._retry(item, e, min(2 ** attempt, 60))
+            return
+        except Exception as e:
+            metrics.inc('outbox_messages', method=name, status='error')
+            future.set_exception(e)
+            return
+
+        metrics.observe('outbox_latency', time.monotonic() - enqueued, priority=priority)
+        metrics.inc('outbox_messages', method=name, status='ok')
+        future.set_result(result)
+
+    def _retry(self, item: tuple, error: Exception, delay: float) -> None:
+        priority, sequence, enqueued, attempt, bot, method, future = item
+        name = type(method).__name__
+        if attempt >= self.max_retries:
+            metrics.inc('outbox_messages', method=name, status='error')
+            future.set_exception(error)
+            return
+        metrics.inc('outbox_retries', method=name)
+        logger.warning(f"Retrying {name} to {getattr(method, 'chat_id', None)} in {delay}s: {error}")
+        self._put_later(delay, (priority, sequence, enqueued, attempt + 1, bot, method, future))
+
+    def stats(self) -> dict:
+        """
+        Возвращает глубину очереди.
+
+        Returns:
+            dict: Количество запросов в очереди и ожидающих повтора или лимита чата.
+        """
+        return {'queued': self._queue.qsize() if self._queue else 0, 'delayed': self._delayed}
+
+
+outbox = OutboundQueue(workers=config.get('OUTBOX_WORKERS', 4), global_rate=config.get('OUTBOX_GLOBAL_RATE', 25),
+                       chat_rate=config.get('OUTBOX_CHAT_RATE', 1), group_rate=config.get('OUTBOX_GROUP_RATE', 1 / 3),
+                       max_retries=config.get('OUTBOX_MAX_RETRIES', 5))
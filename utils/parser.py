@@ -1,16 +1,25 @@
-import json
+import hashlib
+import os
+import threading
 from datetime import datetime, timedelta
 from random import choice
-from typing import List, Union
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 
-import camelot
-import numpy as np
-import pandas as pd
+from utils.basic import config, logger
+from utils.compiled import build_date_rules, compiled_path, read_compiled, write_compiled
+from utils.extract import DAYS_OF_WEEK, extract_schedule
+from utils.index import ScheduleIndex
+from utils.metrics import metrics
+from utils.models import Lesson
+from utils.teachers import TeacherDirectory
 
-from utils.basic import config
+# camelot (вместе с OpenCV), pandas и numpy импортируются только при извлечении таблиц из PDF-файла:
+# при загрузке скомпилированного расписания они не нужны, а их импорт занимает секунды и сотни мегабайт
+if TYPE_CHECKING:
+    import pandas as pd
 
 
-def fix_labs(df: pd.DataFrame) -> pd.DataFrame:
+def fix_labs(df: 'pd.DataFrame') -> 'pd.DataFrame':
     """
     Исправляет формат лабораторных в таблице, объединяя строки, которые должны быть объединены.
 
@@ -20,59 +29,77 @@ def fix_labs(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame с исправленными лабораторными.
     """
-    # Создаём копию DataFrame, чтобы не изменять оригинал
-    df_copy = df.copy()
-
-    # Заменяем пустые строки на NaN
-    df_copy.replace('', np.nan, inplace=True)
-
-    # Итерируем по строкам DataFrame
-    for i in range(1, len(df_copy)):
-        # Проверяем, что первая ячейка в текущей строке пуста
-        if pd.isna(df_copy.iloc[i, 0]):
-            # Объединяем не пустые ячейки текущей строки с предыдущей строкой
-            for j in range(1, len(df_copy.columns)):
-                if pd.notna(df_copy.iloc[i, j]):
-                    df_copy.iloc[i - 1, j] = df_copy.iloc[i - 1, j] + '\n' + df_copy.iloc[i, j]
-            # Заполняем текущую строку NaN
-            df_copy.iloc[i] = np.nan
+    import pandas as pd
+
+    # Таблица camelot - несколько десятков строк, поэтому один проход по строкам быстрее группировки pandas:
+    # строка с пустой первой ячейкой продолжает предыдущую, её непустые ячейки дописываются через перевод строки
+    rows, labels = [], []
+    for label, row in zip(df.index, df.to_numpy(dtype=object)):
+        cells = ['' if pd.isna(cell) else cell for cell in row]
+        if rows and not cells[0]:
+            previous = rows[-1]
+            for j in range(1, len(cells)):
+                if cells[j]:
+                    previous[j] = previous[j] + '\n' + cells[j] if previous[j] else cells[j]
+        else:
+            rows.append(cells)
+            labels.append(label)
 
-    # Удаляем строки, которые стали полностью пустыми
-    df_copy = df_copy.dropna(how='all')
+    # Полностью пустые строки (вместе с дописанными к ним) в результат не попадают
+    kept = [i for i, cells in enumerate(rows) if any(cells)]
+    merged = pd.DataFrame([rows[i] for i in kept], columns=df.columns,
+                          index=pd.Index([labels[i] for i in kept], dtype=df.index.dtype))
 
-    # Заменяем оставшиеся NaN обратно на пустые строки
-    df_copy.replace(np.nan, '', inplace=True)
+    # Типы столбцов восстанавливаются, только если pandas вывел другие (пустой результат, столбцы object)
+    if not merged.dtypes.equals(df.dtypes):
+        merged = merged.astype(df.dtypes.to_dict())
 
-    return df_copy
+    return merged
 
 
-def parse_pdf(file_path: str) -> dict:
+def parse_pdf(file_path: str, sha: Optional[str] = None) -> dict:
     """
     Парсит PDF-файл с расписанием, возвращая структурированные данные.
 
+    Способ извлечения таблицы задаётся параметром EXTRACT_BACKEND (см. extract_schedule).
+
     Args:
         file_path (str): Путь к PDF-файлу.
+        sha (str, optional): SHA-256 содержимого файла, если он уже вычислен (см. file_fingerprint).
 
     Returns:
         dict: Структурированные данные расписания, где ключи - это дни недели, а значения - списки занятий.
     """
-    # Извлечение таблиц из PDF файла, обработка всех страниц
-    tables = camelot.read_pdf(file_path, pages='all')
+    def parse(df: 'pd.DataFrame') -> dict:
+        with metrics.timer('parse_table'):
+            return parse_table(df)
 
-    # Выбор первой таблицы
-    table = fix_labs(tables[0].df)
+    with metrics.timer('parse_pdf'):
+        return extract_schedule(file_path, sha or file_fingerprint(file_path)[3], parse)
+
+
+def parse_table(df: 'pd.DataFrame') -> dict:
+    """
+    Преобразует таблицу расписания, извлечённую из PDF-файла, в структурированные данные.
+
+    Args:
+        df (pd.DataFrame): Таблица в том виде, в котором её возвращает camelot.
+
+    Returns:
+        dict: Структурированные данные расписания, где ключи - это дни недели, а значения - списки занятий.
+    """
+    table = fix_labs(df)
 
     # Инициализация списка расписания
     schedule_ = table.iloc[1:8].stack().tolist()
 
     # Инициализация словаря для хранения расписания
     schedule = {}
-    days_of_week = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота']
     current_day = None
 
     # Обработка списка расписания
     for item in schedule_:
-        if item in days_of_week:
+        if item in DAYS_OF_WEEK:
             current_day = item
             schedule[current_day] = []
         elif current_day:
@@ -93,6 +120,269 @@ def parse_pdf(file_path: str) -> dict:
     return schedule
 
 
+def file_fingerprint(file_path: str) -> Tuple[str, int, int, str]:
+    """
+    Вычисляет отпечаток файла: путь, размер, время изменения и SHA-256 содержимого.
+
+    Args:
+        file_path (str): Путь к файлу.
+
+    Returns:
+        Tuple[str, int, int, str]: Кортеж (путь, размер, mtime в наносекундах, хеш содержимого).
+    """
+    stat = os.stat(file_path)
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+
+def load_schedule(file_path: str, fingerprint: Tuple[str, int, int, str]) -> Tuple[dict, dict]:
+    """
+    Загружает расписание из скомпилированного артефакта, а при его отсутствии или устаревании парсит PDF-файл
+    и сохраняет новый артефакт рядом с ним.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+        fingerprint (Tuple[str, int, int, str]): Отпечаток PDF-файла (см. file_fingerprint).
+
+    Returns:
+        Tuple[dict, dict]: Расписание (см. parse_pdf) и заранее разобранные правила дат (см. build_date_rules).
+    """
+    artifact_path = compiled_path(file_path)
+    artifact = read_compiled(artifact_path, fingerprint)
+    if artifact:
+        logger.info(f"Loaded compiled schedule from {artifact_path}")
+        return artifact['schedule'], artifact['date_rules']
+
+    schedule = parse_pdf(file_path, fingerprint[3])
+    try:
+        write_compiled(artifact_path, schedule, fingerprint)
+        logger.info(f"Saved compiled schedule to {artifact_path}")
+    except OSError as e:
+        logger.error(f"Error saving compiled schedule to {artifact_path}: {e}")
+    return schedule, build_date_rules(schedule)
+
+
+def load_fresh_schedule(file_path: str) -> Tuple[Tuple[str, int, int, str], dict, dict]:
+    """
+    Вычисляет отпечаток PDF-файла и загружает расписание (см. load_schedule).
+
+    Функция не использует состояние процесса, поэтому её можно выполнять в пуле процессов.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+
+    Returns:
+        Tuple[Tuple[str, int, int, str], dict, dict]: Отпечаток, расписание и правила дат.
+    """
+    fingerprint = file_fingerprint(file_path)
+    schedule, date_rules = load_schedule(file_path, fingerprint)
+    return fingerprint, schedule, date_rules
+
+
+class ScheduleCache:
+    """
+    Кеш результатов parse_pdf, ключом которого служит отпечаток PDF-файла.
+
+    Пока размер и время изменения файла не меняются, расписание отдаётся из памяти без чтения файла.
+    При изменении этих атрибутов пересчитывается хеш содержимого: если он совпал, кеш остаётся валидным,
+    иначе файл парсится заново.
+
+    Для закреплённых файлов (см. pin) изменения на диске не проверяются: новая версия попадает в кеш
+    только через store после фоновой загрузки и проверки (см. utils.watcher).
+    """
+
+    def __init__(self) -> None:
+        self._entries = {}
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_path: str) -> dict:
+        """
+        Возвращает расписание для PDF-файла, парся его только при изменении файла.
+
+        Args:
+            file_path (str): Путь к PDF-файлу.
+
+        Returns:
+            dict: Структурированные данные расписания (см. parse_pdf).
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            # Быстрый путь: размер и mtime не изменились
+            if entry and entry['fingerprint'][1:3] == (stat.st_size, stat.st_mtime_ns):
+                self.hits += 1
+                return entry['schedule']
+
+        # Хеш и разбор выполняются без блокировки, чтобы обращения к другим файлам не ждали их завершения;
+        # одновременные загрузки одного файла объединяет get_schedule_async
+        fingerprint = file_fingerprint(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            # Файл был перезаписан тем же содержимым - обновляем отпечаток
+            if entry and entry['fingerprint'][3] == fingerprint[3]:
+                entry['fingerprint'] = fingerprint
+                self.hits += 1
+                return entry['schedule']
+            self.misses += 1
+
+        schedule, date_rules = load_schedule(path, fingerprint)
+        with self._lock:
+            self._entries[path] = {'fingerprint': fingerprint, 'schedule': schedule, 'date_rules': date_rules}
+        return schedule
+
+    def peek(self, file_path: str) -> Optional[dict]:
+        """
+        Возвращает расписание, только если его можно отдать без чтения файла (размер и mtime не изменились
+        или файл закреплён).
+
+        Args:
+            file_path (str): Путь к PDF-файлу.
+
+        Returns:
+            Optional[dict]: Расписание или None, если требуется загрузка.
+        """
+        path = os.path.abspath(file_path)
+        if path in self._pinned:
+            latest = self.latest(path)
+            if latest is not None:
+                self.hits += 1
+                return latest
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry['fingerprint'][1:3] == (stat.st_size, stat.st_mtime_ns):
+                self.hits += 1
+                return entry['schedule']
+        return None
+
+    def latest(self, file_path: str) -> Optional[dict]:
+        """
+        Возвращает последнюю успешно загруженную версию расписания независимо от состояния файла на диске.
+
+        Args:
+            file_path (str): Путь к PDF-файлу.
+
+        Returns:
+            Optional[dict]: Расписание или None, если файл ещё не загружался.
+        """
+        entry = self._entries.get(os.path.abspath(file_path))
+        return entry['schedule'] if entry else None
+
+    def pin(self, file_path: str) -> None:
+        """
+        Закрепляет текущую версию файла: запросы перестают проверять файл на диске и получают последнюю
+        загруженную версию, пока она не будет заменена через store.
+
+        Args:
+            file_path (str): Путь к PDF-файлу.
+        """
+        self._pinned.add(os.path.abspath(file_path))
+
+    def store(self, file_path: str, fingerprint: Tuple[str, int, int, str], schedule: dict, date_rules: dict,
+              index: Optional[ScheduleIndex] = None) -> None:
+        """
+        Сохраняет в кеш расписание, загруженное вне кеша (например, в пуле процессов).
+
+        Args:
+            file_path (str): Путь к PDF-файлу.
+            fingerprint (Tuple[str, int, int, str]): Отпечаток PDF-файла (см. file_fingerprint).
+            schedule (dict): Структурированные данные расписания (см. parse_pdf).
+            date_rules (dict): Заранее разобранные правила дат (см. build_date_rules).
+            index (ScheduleIndex, optional): Уже построенный индекс расписания (например, при проверке).
+        """
+        entry = {'fingerprint': fingerprint, 'schedule': schedule, 'date_rules': date_rules}
+        if index is not None:
+            entry['index'] = index
+        with self._lock:
+            self.misses += 1
+            # Новая запись заменяет старую одним присваиванием, поэтому читатели видят либо старую, либо новую версию
+            self._entries[os.path.abspath(file_path)] = entry
+
+    def fingerprint(self, file_path: str) -> Optional[Tuple[str, int, int, str]]:
+        """
+        Возвращает отпечаток закешированной версии файла.
+
+        Args:
+            file_path (str): Путь к PDF-файлу.
+
+        Returns:
+            Optional[Tuple[str, int, int, str]]: Отпечаток или None, если файл ещё не парсился.
+        """
+        entry = self._entries.get(os.path.abspath(file_path))
+        return entry['fingerprint'] if entry else None
+
+    def index(self, file_path: str) -> ScheduleIndex:
+        """
+        Возвращает индекс занятий по датам для закешированного расписания, строя его при первом обращении.
+
+        Args:
+            file_path (str): Путь к PDF-файлу.
+
+        Returns:
+            ScheduleIndex: Индекс расписания.
+        """
+        path = os.path.abspath(file_path)
+        entry = self._entries.get(path)
+        if entry is None:
+            self.get(path)
+            entry = self._entries[path]
+        if 'index' not in entry:
+            entry['index'] = ScheduleIndex(entry['schedule'], entry['date_rules'])
+        return entry['index']
+
+    def invalidate(self, file_path: Optional[str] = None) -> None:
+        """
+        Сбрасывает кеш для указанного файла или целиком.
+
+        Args:
+            file_path (str, optional): Путь к PDF-файлу. Если не указан, очищается весь кеш.
+        """
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(file_path), None)
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику обращений к кешу.
+
+        Returns:
+            dict: Словарь с количеством попаданий, промахов и закешированных файлов.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+
+schedule_cache = ScheduleCache()
+metrics.register_collector('schedule_cache', schedule_cache.stats)
+
+# Справочник полных имён преподавателей
+teacher_directory = TeacherDirectory(config['TEACHERS_FULLNAMES_PATH'], config.get('TEACHERS_CHECK_INTERVAL', 5))
+
+
+def get_schedule(file_path: str) -> dict:
+    """
+    Возвращает расписание из кеша, при необходимости парся PDF-файл.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+
+    Returns:
+        dict: Структурированные данные расписания (см. parse_pdf).
+    """
+    return schedule_cache.get(file_path)
+
+
 def parse_date_range(date_range: str, increment_day: int = 0) -> list:
     """
     Парсит строку с датами и возвращает список валидных дат.
@@ -225,53 +515,44 @@ def get_teachers_name(initials: str) -> str:
     Returns:
         str: Полное имя преподавателя, если оно найдено в файле, или сами инициалы, если запись не найдена или файл отсутствует.
     """
-    try:
-        # Загружаем словарь с полными именами преподавателей из файла
-        with open(config['TEACHERS_FULLNAMES_PATH'], 'r', encoding='utf-8') as file:
-            teachers_names = json.load(file)
+    return teacher_directory.get(initials)
 
-        # Ищем полное имя по инициалам
-        full_name = teachers_names[initials]
-    except (KeyError, FileNotFoundError):
-        # Возвращаем инициалы, если полное имя не найдено или файл отсутствует
-        full_name = initials
 
-    return full_name
+# Время начала и окончания пар по номеру пары в дне
+LESSON_TIMES = ['8:30 - 10:10', '10:20 - 12:00', '12:20 - 14:00', '14:10 - 15:50',
+                '16:00 - 17:40', '18:00 - 19:30', '19:40 - 21:10', '21:20 - 22:50']
 
 
-def format_lesson(lesson_info: List[str], times: List[str], time_counter: int) -> str:
+def format_lesson(lesson: Union[Lesson, str], times: List[str], time_counter: int) -> str:
     """
     Форматирует информацию о паре в блок для сообщения.
 
     Args:
-        lesson_info (List[str]): Список строк с деталями о паре.
+        lesson (Lesson | str): Занятие или строка с деталями о паре в формате parse_pdf.
         times (List[str]): Список временных интервалов пар.
         time_counter (int): Индекс текущего временного интервала.
 
     Returns:
         str: Отформатированная информация о паре.
     """
-    name = '📚 ' + lesson_info[0]
-    if lesson_info[1] not in ['лекции', 'семинар', 'лабораторные занятия']:
-        teacher_initials = f'{lesson_info[1]}.'
-        teacher_fullname = f'👤 {get_teachers_name(teacher_initials)}'
-        lesson_type = f'⚙️ {lesson_info[2]}'
-    else:
-        teacher_fullname = None
-        lesson_type = '⚙️ ' + lesson_info[1]
-    lesson_type = lesson_type.replace('лекции', 'лекция')
+    if isinstance(lesson, str):
+        lesson = Lesson.from_text(lesson, time_counter)
+
+    name = '📚 ' + lesson.subject
+    teacher_fullname = f'👤 {get_teachers_name(lesson.teacher)}' if lesson.teacher else None
+    lesson_type = '⚙️ ' + lesson.type.replace('лекции', 'лекция')
 
     try:
-        location_number = int(lesson_info[-2])
-        location = f'📍 Каб. {lesson_info[-2]}'
+        location_number = int(lesson.room)
+        location = f'📍 Каб. {lesson.room}'
     except ValueError:
-        location = f'📍 {lesson_info[-2]}'
+        location = f'📍 {lesson.room}'
 
-    duration = f'🗓 {lesson_info[-1].replace("[", "").replace("]", "").replace("-", " - ")}'
+    duration = f'🗓 {lesson.dates.replace("-", " - ")}'
     time = f'⏰ {times[time_counter]}'
 
-    if 'лабораторные занятия' in lesson_type:
-        subgroup = f'🗂 Группа: {lesson_info[-3].replace(")", "").replace("(", "")}'
+    if lesson.subgroup is not None:
+        subgroup = f'🗂 Группа: {lesson.subgroup}'
         time = f'⏰ {times[time_counter].split(" - ")[0]} - {times[time_counter + 1].split(" - ")[-1]}'
     else:
         subgroup = None
@@ -280,12 +561,13 @@ def format_lesson(lesson_info: List[str], times: List[str], time_counter: int) -
     return f'<blockquote>{chr(10).join(arg for arg in args if arg)}</blockquote>'
 
 
-def create_message(today_schedule: List[Union[str, List[str]]], increment_day: int = 0, scheduled: bool = True) -> str:
+def create_message(today_schedule: List[Union[str, Lesson, List[Union[str, Lesson]]]], increment_day: int = 0, scheduled: bool = True) -> str:
     """
     Формирует сообщение с расписанием на день.
 
     Args:
-        today_schedule (List[Union[str, List[str]]]): Расписание на день.
+        today_schedule (List[Union[str, Lesson, List[Union[str, Lesson]]]]): Расписание на день (занятия в виде Lesson
+            или строк в формате parse_pdf).
         increment_day (int, optional): Смещение даты (по умолчанию 0).
         scheduled (bool, optional): Флаг, указывающий на тип формирования сообщения (по умолчанию True).
 
@@ -309,8 +591,7 @@ def create_message(today_schedule: List[Union[str, List[str]]], increment_day: i
         'Sunday': 'Воскресенье'
     }
 
-    times = ['8:30 - 10:10', '10:20 - 12:00', '12:20 - 14:00', '14:10 - 15:50',
-             '16:00 - 17:40', '18:00 - 19:30', '19:40 - 21:10', '21:20 - 22:50']
+    times = LESSON_TIMES
 
     today_rus = day_map[today]
 
@@ -326,11 +607,11 @@ def create_message(today_schedule: List[Union[str, List[str]]], increment_day: i
             for sublesson in lesson:
                 if sublesson == 'Окно':
                     continue
-                lessons.append(format_lesson(sublesson.split('\n'), times, time_counter))
+                lessons.append(format_lesson(sublesson, times, time_counter))
             time_counter += 1
             continue
 
-        lessons.append(format_lesson(lesson.split('\n'), times, time_counter))
+        lessons.append(format_lesson(lesson, times, time_counter))
         time_counter += 1
 
     if scheduled:
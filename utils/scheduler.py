@@ -0,0 +1,184 @@
+# Планировщик ежедневных задач на основе кучи, упорядоченной по времени
+import asyncio
+import heapq
+import itertools
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from utils.basic import load_json_file, logger, save_json_file
+from utils.storage import DistributedLock, Storage, StorageError
+
+
+class DailyJob:
+    """
+    Ежедневная задача: отправка в заданное локальное время с необязательной подготовкой заранее.
+    """
+
+    __slots__ = ('name', 'hour', 'minute', 'timezone', 'window', 'callback', 'prepare', 'prepare_ahead')
+
+    def __init__(self, name: str, hour: int, minute: int, timezone: Optional[tzinfo], window: int,
+                 callback: Callable[[], Awaitable[None]], prepare: Optional[Callable[[], Awaitable[None]]] = None,
+                 prepare_ahead: int = 0) -> None:
+        self.name = name
+        self.hour = hour
+        self.minute = minute
+        self.timezone = timezone
+        self.window = window
+        self.callback = callback
+        self.prepare = prepare
+        self.prepare_ahead = prepare_ahead
+
+    def now(self) -> datetime:
+        """
+        Возвращает текущее время в часовом поясе задачи (или в локальном, если пояс не задан).
+
+        Returns:
+            datetime: Текущее время с часовым поясом.
+        """
+        return datetime.now(self.timezone).astimezone(self.timezone)
+
+    def due_on(self, day: date) -> datetime:
+        """
+        Возвращает время отправки в указанный день.
+
+        Args:
+            day (date): Дата в часовом поясе задачи.
+
+        Returns:
+            datetime: Время отправки с часовым поясом.
+        """
+        due = datetime.combine(day, time(self.hour, self.minute))
+        return due.replace(tzinfo=self.timezone) if self.timezone else due.astimezone()
+
+
+class DailyScheduler:
+    """
+    Планировщик, который спит ровно до ближайшей задачи среди всех целей.
+
+    Даты последних отправок сохраняются на диск, поэтому после перезапуска сообщение не отправляется
+    повторно, а пропущенная отправка выполняется, если с её времени прошло не больше window минут.
+
+    Если задано общее хранилище, даты отправок хранятся и в нём, а отправку под распределённой блокировкой
+    выполняет только один из экземпляров бота.
+    """
+
+    def __init__(self, state_path: str, storage: Optional[Storage] = None) -> None:
+        self.state_path = state_path
+        self.storage = storage
+        self.last_sent: Dict[str, str] = load_json_file(state_path, {})
+        self._jobs: Dict[str, DailyJob] = {}
+        self._heap: List[Tuple[float, int, str, str]] = []
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def add(self, job: DailyJob) -> None:
+        """
+        Добавляет задачу и планирует её ближайший запуск.
+
+        Args:
+            job (DailyJob): Задача.
+        """
+        self._jobs[job.name] = job
+        self._schedule(job)
+        self._wakeup.set()
+
+    def _schedule(self, job: DailyJob) -> None:
+        """
+        Помещает в кучу ближайшие подготовку и отправку задачи.
+
+        Args:
+            job (DailyJob): Задача.
+        """
+        now = job.now()
+        today = now.date()
+        due = job.due_on(today)
+        # Сегодня уже отправляли или окно отправки прошло - переносим на завтра
+        if self.last_sent.get(job.name) == today.isoformat() or now > due + timedelta(minutes=job.window):
+            due = job.due_on(today + timedelta(days=1))
+
+        if job.prepare and job.prepare_ahead:
+            prepare_at = due - timedelta(minutes=job.prepare_ahead)
+            if prepare_at > now:
+                heapq.heappush(self._heap, (prepare_at.timestamp(), next(self._counter), 'prepare', job.name))
+        heapq.heappush(self._heap, (due.timestamp(), next(self._counter), 'send', job.name))
+        logger.info(f"Scheduled {job.name} for {due.isoformat()}")
+
+    def next_due(self) -> Optional[float]:
+        """
+        Возвращает время ближайшей задачи (timestamp) или None, если задач нет.
+
+        Returns:
+            Optional[float]: Время ближайшей задачи.
+        """
+        return self._heap[0][0] if self._heap else None
+
+    async def run(self) -> None:
+        """
+        Выполняет задачи в порядке времени, засыпая до ближайшей из них.
+        """
+        while True:
+            self._wakeup.clear()
+            due = self.next_due()
+            delay = None if due is None else due - datetime.now().timestamp()
+            if delay is None or delay > 0:
+                try:
+                    # Просыпаемся к ближайшей задаче или раньше, если добавили новую
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, kind, name = heapq.heappop(self._heap)
+            job = self._jobs[name]
+            if kind == 'prepare':
+                try:
+                    await job.prepare()
+                except Exception as e:
+                    logger.error(f"Error preparing {name}: {e}")
+                continue
+
+            # Сохраняем дату отправки до самой отправки, чтобы сбой не привёл к повторной отправке после перезапуска
+            today = job.now().date().isoformat()
+            claimed = await self._claim(name, today)
+            self.last_sent[name] = today
+            save_json_file(self.state_path, self.last_sent)
+            if claimed:
+                try:
+                    await job.callback()
+                except Exception as e:
+                    logger.error(f"Error running {name}: {e}")
+            else:
+                logger.info(f"{name} for {today} is already sent by another replica")
+            self._schedule(job)
+
+    async def _claim(self, name: str, day: str) -> bool:
+        """
+        Закрепляет отправку задачи за этим экземпляром бота в общем хранилище.
+
+        Под блокировкой проверяется и записывается дата последней отправки, поэтому из нескольких
+        экземпляров, проснувшихся одновременно, отправку выполняет только один. Если хранилище недоступно,
+        отправка выполняется (лучше отправить сообщение дважды, чем не отправить его совсем).
+
+        Args:
+            name (str): Имя задачи.
+            day (str): Дата отправки в формате ISO.
+
+        Returns:
+            bool: True, если отправку должен выполнить этот экземпляр.
+        """
+        if self.storage is None:
+            return True
+        lock = DistributedLock(self.storage, f'broadcast:{name}', ttl=60)
+        try:
+            if not await lock.acquire(timeout=30):
+                return False
+            try:
+                if await self.storage.get(f'sent:{name}') == day:
+                    return False
+                await self.storage.set(f'sent:{name}', day, ttl=7 * 24 * 3600)
+                return True
+            finally:
+                await lock.release()
+        except StorageError as e:
+            logger.error(f"Error claiming {name} in shared storage, sending anyway: {e}")
+            return True
@@ -0,0 +1,307 @@
+# Общее хранилище для нескольких экземпляров бота: в памяти процесса или на сервере с протоколом Redis
+import asyncio
+import secrets
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from utils.basic import config, logger
+
+
+class StorageError(Exception):
+    """
+    Ошибка хранилища (например, ответ сервера с ошибкой или разрыв соединения).
+    """
+
+
+class Storage(ABC):
+    """
+    Интерфейс хранилища строк по ключам со временем жизни записей.
+    """
+
+    # Разделяются ли данные с другими процессами
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Возвращает значение по ключу.
+
+        Args:
+            key (str): Ключ.
+
+        Returns:
+            Optional[str]: Значение или None, если ключа нет или срок его жизни истёк.
+        """
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """
+        Сохраняет значение.
+
+        Args:
+            key (str): Ключ.
+            value (str): Значение.
+            ttl (float, optional): Время жизни в секундах (по умолчанию бессрочно).
+        """
+
+    @abstractmethod
+    async def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        """
+        Атомарно сохраняет значение, только если ключа нет.
+
+        Returns:
+            bool: True, если значение сохранено.
+        """
+
+    @abstractmethod
+    async def delete_if_equals(self, key: str, value: str) -> bool:
+        """
+        Атомарно удаляет ключ, только если его значение совпадает с value.
+
+        Returns:
+            bool: True, если ключ удалён.
+        """
+
+    async def close(self) -> None:
+        """
+        Освобождает ресурсы хранилища.
+        """
+
+
+class MemoryStorage(Storage):
+    """
+    Хранилище в памяти процесса.
+
+    Используется, когда бот работает в одном экземпляре, и как замена серверу в проверках.
+    """
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+
+    def _alive(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._alive(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    async def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        if self._alive(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete_if_equals(self, key: str, value: str) -> bool:
+        if self._alive(key) != value:
+            return False
+        del self._data[key]
+        return True
+
+
+# Удаление ключа, только если он всё ещё принадлежит владельцу блокировки
+RELEASE_SCRIPT = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+
+
+class RedisStorage(Storage):
+    """
+    Хранилище на сервере с протоколом Redis (RESP2): Redis, Valkey, KeyDB, Dragonfly и совместимые заглушки.
+
+    Клиент не требует сторонних библиотек: команды выполняются по одной через общее соединение,
+    которое переустанавливается после ошибки. Подключение и каждая команда ограничены по времени, чтобы
+    зависший сервер не блокировал планировщик; прерванное на середине соединение закрывается, чтобы
+    ответ на старую команду не был прочитан как ответ на следующую.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, prefix: str = 'stankin_schedule:', timeout: float = 5) -> None:
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.db = int(parsed.path.strip('/') or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> None:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.password:
+                auth = ('AUTH', self.username, self.password) if self.username else ('AUTH', self.password)
+                await self._send(reader, writer, *auth)
+            if self.db:
+                await self._send(reader, writer, 'SELECT', self.db)
+        except BaseException:
+            writer.close()
+            raise
+        # Соединение становится общим только после успешной авторизации и выбора базы
+        self._reader, self._writer = reader, writer
+
+    async def _send(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, *args: Any) -> Any:
+        parts = [str(arg).encode() for arg in args]
+        writer.write(b''.join([b'*%d\r\n' % len(parts)] + [b'$%d\r\n%s\r\n' % (len(part), part) for part in parts]))
+        await writer.drain()
+        return await self._read(reader)
+
+    async def _read(self, reader: asyncio.StreamReader) -> Any:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError('connection closed by server')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise StorageError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            return (await reader.readexactly(length + 2))[:-2].decode()
+        if kind == b'*':
+            length = int(payload)
+            return None if length < 0 else [await self._read(reader) for _ in range(length)]
+        raise ConnectionError(f'unexpected reply {line!r}')
+
+    async def command(self, *args: Any) -> Any:
+        """
+        Выполняет команду на сервере.
+
+        Args:
+            *args: Имя команды и её аргументы.
+
+        Returns:
+            Any: Ответ сервера.
+
+        Raises:
+            StorageError: Если сервер вернул ошибку, недоступен или не ответил за timeout секунд.
+        """
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await asyncio.wait_for(self._connect(), self.timeout)
+                return await asyncio.wait_for(self._send(self._reader, self._writer, *args), self.timeout)
+            except StorageError:
+                # Ответ с ошибкой прочитан целиком, соединение можно использовать дальше
+                raise
+            except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                self._drop()
+                raise StorageError(f'{self.host}:{self.port}: {e!r}') from e
+            except BaseException:
+                # Команда прервана (например, отменена) - ответ на неё мог остаться непрочитанным
+                self._drop()
+                raise
+
+    def _drop(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _disconnect(self) -> None:
+        writer = self._writer
+        self._drop()
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.command('GET', self.prefix + key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        if ttl:
+            await self.command('SET', self.prefix + key, value, 'PX', int(ttl * 1000))
+        else:
+            await self.command('SET', self.prefix + key, value)
+
+    async def set_if_absent(self, key: str, value: str, ttl: Optional[float] = None) -> bool:
+        args = ('PX', int(ttl * 1000)) if ttl else ()
+        return await self.command('SET', self.prefix + key, value, 'NX', *args) == 'OK'
+
+    async def delete_if_equals(self, key: str, value: str) -> bool:
+        return await self.command('EVAL', RELEASE_SCRIPT, 1, self.prefix + key, value) == 1
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._disconnect()
+
+
+class DistributedLock:
+    """
+    Блокировка в общем хранилище с ограниченным временем владения.
+
+    Если владелец не освободил блокировку (например, процесс завершился), она снимается сама через ttl секунд.
+    Освободить блокировку может только её владелец.
+    """
+
+    def __init__(self, storage: Storage, name: str, ttl: float = 60) -> None:
+        self.storage = storage
+        self.key = f'lock:{name}'
+        self.ttl = ttl
+        self.token = secrets.token_hex(8)
+
+    async def acquire(self, timeout: float = 0, interval: float = 0.2) -> bool:
+        """
+        Захватывает блокировку, при необходимости ожидая её освобождения.
+
+        Args:
+            timeout (float, optional): Максимальное время ожидания в секундах (0 - одна попытка).
+            interval (float, optional): Интервал между попытками в секундах.
+
+        Returns:
+            bool: True, если блокировка захвачена.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if await self.storage.set_if_absent(self.key, self.token, self.ttl):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(interval)
+
+    async def release(self) -> None:
+        """
+        Освобождает блокировку, если она всё ещё принадлежит этому владельцу.
+        """
+        await self.storage.delete_if_equals(self.key, self.token)
+
+
+def create_storage(url: Optional[str]) -> Storage:
+    """
+    Создаёт хранилище по адресу: redis://[:пароль@]хост[:порт][/номер базы] или memory:// (по умолчанию).
+
+    Args:
+        url (str, optional): Адрес хранилища.
+
+    Returns:
+        Storage: Хранилище.
+
+    Raises:
+        ValueError: Если схема адреса не поддерживается.
+    """
+    if not url or url.startswith('memory://'):
+        return MemoryStorage()
+    if url.startswith('redis://'):
+        logger.info(f"Using shared storage at {urlparse(url).hostname}:{urlparse(url).port or 6379}")
+        return RedisStorage(url, config.get('STORAGE_PREFIX', 'stankin_schedule:'), config.get('STORAGE_TIMEOUT', 5))
+    raise ValueError(f'Unsupported STORAGE_URL scheme: {url}')
+
+
+storage = create_storage(config.get('STORAGE_URL'))
@@ -0,0 +1,118 @@
+# Справочник полных имён преподавателей
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+from utils.basic import logger
+
+
+def normalize_initials(initials: str) -> str:
+    """
+    Приводит фамилию с инициалами к виду, не зависящему от пробелов, точек, регистра и буквы 'ё'.
+
+    Например, 'Иванов И.И.', 'Иванов И. И.' и 'иванов И.И' дают одинаковый результат.
+
+    Args:
+        initials (str): Фамилия с инициалами.
+
+    Returns:
+        str: Нормализованный ключ.
+    """
+    return re.sub(r'[\s.]', '', initials).lower().replace('ё', 'е')
+
+
+class TeacherDirectory:
+    """
+    Справочник преподавателей, загружаемый из JSON-файла один раз и перечитываемый только при изменении файла.
+
+    Время изменения файла проверяется не чаще одного раза в check_interval секунд, поэтому поиск имени - это
+    обращение к словарю. При check_interval = None файл перечитывается только вызовом reload (например, фоновым
+    наблюдателем после завершения записи файла). Если новая версия файла не читается или файл удалён,
+    продолжает использоваться последняя загруженная версия.
+    """
+
+    def __init__(self, file_path: str, check_interval: Optional[float] = 5) -> None:
+        self.file_path = file_path
+        self.check_interval = check_interval
+        self._names: Dict[str, str] = {}
+        self._normalized: Dict[str, str] = {}
+        # Время изменения загруженной версии и последнее увиденное время изменения файла (None - файла нет)
+        self._mtime_ns: Optional[int] = None
+        self._seen_mtime_ns: Optional[int] = -1
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> Optional[int]:
+        """
+        Время изменения загруженного файла в наносекундах (None, если файл не загружен).
+        """
+        self._refresh()
+        return self._mtime_ns
+
+    def _refresh(self) -> None:
+        """
+        Проверяет файл, если с прошлой проверки прошло check_interval секунд (или файл ещё не проверялся).
+        """
+        if self.check_interval is None and self._seen_mtime_ns != -1:
+            return
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + (self.check_interval or 0)
+        self.reload()
+
+    def reload(self) -> bool:
+        """
+        Перечитывает файл, если его время изменения отличается от загруженной версии.
+
+        Returns:
+            bool: False, если новую версию файла не удалось прочитать (справочник при этом не меняется).
+        """
+        try:
+            mtime_ns = os.stat(self.file_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        if mtime_ns == self._seen_mtime_ns:
+            return True
+
+        with self._lock:
+            if mtime_ns == self._seen_mtime_ns:
+                return True
+            # Запоминаем версию, чтобы не перечитывать удалённый или повреждённый файл при каждой проверке
+            self._seen_mtime_ns = mtime_ns
+            if mtime_ns is None:
+                if self._names:
+                    logger.warning(f"{self.file_path} is missing, keeping the previous version")
+                return True
+            try:
+                with open(self.file_path, 'r', encoding='utf-8') as file:
+                    names = {key: value for key, value in json.load(file).items() if not key.startswith('_')}
+            except (OSError, ValueError, AttributeError) as e:
+                logger.error(f"Error reading {self.file_path}, keeping the previous version: {e}")
+                return False
+            self._names = names
+            self._normalized = {normalize_initials(key): value for key, value in names.items()}
+            self._mtime_ns = mtime_ns
+            return True
+
+    def get(self, initials: str) -> str:
+        """
+        Возвращает полное имя преподавателя по его инициалам.
+
+        Сначала выполняется точный поиск, затем поиск по нормализованному ключу (см. normalize_initials).
+
+        Args:
+            initials (str): Инициалы преподавателя (например, 'Иванов И.И.').
+
+        Returns:
+            str: Полное имя преподавателя или сами инициалы, если запись не найдена или файл отсутствует.
+        """
+        self._refresh()
+        full_name = self._names.get(initials)
+        if full_name is None:
+            full_name = self._normalized.get(normalize_initials(initials), initials)
+        return full_name
@@ -0,0 +1,136 @@
+# Фоновое наблюдение за файлами расписания и справочника преподавателей
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from utils.basic import logger
+from utils.parser import schedule_cache, teacher_directory
+from utils.workers import reload_schedule_async, run_in_executor
+
+# Состояние файла: (размер, время изменения в наносекундах) или None, если файла нет
+FileState = Optional[Tuple[int, int]]
+
+
+def file_state(file_path: str) -> FileState:
+    """
+    Возвращает размер и время изменения файла.
+
+    Args:
+        file_path (str): Путь к файлу.
+
+    Returns:
+        FileState: Состояние файла или None, если файл отсутствует.
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class FileWatcher:
+    """
+    Наблюдатель за файлами, опрашивающий время изменения и размер.
+
+    Обработчик вызывается, только когда состояние файла не меняется в течение debounce секунд,
+    поэтому файл, который ещё копируется, не читается.
+    """
+
+    def __init__(self, interval: float = 5, debounce: float = 10) -> None:
+        self.interval = interval
+        self.debounce = debounce
+        self._callbacks: Dict[str, Callable[[str], Awaitable[object]]] = {}
+        self._applied: Dict[str, FileState] = {}
+        self._pending: Dict[str, Tuple[FileState, float]] = {}
+
+    def watch(self, file_path: str, callback: Callable[[str], Awaitable[object]]) -> None:
+        """
+        Добавляет файл под наблюдение. Текущая версия файла считается уже обработанной.
+
+        Args:
+            file_path (str): Путь к файлу.
+            callback (Callable[[str], Awaitable[object]]): Корутина, вызываемая с путём к изменившемуся файлу.
+        """
+        path = os.path.abspath(file_path)
+        self._callbacks[path] = callback
+        self._applied[path] = file_state(path)
+
+    async def check(self) -> None:
+        """
+        Проверяет все файлы один раз и вызывает обработчики для файлов, запись которых завершилась.
+        """
+        now = time.monotonic()
+        for path, callback in self._callbacks.items():
+            state = file_state(path)
+            if state == self._applied[path]:
+                self._pending.pop(path, None)
+                continue
+
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != state:
+                # Файл изменился с прошлой проверки - начинаем отсчёт заново
+                self._pending[path] = (state, now)
+                continue
+            if now - pending[1] < self.debounce:
+                continue
+
+            del self._pending[path]
+            self._applied[path] = state
+            if state is None:
+                logger.warning(f"{path} was removed, keeping the previous version")
+                continue
+            try:
+                await callback(path)
+            except Exception as e:
+                logger.error(f"Error handling change of {path}: {e}")
+
+    async def run(self) -> None:
+        """
+        Бесконечно проверяет файлы с интервалом interval секунд.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+
+async def reload_teachers(file_path: str) -> bool:
+    """
+    Перечитывает справочник преподавателей; при ошибке остаётся предыдущая версия.
+
+    Args:
+        file_path (str): Путь к JSON-файлу справочника.
+
+    Returns:
+        bool: True, если новая версия загружена.
+    """
+    loaded = await run_in_executor(None, teacher_directory.reload)
+    if loaded:
+        logger.info(f"Loaded new version of {file_path}")
+    return loaded
+
+
+def watch_schedule_files(pdf_paths: Iterable[str], interval: float = 5, debounce: float = 10) -> FileWatcher:
+    """
+    Создаёт наблюдатель за PDF-файлами расписания и справочником преподавателей.
+
+    Запросы после этого обслуживаются из последней проверенной версии файлов, а новые версии
+    загружаются в фоне (см. reload_schedule_async).
+
+    Args:
+        pdf_paths (Iterable[str]): Пути к PDF-файлам расписания.
+        interval (float, optional): Интервал опроса файлов в секундах.
+        debounce (float, optional): Время, в течение которого файл не должен меняться перед загрузкой, в секундах.
+
+    Returns:
+        FileWatcher: Наблюдатель; его метод run нужно запустить задачей asyncio.
+    """
+    watcher = FileWatcher(interval, debounce)
+    for pdf_path in pdf_paths:
+        schedule_cache.pin(pdf_path)
+        watcher.watch(pdf_path, reload_schedule_async)
+    # Текущая версия справочника загружается сразу, чтобы было к чему вернуться при ошибке
+    teacher_directory.reload()
+    teacher_directory.check_interval = None
+    watcher.watch(teacher_directory.file_path, reload_teachers)
+    return watcher
@@ -0,0 +1,190 @@
+# Приём обновлений Telegram через вебхук (сервер aiohttp) и локальная проверка вебхука
+#
+# Проверка без Telegram: python -m utils.webhook --url http://127.0.0.1:8080/webhook --secret <секрет> [--count 100]
+import argparse
+import asyncio
+import signal
+import time
+from typing import List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import ClientSession, web
+
+from utils.basic import logger
+from utils.metrics import metrics
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик вебхука, выполняющий не более max_concurrency обновлений одновременно.
+
+    Обновление обрабатывается до ответа Telegram, поэтому при заполненном лимите новые запросы ждут
+    своей очереди, а при остановке сервера aiohttp дожидается завершения уже принятых обновлений.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: str, max_concurrency: int = 16) -> None:
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=False, secret_token=secret_token)
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        metrics.register_collector('webhook', self.stats)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        # Запросы без верного секрета отклоняются до ожидания лимита
+        if not self.verify_secret(request.headers.get(SECRET_HEADER, ''), self.bot):
+            metrics.inc('webhook_requests', status='unauthorized')
+            return web.Response(body='Unauthorized', status=401)
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                response = await super().handle(request)
+            finally:
+                self.in_flight -= 1
+        metrics.inc('webhook_requests', status=str(response.status))
+        return response
+
+    def stats(self) -> dict:
+        """
+        Возвращает количество обновлений в обработке и лимит.
+
+        Returns:
+            dict: Словарь с количеством обрабатываемых обновлений и максимальным количеством.
+        """
+        return {'in_flight': self.in_flight, 'limit': self.max_concurrency}
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, config: dict, secret_token: Optional[str]) -> None:
+    """
+    Запускает сервер aiohttp для приёма обновлений и работает до получения SIGINT или SIGTERM.
+
+    Если задан WEBHOOK_URL, адрес вебхука регистрируется в Telegram; без него сервер можно проверить
+    локально (см. post_fake_updates). При остановке сервер перестаёт принимать запросы и ждёт
+    завершения обрабатываемых обновлений не дольше WEBHOOK_SHUTDOWN_TIMEOUT секунд.
+
+    Args:
+        dp (Dispatcher): Диспетчер aiogram.
+        bot (Bot): Экземпляр бота.
+        config (dict): Конфигурация бота.
+        secret_token (str, optional): Секрет, который Telegram передаёт в заголовке каждого запроса.
+
+    Raises:
+        ValueError: Если секрет не задан.
+    """
+    if not secret_token:
+        raise ValueError('WEBHOOK_SECRET must be set to run in webhook mode')
+
+    path = config.get('WEBHOOK_PATH', '/webhook')
+    host = config.get('WEBHOOK_HOST', '0.0.0.0')
+    port = config.get('WEBHOOK_PORT', 8080)
+    max_concurrency = config.get('WEBHOOK_MAX_CONCURRENCY', 16)
+
+    app = web.Application()
+    BoundedRequestHandler(dp, bot, secret_token, max_concurrency).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port, shutdown_timeout=config.get('WEBHOOK_SHUTDOWN_TIMEOUT', 30)).start()
+    logger.info(f"Webhook server is listening on http://{host}:{port}{path} (max {max_concurrency} concurrent updates)")
+
+    if config.get('WEBHOOK_URL'):
+        await bot.set_webhook(config['WEBHOOK_URL'].rstrip('/') + path, secret_token=secret_token,
+                              max_connections=max_concurrency, allowed_updates=dp.resolve_used_update_types())
+        logger.info(f"Registered webhook {config['WEBHOOK_URL'].rstrip('/') + path}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Stopping webhook server")
+        # Вебхук не удаляется: за балансировщиком могут работать другие экземпляры бота
+        await runner.cleanup()
+
+
+def fake_update(update_id: int, text: str, chat_id: int, user_id: int) -> dict:
+    """
+    Формирует обновление Telegram с текстовым сообщением.
+
+    Args:
+        update_id (int): Идентификатор обновления.
+        text (str): Текст сообщения.
+        chat_id (int): Идентификатор чата.
+        user_id (int): Идентификатор отправителя.
+
+    Returns:
+        dict: Обновление в формате Bot API.
+    """
+    chat = {'id': chat_id, 'type': 'private' if chat_id > 0 else 'supergroup'}
+    if chat_id < 0:
+        chat['title'] = 'Test'
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': chat,
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Test'},
+            'text': text,
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}] if text.startswith('/') else []
+        }
+    }
+
+
+async def post_fake_updates(url: str, secret_token: str, count: int, concurrency: int, text: str,
+                            chat_id: int, user_id: int) -> List[int]:
+    """
+    Отправляет на вебхук поддельные обновления так, как это делает Telegram.
+
+    Args:
+        url (str): Адрес вебхука.
+        secret_token (str): Секрет для заголовка X-Telegram-Bot-Api-Secret-Token.
+        count (int): Количество обновлений.
+        concurrency (int): Количество одновременных запросов.
+        text (str): Текст сообщений.
+        chat_id (int): Идентификатор чата.
+        user_id (int): Идентификатор отправителя.
+
+    Returns:
+        List[int]: HTTP-статусы ответов.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with ClientSession() as session:
+        async def post(update_id: int) -> int:
+            async with semaphore:
+                async with session.post(url, json=fake_update(update_id, text, chat_id, user_id),
+                                        headers={SECRET_HEADER: secret_token}) as response:
+                    return response.status
+
+        return await asyncio.gather(*(post(update_id) for update_id in range(1, count + 1)))
+
+
+def main() -> None:
+    """
+    Точка входа командной строки: отправляет поддельные обновления на локальный вебхук и выводит статистику.
+    """
+    arg_parser = argparse.ArgumentParser(description='Отправка поддельных обновлений Telegram на вебхук')
+    arg_parser.add_argument('--url', default='http://127.0.0.1:8080/webhook', help='Адрес вебхука')
+    arg_parser.add_argument('--secret', required=True, help='Секрет вебхука (WEBHOOK_SECRET)')
+    arg_parser.add_argument('--count', type=int, default=100, help='Количество обновлений')
+    arg_parser.add_argument('--concurrency', type=int, default=20, help='Количество одновременных запросов')
+    arg_parser.add_argument('--text', default='/code', help='Текст сообщений')
+    arg_parser.add_argument('--chat-id', type=int, default=1, help='Идентификатор чата')
+    arg_parser.add_argument('--user-id', type=int, default=1, help='Идентификатор отправителя')
+    args = arg_parser.parse_args()
+
+    start = time.perf_counter()
+    statuses = asyncio.run(post_fake_updates(args.url, args.secret, args.count, args.concurrency, args.text,
+                                             args.chat_id, args.user_id))
+    elapsed = time.perf_counter() - start
+    summary = ', '.join(f'{status}: {statuses.count(status)}' for status in sorted(set(statuses)))
+    print(f'Sent {len(statuses)} updates in {elapsed:.2f}s ({len(statuses) / elapsed:.1f}/s); statuses: {summary}')
+
+
+if __name__ == '__main__':
+    main()
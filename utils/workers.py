@@ -0,0 +1,388 @@
+# Выполнение тяжёлых операций с расписанием вне цикла событий asyncio
+import asyncio
+import contextvars
+import logging.handlers
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from utils.basic import config, logger, split_message
+from utils.cache import TTLCache
+from utils.compiled import dump_compiled, loads_compiled
+from utils.index import ScheduleIndex
+from utils.logs import init_worker_logging, start_worker_logging
+from utils.metrics import metrics
+from utils.parser import create_message, file_fingerprint, load_fresh_schedule, schedule_cache, teacher_directory
+from utils.storage import DistributedLock, StorageError, storage
+
+# Пул для извлечения расписания из PDF-файлов
+_executor: Optional[Executor] = None
+
+# Поток, передающий записи лога из процессов пула в лог основного процесса
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+T = TypeVar('T')
+
+# Незавершённые загрузки расписания по путям к PDF-файлам
+_in_flight: Dict[str, asyncio.Future] = {}
+
+# Готовые сообщения с расписанием по (дата, тип сообщения, группа, версия расписания, версия справочника преподавателей)
+render_cache = TTLCache(config.get('RENDER_CACHE_SIZE', 256), config.get('RENDER_CACHE_TTL', 3600))
+metrics.register_collector('render_cache', render_cache.stats)
+
+
+def get_executor() -> Executor:
+    """
+    Возвращает пул для извлечения расписания, создавая его при первом обращении.
+
+    Тип пула задаётся параметром EXECUTOR ('thread' или 'process'), размер - параметром EXECUTOR_WORKERS.
+
+    Returns:
+        Executor: Пул потоков или процессов.
+    """
+    global _executor, _log_listener
+    if _executor is None:
+        workers = config.get('EXECUTOR_WORKERS', 2)
+        if config.get('EXECUTOR', 'thread') == 'process':
+            records, _log_listener = start_worker_logging()
+            _executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker_logging,
+                                            initargs=(records, logging.getLogger().level))
+        else:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='schedule')
+        logger.info(f"Started {type(_executor).__name__} with {workers} workers")
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """
+    Останавливает пул для извлечения расписания.
+    """
+    global _executor, _log_listener
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+def run_in_executor(executor: Optional[Executor], func: Callable[..., T], *args: Any) -> 'asyncio.Future[T]':
+    """
+    Выполняет функцию в пуле, как loop.run_in_executor, сохраняя в потоках пула контекст вызывающей задачи.
+
+    Без копирования контекста записи лога из потока не получают контекст обновления (см. update_context)
+    и не учитывают решение о выборке. В процессы контекст не передаётся.
+
+    Args:
+        executor (Executor, optional): Пул (None - пул потоков цикла событий по умолчанию).
+        func (Callable[..., T]): Функция.
+        *args: Аргументы функции.
+
+    Returns:
+        asyncio.Future[T]: Результат функции.
+    """
+    loop = asyncio.get_running_loop()
+    if isinstance(executor, ProcessPoolExecutor):
+        return loop.run_in_executor(executor, func, *args)
+    return loop.run_in_executor(executor, contextvars.copy_context().run, func, *args)
+
+
+async def get_schedule_async(file_path: str) -> dict:
+    """
+    Возвращает расписание, не блокируя цикл событий.
+
+    Если расписание уже есть в кеше, оно возвращается сразу. Иначе загрузка выполняется в пуле,
+    а одновременные запросы одного и того же файла ожидают одну общую загрузку.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+
+    Returns:
+        dict: Структурированные данные расписания (см. parse_pdf).
+    """
+    with metrics.timer('cache_lookup', cache='schedule'):
+        schedule = schedule_cache.peek(file_path)
+    if schedule is not None:
+        return schedule
+
+    path = os.path.abspath(file_path)
+    future = _in_flight.get(path)
+    if future is None:
+        future = asyncio.ensure_future(_load(path))
+        _in_flight[path] = future
+        future.add_done_callback(lambda _: _in_flight.pop(path, None))
+    # shield защищает общую загрузку от отмены одним из ожидающих
+    return await asyncio.shield(future)
+
+
+async def _load(path: str) -> dict:
+    """
+    Загружает расписание в пуле и сохраняет его в кеш.
+
+    Args:
+        path (str): Абсолютный путь к PDF-файлу.
+
+    Returns:
+        dict: Структурированные данные расписания (см. parse_pdf).
+    """
+    with metrics.timer('schedule_load'):
+        fingerprint, schedule, date_rules = await fetch_schedule(path)
+    schedule_cache.store(path, fingerprint, schedule, date_rules)
+    return schedule
+
+
+async def fetch_schedule(path: str) -> Tuple[Tuple[str, int, int, str], dict, dict]:
+    """
+    Загружает расписание в пуле (см. load_fresh_schedule), а при общем хранилище - через него.
+
+    В общем хранилище расписание лежит по хешу PDF-файла, поэтому файл парсит только один экземпляр бота:
+    остальные ждут его под распределённой блокировкой и забирают готовый результат. Если хранилище
+    недоступно, расписание загружается локально.
+
+    Args:
+        path (str): Абсолютный путь к PDF-файлу.
+
+    Returns:
+        Tuple[Tuple[str, int, int, str], dict, dict]: Отпечаток, расписание и правила дат.
+    """
+    if not storage.shared:
+        return await run_in_executor(get_executor(), load_fresh_schedule, path)
+
+    fingerprint = await run_in_executor(None, file_fingerprint, path)
+    key = f'schedule:{fingerprint[3]}'
+    try:
+        artifact = loads_compiled(await storage.get(key) or '', fingerprint)
+        if artifact is None:
+            lock = DistributedLock(storage, key, ttl=config.get('SHARED_PARSE_TIMEOUT', 300))
+            acquired = await lock.acquire(timeout=config.get('SHARED_PARSE_TIMEOUT', 300))
+            try:
+                # Пока ждали блокировку, расписание мог загрузить другой экземпляр
+                artifact = loads_compiled(await storage.get(key) or '', fingerprint)
+                if artifact is None:
+                    fingerprint, schedule, date_rules = await run_in_executor(get_executor(), load_fresh_schedule, path)
+                    await storage.set(key, dump_compiled(schedule, fingerprint, date_rules), ttl=config.get('SHARED_SCHEDULE_TTL', 30 * 24 * 3600))
+                    return fingerprint, schedule, date_rules
+            finally:
+                if acquired:
+                    await lock.release()
+        logger.info(f"Loaded schedule {fingerprint[3][:12]} from shared storage")
+        return fingerprint, artifact['schedule'], artifact['date_rules']
+    except StorageError as e:
+        logger.error(f"Shared storage is unavailable, loading {path} locally: {e}")
+        return await run_in_executor(get_executor(), load_fresh_schedule, path)
+
+
+def validate_schedule(schedule: dict, date_rules: Optional[dict] = None, days: int = 7) -> ScheduleIndex:
+    """
+    Проверяет, что из PDF-файла извлечено правдоподобное расписание, которое можно отправлять.
+
+    Кроме наличия занятий проверяется, что по расписанию строится индекс и формируются сообщения на ближайшие
+    дни: ошибка в новой версии файла обнаруживается до замены ею предыдущей версии, а не при первом запросе.
+
+    Args:
+        schedule (dict): Структурированные данные расписания (см. parse_pdf).
+        date_rules (dict, optional): Заранее разобранные правила дат (см. build_date_rules).
+        days (int, optional): Количество дней, начиная с сегодняшнего, для которых формируются сообщения.
+
+    Returns:
+        ScheduleIndex: Построенный индекс, чтобы не строить его повторно.
+
+    Raises:
+        ValueError: Если расписание пустое или не содержит ни одного занятия.
+        Exception: Любая ошибка построения индекса или формирования сообщения.
+    """
+    if not isinstance(schedule, dict) or not schedule:
+        raise ValueError('schedule has no days')
+    if not any(lesson for day in schedule.values() for lesson in day):
+        raise ValueError('schedule has no lessons')
+    index = ScheduleIndex(schedule, date_rules)
+    if not any(lesson for day in index.lessons.values() for lesson in day):
+        raise ValueError('schedule has no lessons')
+    today = datetime.today()
+    for increment_day in range(days):
+        create_message(index.day((today + timedelta(increment_day)).date()), increment_day, scheduled=False)
+    return index
+
+
+async def reload_schedule_async(file_path: str) -> bool:
+    """
+    Загружает новую версию PDF-файла в пуле, проверяет её и атомарно заменяет ею расписание в кеше.
+
+    Если файл не удалось разобрать или проверка не пройдена (см. validate_schedule), в кеше остаётся
+    предыдущая версия.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+
+    Returns:
+        bool: True, если новая версия загружена.
+    """
+    path = os.path.abspath(file_path)
+    try:
+        with metrics.timer('schedule_load'):
+            fingerprint, schedule, date_rules = await fetch_schedule(path)
+        index = await run_in_executor(None, validate_schedule, schedule, date_rules)
+    except Exception as e:
+        metrics.inc('schedule_reloads', status='error')
+        logger.error(f"Error reloading schedule from {path}, keeping the previous version: {e}")
+        return False
+
+    previous = schedule_cache.fingerprint(path)
+    schedule_cache.store(path, fingerprint, schedule, date_rules, index)
+    metrics.inc('schedule_reloads', status='ok')
+    if previous is None or previous[3] != fingerprint[3]:
+        logger.info(f"Loaded new schedule version from {path} ({fingerprint[3][:12]})")
+    return True
+
+
+async def get_index_async(file_path: str) -> ScheduleIndex:
+    """
+    Возвращает индекс занятий по датам, не блокируя цикл событий.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+
+    Returns:
+        ScheduleIndex: Индекс расписания.
+    """
+    await get_schedule_async(file_path)
+    return schedule_cache.index(file_path)
+
+
+def render_schedule(index: ScheduleIndex, increment_day: int = 0, scheduled: bool = True) -> str:
+    """
+    Формирует сообщение с расписанием на день со смещением increment_day.
+
+    Args:
+        index (ScheduleIndex): Индекс расписания.
+        increment_day (int, optional): Смещение даты (по умолчанию 0).
+        scheduled (bool, optional): Флаг, указывающий на тип формирования сообщения (по умолчанию True).
+
+    Returns:
+        str: Готовое сообщение с расписанием.
+    """
+    day = (datetime.today() + timedelta(increment_day)).date()
+    return create_message(index.day(day), increment_day, scheduled=scheduled)
+
+
+async def render_schedule_async(file_path: str, increment_day: int = 0, scheduled: bool = True, group: Optional[str] = None) -> str:
+    """
+    Загружает расписание и формирует сообщение на день, не блокируя цикл событий.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+        increment_day (int, optional): Смещение даты (по умолчанию 0).
+        scheduled (bool, optional): Флаг, указывающий на тип формирования сообщения (по умолчанию True).
+        group (str, optional): Код группы для ключа кеша сообщений (по умолчанию путь к PDF-файлу).
+
+    Returns:
+        str: Готовое сообщение с расписанием.
+    """
+    index = await get_index_async(file_path)
+    day = (datetime.today() + timedelta(increment_day)).date()
+    key = (day, scheduled, group or file_path, schedule_cache.fingerprint(file_path)[3], teacher_directory.version)
+    with metrics.timer('cache_lookup', cache='render'):
+        message = render_cache.get(key)
+        if message is None:
+            message = await shared_render_get(key)
+            if message is not None:
+                render_cache.set(key, message)
+    if message is None:
+        # Форматирование выполняется в пуле потоков по умолчанию, чтобы не задерживать цикл событий
+        with metrics.timer('render'):
+            message = await run_in_executor(None, render_schedule, index, increment_day, scheduled)
+        render_cache.set(key, message)
+        await shared_render_set(key, message)
+    return message
+
+
+async def shared_render_get(key: tuple) -> Optional[str]:
+    """
+    Ищет готовое сообщение в общем хранилище (если оно используется).
+
+    Args:
+        key (tuple): Ключ кеша сообщений.
+
+    Returns:
+        Optional[str]: Сообщение или None, если его нет или хранилище недоступно.
+    """
+    if not storage.shared:
+        return None
+    try:
+        return await storage.get('render:' + '|'.join(map(str, key)))
+    except StorageError as e:
+        logger.warning(f"Shared render cache is unavailable: {e}")
+        return None
+
+
+async def shared_render_set(key: tuple, message: str) -> None:
+    """
+    Сохраняет готовое сообщение в общее хранилище (если оно используется).
+
+    Args:
+        key (tuple): Ключ кеша сообщений.
+        message (str): Сообщение.
+    """
+    if not storage.shared:
+        return None
+    try:
+        await storage.set('render:' + '|'.join(map(str, key)), message, ttl=render_cache.ttl)
+    except StorageError as e:
+        logger.warning(f"Shared render cache is unavailable: {e}")
+
+
+def render_days(index: ScheduleIndex, increments: List[int]) -> Dict[int, str]:
+    """
+    Формирует сообщения с расписанием на несколько дней за один проход по индексу.
+
+    Args:
+        index (ScheduleIndex): Индекс расписания.
+        increments (List[int]): Смещения дат относительно сегодняшнего дня.
+
+    Returns:
+        Dict[int, str]: Сообщения по смещениям дат.
+    """
+    today = datetime.today()
+    return {increment: create_message(index.day((today + timedelta(increment)).date()), increment, scheduled=False)
+            for increment in increments}
+
+
+async def render_range_async(file_path: str, start_increment: int, end_increment: int, group: Optional[str] = None) -> List[str]:
+    """
+    Формирует расписание на диапазон дней одним сообщением (или несколькими, если оно не помещается в лимит Telegram).
+
+    Дни, уже сформированные ранее, берутся из кеша сообщений, а остальные формируются одним вызовом в пуле потоков.
+    Воскресенья пропускаются.
+
+    Args:
+        file_path (str): Путь к PDF-файлу.
+        start_increment (int): Смещение первого дня диапазона относительно сегодняшнего дня.
+        end_increment (int): Смещение последнего дня диапазона (включительно).
+        group (str, optional): Код группы для ключа кеша сообщений (по умолчанию путь к PDF-файлу).
+
+    Returns:
+        List[str]: Сообщения для отправки (пустой список, если в диапазоне только воскресенья).
+    """
+    index = await get_index_async(file_path)
+    today = datetime.today()
+    version = (group or file_path, schedule_cache.fingerprint(file_path)[3], teacher_directory.version)
+    keys = {increment: ((today + timedelta(increment)).date(), False) + version
+            for increment in range(start_increment, end_increment + 1)}
+
+    with metrics.timer('cache_lookup', cache='render'):
+        messages = {increment: render_cache.get(key) for increment, key in keys.items()}
+        for increment, message in messages.items():
+            if message is None:
+                messages[increment] = await shared_render_get(keys[increment])
+    missing = [increment for increment, message in messages.items() if message is None]
+    if missing:
+        with metrics.timer('render'):
+            rendered = await run_in_executor(None, render_days, index, missing)
+        for increment, message in rendered.items():
+            render_cache.set(keys[increment], message)
+            await shared_render_set(keys[increment], message)
+        messages.update(rendered)
+
+    days = [messages[increment] for increment in keys if messages[increment] != 'Выходной']
+    return split_message('\n\n'.join(days)) if days else []